@@ -0,0 +1,45 @@
+// ============================================================================
+// BREAKPOINT DEBOUNCE
+// ============================================================================
+// WindowBreakpoints reports a new widthBreakpoint as soon as the window
+// crosses a threshold, so dragging a window edge can fire several in a row.
+// The layout callbacks listen to layout-breakpoint (container styles) and
+// relayout-breakpoint (figure relayout) instead, which only take the
+// breakpoint once it has been stable for DEBOUNCE_MS. initial-breakpoint
+// only takes the first one, which the figures are built for.
+// ============================================================================
+
+(function () {
+    var DEBOUNCE_MS = 300;
+    var latest = 0;
+
+    function debounce(breakpoint, current) {
+        var noUpdate = window.dash_clientside.no_update;
+        var call = ++latest;
+        if (!breakpoint || breakpoint === current) {
+            return [noUpdate, noUpdate, noUpdate];
+        }
+        // The first breakpoint after page load is applied straight away.
+        // The figures wait for it, so they need no relayout
+        if (!current) {
+            return [breakpoint, noUpdate, breakpoint];
+        }
+
+        return new Promise(function (resolve) {
+            setTimeout(function () {
+                // A newer breakpoint arrived in the meantime; it wins
+                resolve(
+                    call === latest
+                        ? [breakpoint, breakpoint, noUpdate]
+                        : [noUpdate, noUpdate, noUpdate]
+                );
+            }, DEBOUNCE_MS);
+        });
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        breakpoint: {
+            debounce: debounce,
+        },
+    });
+})();
@@ -0,0 +1,92 @@
+// ============================================================================
+// CHOROPLETH ANIMATION
+// ============================================================================
+// The server sends every year of the map for the selected sex/age once
+// (choropleth-year-values). Moving the year slider and the play/pause
+// animation recolour the map here in the browser with a Patch, so no
+// animation step waits for the server.
+// ============================================================================
+
+(function () {
+    // Recolour the map and swap the statistics for the slider year
+    function recolour(year, data, figure) {
+        var noUpdate = window.dash_clientside.no_update;
+        var i = data && data.years ? data.years.indexOf(year) : -1;
+        if (i === -1) {
+            return [noUpdate, noUpdate];
+        }
+
+        // Counties without data for the year are left off the map
+        var locations = [];
+        var hovertext = [];
+        var z = [];
+        var customdata = [];
+        data.values[i].forEach(function (value, j) {
+            if (value === null) {
+                return;
+            }
+            locations.push(data.locations[j]);
+            hovertext.push(data.hovertext[j]);
+            z.push(value);
+            customdata.push([data.locations[j], value]);
+        });
+
+        // The geometry comes with the full map from the server; until it is
+        // there (or when the year has no data) only the statistics change
+        if (!z.length || !figure || !figure.data || !figure.data.length) {
+            return [noUpdate, data.stats[i]];
+        }
+
+        var patch = new window.dash_clientside.Patch()
+            .assign(["data", 0, "locations"], locations)
+            .assign(["data", 0, "hovertext"], hovertext)
+            .assign(["data", 0, "z"], z)
+            .assign(["data", 0, "customdata"], customdata)
+            .assign(["layout", "title", "text"], data.titles[i])
+            .assign(["layout", "annotations", 0, "text"], data.trends[i])
+            .build();
+        return [patch, data.stats[i]];
+    }
+
+    // Combined play/pause controls and animation steps
+    function animate(playClicks, pauseClicks, nIntervals, state, currentYear, data) {
+        var noUpdate = window.dash_clientside.no_update;
+        var triggered = window.dash_clientside.callback_context.triggered;
+        var trigger = triggered.length ? triggered[0].prop_id.split(".")[0] : null;
+
+        var years = data && data.years && data.years.length ? data.years : [2006, 2024];
+        var first = years[0];
+        var last = years[years.length - 1];
+        state = state || {playing: false, current_year: currentYear};
+
+        if (trigger === "choropleth-play-btn") {
+            var start = currentYear >= last ? first : currentYear;
+            return [start, false, {playing: true, current_year: start}];
+        }
+
+        if (trigger === "choropleth-pause-btn") {
+            return [noUpdate, true, {playing: false, current_year: currentYear}];
+        }
+
+        if (trigger === "choropleth-interval") {
+            if (!state.playing) {
+                return [noUpdate, true, state];
+            }
+            var next = currentYear + 1;
+            if (next > last) {
+                // Stop animation at the last year
+                return [last, true, {playing: false, current_year: last}];
+            }
+            return [next, false, state];
+        }
+
+        return [noUpdate, true, state];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        choropleth_animation: {
+            recolour: recolour,
+            animate: animate,
+        },
+    });
+})();
@@ -0,0 +1,103 @@
+// ============================================================================
+// LINE CHART ANIMATION
+// ============================================================================
+// The server sends the line chart once, with every year in a single trace
+// per line. The cumulative animation frames ("reveal up to year N") are
+// built here in the browser, so the response grows linearly with the
+// number of years instead of quadratically.
+// ============================================================================
+
+(function () {
+    var TYPED_ARRAYS = {
+        i1: Int8Array,
+        u1: Uint8Array,
+        i2: Int16Array,
+        u2: Uint16Array,
+        i4: Int32Array,
+        u4: Uint32Array,
+        f4: Float32Array,
+        f8: Float64Array,
+    };
+
+    // Plotly serialises numeric arrays as {dtype, bdata}; decode to plain arrays
+    function decodeArray(value) {
+        if (!value || Array.isArray(value) || !value.bdata) {
+            return value;
+        }
+        var binary = atob(value.bdata);
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return Array.from(new TYPED_ARRAYS[value.dtype](bytes.buffer));
+    }
+
+    // Points of one trace up to and including a given x value
+    function sliceTrace(trace, upTo) {
+        var keep = [];
+        for (var i = 0; i < trace.x.length; i++) {
+            if (trace.x[i] <= upTo) {
+                keep.push(i);
+            }
+        }
+        var pick = function (values) {
+            return keep.map(function (i) {
+                return values[i];
+            });
+        };
+        var sliced = {x: pick(trace.x), y: pick(trace.y)};
+        if (trace.customdata) {
+            sliced.customdata = pick(trace.customdata);
+        }
+        return sliced;
+    }
+
+    function buildFrames(figure) {
+        if (!figure || !figure.data) {
+            return window.dash_clientside.no_update;
+        }
+
+        var traces = figure.data.map(function (trace) {
+            return {
+                x: decodeArray(trace.x) || [],
+                y: decodeArray(trace.y) || [],
+                customdata: trace.customdata,
+            };
+        });
+
+        // One frame per distinct x value (year), in ascending order
+        var steps = [];
+        traces.forEach(function (trace) {
+            trace.x.forEach(function (x) {
+                if (steps.indexOf(x) === -1) {
+                    steps.push(x);
+                }
+            });
+        });
+        steps.sort(function (a, b) {
+            return a - b;
+        });
+
+        var frames = steps.map(function (step) {
+            return {
+                name: String(step),
+                data: traces.map(function (trace) {
+                    return sliceTrace(trace, step);
+                }),
+            };
+        });
+
+        // Start on the first frame, like a server-built animation
+        var data = figure.data.map(function (trace, i) {
+            return frames.length ? Object.assign({}, trace, frames[0].data[i]) : trace;
+        });
+
+        return Object.assign({}, figure, {data: data, frames: frames});
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        line_animation: {
+            build_frames: buildFrames,
+        },
+    });
+})();
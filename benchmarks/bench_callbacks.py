@@ -0,0 +1,395 @@
+# ============================================================================
+# CALLBACK BENCHMARK SUITE
+# ============================================================================
+# Drives every server-side callback of src/callbacks.py and every helper of
+# src/visualizations.py directly, over a representative input matrix on the
+# real dataset, and reports the time per call and the serialized payload
+# size. Results can be saved as a JSON baseline; compared against one, the
+# run fails (exit code 1) when a payload got larger, when a function got
+# slower than the timing threshold allows, or when there is no baseline to
+# compare with.
+#
+# Payload sizes are deterministic (fixed-seed cases on the repository's
+# dataset) and held to a strict threshold. Timings are the fastest of
+# REPEAT calls, and are only compared when the baseline was saved on the
+# same host, with a threshold above the run-to-run spread measured there
+# (up to about 95% on a single-CPU VM); on any other host they are reported
+# but don't gate. benchmarks/baseline.json is one such baseline: its
+# payload sizes hold everywhere, its timings only on the host it names.
+#
+# The figure cache is disabled so every call does the real work; figure
+# skeletons are on (as in production) and built by an untimed first call.
+# Runs offline: only the data files in the repository are read.
+#
+# Run from the repository root:
+#     python -m benchmarks.bench_callbacks [--save] [--baseline PATH]
+#         [--threshold 1.5] [--payload-threshold 0.01] [--repeat 15]
+#         [--only NAME ...]
+# ============================================================================
+
+"""Callback and visualization helper benchmarks with regression thresholds."""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+import dash
+import plotly.graph_objects as go
+
+from config import BASE_DIR, GENDER_MAP, VALID_AGE_GROUPS
+from src import visualizations
+from src.callbacks import register_callbacks
+from src.data_cube import NATIONAL_COUNTY
+from src.data_registry import get_registry
+from src.figure_cache import FigureCache, encode_output
+from src.layouts import breakpoint_names, heatmap_order_options
+from src.skeletons import SkeletonCache
+from src.warmup import warmup_tasks
+
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "benchmarks", "baseline.json")
+
+# Timed calls per case (the fastest is kept) and cases per callback
+REPEAT = 15
+CASES_PER_CALLBACK = 8
+SEED = 0
+
+# A function regresses when it is this much slower than a baseline from the
+# same host, and slower by at least MIN_DELTA_MS, or when its payload is
+# PAYLOAD_THRESHOLD larger than the baseline's
+THRESHOLD = 1.5
+MIN_DELTA_MS = 5.0
+PAYLOAD_THRESHOLD = 0.01
+
+# Callbacks driven with a sample of the warm-up's input space
+SAMPLED_CALLBACKS = (
+    "relayout_figures",
+    "barplot_20_vs_24",
+    "update_gender_ratio",
+    "update_line_chart",
+    "update_heatmap",
+    "update_choropleth",
+    "patch_choropleth",
+    "load_choropleth_years",
+)
+
+
+# ============================================================================
+# INPUT MATRIX
+# ============================================================================
+
+
+def callback_cases(registry, callbacks):
+    """
+    Arguments to drive each callback with.
+
+    The figure callbacks get a fixed-seed sample of the warm-up's input
+    space (every argument the app can send); the rest get a few fixed
+    cases. control_and_animate_choropleth reads dash.callback_context, so
+    it only runs inside a request and is left out.
+    """
+    rng = random.Random(SEED)
+    cases = {}
+    sampled = [name for name in SAMPLED_CALLBACKS if name in callbacks]
+    for name, args in warmup_tasks(registry, sampled):
+        cases.setdefault(name, []).append(args)
+    for name, args_list in cases.items():
+        if len(args_list) > CASES_PER_CALLBACK:
+            cases[name] = rng.sample(args_list, CASES_PER_CALLBACK)
+
+    sexes = list(GENDER_MAP.values())
+    ages = list(VALID_AGE_GROUPS)
+    size = (None, None)
+    fixed = {
+        "update_all_chart_containers": [(bp,) for bp in breakpoint_names],
+        "update_all_controls_style": [(bp,) for bp in breakpoint_names],
+        "toggle_bar_chart": [(1, {"display": "none"}), (2, {"display": "block"})],
+        "line_chart_figure": [
+            ("All medications", sexes, ages, "desktop") + size,
+            ("Methylphenidate", ["Girls"], ["15-19"], "mobile") + size,
+        ],
+        # Ticking a box: a Patch against the figure the browser shows
+        "update_line_chart": [
+            (
+                "All medications",
+                sexes,
+                ages,
+                "desktop",
+                ["All medications", sexes[:2], ages, "desktop"] + list(size),
+                "desktop",
+            )
+            + size,
+            (
+                "Lisdexamfetamine",
+                ["Boys"],
+                ages[:2],
+                "tablet",
+                ["Lisdexamfetamine", ["Boys"], ages[:3], "tablet"] + list(size),
+                "tablet",
+            )
+            + size,
+        ],
+    }
+    for name, args_list in fixed.items():
+        if name in callbacks:
+            cases.setdefault(name, []).extend(args_list)
+    return cases
+
+
+def helper_cases(registry):
+    """Arguments to drive each src/visualizations.py helper with."""
+    cube = registry.cube
+    national = cube.to_frame(None, NATIONAL_COUNTY)
+    regional = cube.to_frame("All medications", cube.regional_counties)
+    ratio_frames = [
+        registry.gender_ratios.to_frame("All medications", NATIONAL_COUNTY),
+        registry.gender_ratios.to_frame("Guanfacine", "Skåne"),
+    ]
+    heatmap_values = cube.select(
+        "All medications", cube.regional_counties, "Boys", "10-14"
+    )
+    charts = ("line", "bar", "ratio", "map")
+    layout = [
+        (bp, height, chart)
+        for bp in breakpoint_names
+        for chart in charts
+        for height in (None, 700)
+    ]
+    orders = [option["value"] for option in heatmap_order_options]
+
+    return {
+        "responsive_height": layout,
+        "responsive_layout": layout,
+        "responsive_layout_patch": layout,
+        "apply_responsive_layout": [
+            (go.Figure(), bp, 1200, height, chart) for bp, height, chart in layout[::4]
+        ],
+        "plot_gender_ratios": [
+            (cube.to_frame(medication, NATIONAL_COUNTY),)
+            for medication in ("All medications", "Guanfacine")
+        ],
+        "plot_gender_ratio_frame": [(frame,) for frame in ratio_frames],
+        "prepare_choropleth_data": [
+            (regional, year, age, sex)
+            for year, age, sex in [(2006, "5-9", "Boys"), (2024, "15-19", "Girls")]
+        ],
+        "calculate_national_average": [
+            (national, year, age, sex)
+            for year, age, sex in [(2006, "5-9", "Boys"), (2024, "15-19", "Girls")]
+        ],
+        "get_national_trend_context": [
+            (national, year, age, sex)
+            for year, age, sex in [(2015, "10-14", "Boys"), (2024, "20-24", "Girls")]
+        ],
+        "format_national_trend": [(4.2, 1.3), (None, 1.3), (2.0, 0.0)],
+        "county_order": [(heatmap_values, order) for order in orders],
+    }
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+
+def payload_bytes(output):
+    """Size of the output serialized as Dash sends it, or None if it can't be."""
+    try:
+        return len(encode_output(output))
+    except (TypeError, ValueError):
+        return None
+
+
+def measure(fn, cases, repeat=REPEAT):
+    """
+    Time fn over every case.
+
+    Each case is called once untimed (to build skeletons and warm caches),
+    then repeat times; the fastest call counts, as noise only adds time.
+
+    Returns:
+    dict: Mean over the cases of the ms per call and of the payload bytes
+        (None if the outputs are not serializable), and the number of cases
+    """
+    times, sizes = [], []
+    for args in cases:
+        output = fn(*args)
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(*args)
+            samples.append(time.perf_counter() - start)
+        times.append(min(samples) * 1e3)
+        sizes.append(payload_bytes(output))
+
+    sizes = [size for size in sizes if size is not None]
+    return {
+        "ms_per_call": statistics.fmean(times),
+        "payload_bytes": round(statistics.fmean(sizes)) if sizes else None,
+        "cases": len(cases),
+    }
+
+
+def run(only=None, repeat=REPEAT):
+    """
+    Benchmark every callback and helper.
+
+    Parameters:
+    only: Names (e.g. "callbacks.update_heatmap") to restrict the run to
+    repeat: Timed calls per case
+
+    Returns:
+    dict: Name -> measurement (see measure)
+    """
+    registry = get_registry().load_all()
+    callbacks = register_callbacks(
+        dash.Dash(__name__), registry, FigureCache(max_bytes=0), SkeletonCache()
+    )
+
+    targets = []
+    for name, cases in callback_cases(registry, callbacks).items():
+        targets.append((f"callbacks.{name}", callbacks[name], cases))
+    for name, cases in helper_cases(registry).items():
+        targets.append((f"visualizations.{name}", getattr(visualizations, name), cases))
+
+    results = {}
+    for name, fn, cases in targets:
+        if only and name not in only and name.split(".", 1)[1] not in only:
+            continue
+        results[name] = measure(fn, cases, repeat)
+        result = results[name]
+        size = result["payload_bytes"]
+        size_text = "-" if size is None else f"{size / 1024:.1f}"
+        print(
+            f"{name:<45}{result['ms_per_call']:>10.3f}{size_text:>12}"
+            f"{result['cases']:>7}"
+        )
+    return results
+
+
+# ============================================================================
+# BASELINE
+# ============================================================================
+
+
+def host_id():
+    """Identifies the host (and Python) timings were measured with."""
+    return (
+        f"{platform.node()}/{platform.machine()}/{os.cpu_count()} CPUs/"
+        f"Python {platform.python_version()}"
+    )
+
+
+def save_baseline(results, path):
+    """Write the results, with the environment they were measured in."""
+    baseline = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": host_id(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "dataset": get_registry().fingerprint,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"Baseline saved to {path}")
+
+
+def regressions(
+    results,
+    baseline,
+    threshold=THRESHOLD,
+    min_delta_ms=MIN_DELTA_MS,
+    payload_threshold=PAYLOAD_THRESHOLD,
+    timings=True,
+):
+    """
+    Functions slower or heavier than the baseline allows.
+
+    Parameters:
+    timings: Also compare the time per call (only meaningful against a
+        baseline from the same host)
+
+    Returns:
+    list: One message per regression
+    """
+    found = []
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+
+        ms, ms_before = result["ms_per_call"], before["ms_per_call"]
+        slower = ms > ms_before * (1 + threshold) and ms - ms_before >= min_delta_ms
+        if timings and slower:
+            found.append(
+                f"{name}: {ms:.2f} ms per call, baseline {ms_before:.2f} ms "
+                f"(+{ms / ms_before - 1:.0%})"
+            )
+
+        size, size_before = result["payload_bytes"], before["payload_bytes"]
+        if size and size_before and size > size_before * (1 + payload_threshold):
+            found.append(
+                f"{name}: {size} payload bytes, baseline {size_before} "
+                f"(+{size / size_before - 1:.0%})"
+            )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="write the results as the baseline"
+    )
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--min-delta-ms", type=float, default=MIN_DELTA_MS)
+    parser.add_argument("--payload-threshold", type=float, default=PAYLOAD_THRESHOLD)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--only", nargs="+", default=None)
+    args = parser.parse_args()
+
+    print(f"{'function':<45}{'ms/call':>10}{'KB':>12}{'cases':>7}")
+    results = run(only=args.only, repeat=args.repeat)
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        return
+
+    if not os.path.exists(args.baseline):
+        # Without a baseline nothing could be checked, which must not pass
+        print(f"No baseline at {args.baseline}; run with --save to create one")
+        sys.exit(1)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    same_host = baseline.get("host") == host_id()
+    print(f"Baseline from {baseline['created']} on {baseline.get('host', '?')}")
+    if not same_host:
+        print(f"Timings not compared: this is {host_id()}")
+
+    found = regressions(
+        results,
+        baseline,
+        args.threshold,
+        args.min_delta_ms,
+        args.payload_threshold,
+        timings=same_host,
+    )
+    for message in found:
+        print(f"Regression: {message}")
+    if found:
+        sys.exit(1)
+    checked = f"payload threshold {args.payload_threshold:.0%}"
+    if same_host:
+        checked += f", timing threshold {args.threshold:.0%}"
+    print(f"No regressions against {args.baseline} ({checked})")
+
+
+if __name__ == "__main__":
+    main()
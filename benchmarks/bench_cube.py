@@ -0,0 +1,112 @@
+# ============================================================================
+# DATA CUBE BENCHMARK
+# ============================================================================
+# Compares the per-callback data selection done with chained boolean masks
+# on the full DataFrames (before) against slicing the DataCube (after).
+#
+# Run from the repository root:
+#     python -m benchmarks.bench_cube
+# ============================================================================
+
+import timeit
+
+import numpy as np
+
+from src.data_cube import NATIONAL_COUNTY
+from src.data_registry import get_registry
+
+REPEAT = 200
+
+
+def mask_selections(df_national, df_regional):
+    """Selections as the callbacks made them before the cube."""
+    return {
+        "update_line_chart": lambda: df_national[
+            (df_national["medication_category"] == "Methylphenidate")
+            & (df_national["sex"].isin(["Boys", "Girls"]))
+            & (df_national["age_group"].isin(["5-9", "10-14", "15-19", "20-24"]))
+        ],
+        "barplot_20_vs_24": lambda: df_national[
+            (df_national["medication_category"] == "All medications")
+            & (df_national["sex"].isin(["Boys", "Girls"]))
+            & (df_national["year"].isin([2020, 2024]))
+        ],
+        "update_heatmap": lambda: df_regional[
+            (df_regional["medication_category"] == "All medications")
+            & (df_regional["sex"] == "Boys")
+            & (df_regional["age_group"] == "10-14")
+        ],
+        "update_gender_ratio": lambda: df_national[
+            df_national["medication_category"] == "All medications"
+        ],
+        "update_choropleth": lambda: (
+            df_regional[
+                (df_regional["year"] == 2015)
+                & (df_regional["age_group"] == "10-14")
+                & (df_regional["sex"] == "Boys")
+                & (df_regional["medication_category"] == "All medications")
+            ],
+            df_regional[df_regional["medication_category"] == "All medications"][
+                "patients_per_1000"
+            ].max(),
+        ),
+    }
+
+
+def cube_selections(cube):
+    """The same selections made through the DataCube."""
+    counties = cube.regional_counties
+    return {
+        "update_line_chart": lambda: cube.to_frame(
+            "Methylphenidate",
+            NATIONAL_COUNTY,
+            sex=["Boys", "Girls"],
+            age_group=["5-9", "10-14", "15-19", "20-24"],
+        ),
+        "barplot_20_vs_24": lambda: cube.to_frame(
+            "All medications",
+            NATIONAL_COUNTY,
+            sex=["Boys", "Girls"],
+            year=[2020, 2024],
+        ),
+        "update_heatmap": lambda: cube.to_frame(
+            "All medications", counties, sex="Boys", age_group="10-14"
+        ),
+        "update_gender_ratio": lambda: cube.to_frame(
+            "All medications", NATIONAL_COUNTY
+        ),
+        "update_choropleth": lambda: (
+            cube.to_frame(
+                "All medications", counties, sex="Boys", age_group="10-14", year=2015
+            ),
+            np.nanmax(cube.select("All medications", counties)),
+        ),
+        "select (array view)": lambda: cube.select(
+            "All medications", NATIONAL_COUNTY, "Boys"
+        ),
+    }
+
+
+def time_call(fn, repeat=REPEAT):
+    """Mean wall time of one call, in microseconds."""
+    return timeit.timeit(fn, number=repeat) / repeat * 1e6
+
+
+def main():
+    registry = get_registry()
+    before = mask_selections(registry.national, registry.regional)
+    after = cube_selections(registry.cube)
+
+    print(f"{'callback':<22}{'masks (us)':>12}{'cube (us)':>12}{'speedup':>10}")
+    for name, fn in after.items():
+        cube_us = time_call(fn)
+        if name in before:
+            mask_us = time_call(before[name])
+            speedup = mask_us / cube_us
+            print(f"{name:<22}{mask_us:>12.0f}{cube_us:>12.0f}{speedup:>9.1f}x")
+        else:
+            print(f"{name:<22}{'-':>12}{cube_us:>12.1f}{'-':>10}")
+
+
+if __name__ == "__main__":
+    main()
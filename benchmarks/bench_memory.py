@@ -0,0 +1,65 @@
+# ============================================================================
+# MEMORY BENCHMARK
+# ============================================================================
+# Reports the memory used by the processed national and regional frames
+# with the compact dtypes (categoricals, int16, float32) against the object
+# strings / int64 / float64 the pipeline used to emit, plus the time of a
+# typical equality/isin filter on each.
+#
+# Run from the repository root:
+#     python -m benchmarks.bench_memory
+# ============================================================================
+
+import timeit
+
+from src.data_processing import CATEGORY_ORDERS
+from src.data_registry import get_registry
+
+REPEAT = 200
+
+
+def to_wide_dtypes(df):
+    """The dtypes the pipeline emitted before categoricals and downcasting."""
+    return df.astype(
+        {
+            **{col: object for col in CATEGORY_ORDERS if col in df.columns},
+            "year": "int64",
+            "patients_per_1000": "float64",
+        }
+    )
+
+
+def filter_time_us(df):
+    """Mean time of a callback-style filter on the frame, in microseconds."""
+
+    def run():
+        return df[
+            (df["medication_category"] == "All medications")
+            & (df["sex"].isin(["Boys", "Girls"]))
+            & (df["age_group"] == "10-14")
+        ]
+
+    return timeit.timeit(run, number=REPEAT) / REPEAT * 1e6
+
+
+def main():
+    registry = get_registry()
+    frames = {"national": registry.national, "regional": registry.regional}
+
+    print(
+        f"{'frame':<10}{'before (KB)':>13}{'after (KB)':>12}{'saved':>8}"
+        f"{'filter before (us)':>20}{'filter after (us)':>19}"
+    )
+    for name, compact in frames.items():
+        wide = to_wide_dtypes(compact)
+        before_kb = wide.memory_usage(deep=True).sum() / 1024
+        after_kb = compact.memory_usage(deep=True).sum() / 1024
+        saved = 1 - after_kb / before_kb
+        print(
+            f"{name:<10}{before_kb:>13.0f}{after_kb:>12.0f}{saved:>8.0%}"
+            f"{filter_time_us(wide):>20.0f}{filter_time_us(compact):>19.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# ============================================================================
+# FIGURE SKELETON BENCHMARK
+# ============================================================================
+# Compares building and serializing the per-request figures with plotly
+# express (before) against rendering their figure skeletons (after). Both
+# run the registered callbacks with the figure cache disabled; the skeleton
+# of each structure is built once before timing.
+#
+# Run from the repository root:
+#     python -m benchmarks.bench_skeletons
+# ============================================================================
+
+import timeit
+
+import dash
+
+from src.callbacks import register_callbacks
+from src.data_registry import get_registry
+from src.figure_cache import FigureCache, encode_output
+from src.skeletons import SkeletonCache
+
+REPEAT = 20
+
+ALL_SEXES = ["Boys", "Girls", "Both sexes"]
+ALL_AGES = ["5-9", "10-14", "15-19", "20-24"]
+
+# Case -> (callback, arguments)
+CASES = {
+    "line (all lines)": (
+        "line_chart_figure",
+        ("All medications", ALL_SEXES, ALL_AGES, "desktop", None, None),
+    ),
+    "line (one line)": (
+        "line_chart_figure",
+        ("Methylphenidate", ["Girls"], ["15-19"], "desktop", None, None),
+    ),
+    "heatmap (counties)": (
+        "update_heatmap",
+        (
+            "All medications",
+            "All counties",
+            "Boys",
+            "10-14",
+            "latest",
+            "desktop",
+            "desktop",
+            None,
+            None,
+        ),
+    ),
+    "heatmap (one county)": (
+        "update_heatmap",
+        (
+            "Guanfacine",
+            "Skåne",
+            "Girls",
+            "15-19",
+            "code",
+            "desktop",
+            "desktop",
+            None,
+            None,
+        ),
+    ),
+    "sex ratio (county)": (
+        "update_gender_ratio",
+        ("Methylphenidate", "Skåne", "desktop", "desktop", None, None),
+    ),
+    "choropleth": (
+        "update_choropleth",
+        ("desktop", "desktop", 2015, "Boys", "10-14", None, None),
+    ),
+}
+
+
+def callbacks(registry, skeleton_cache):
+    """Callbacks on a throwaway app, without figure caching."""
+    return register_callbacks(
+        dash.Dash(__name__), registry, FigureCache(max_bytes=0), skeleton_cache
+    )
+
+
+def time_build(fn, args, repeat=REPEAT):
+    """Mean time to build and serialize one response, in milliseconds."""
+    return timeit.timeit(lambda: encode_output(fn(*args)), number=repeat) / repeat * 1e3
+
+
+def main():
+    registry = get_registry()
+    before = callbacks(registry, SkeletonCache(max_entries=0))
+    after = callbacks(registry, SkeletonCache())
+
+    print(f"{'figure':<22}{'px (ms)':>10}{'skeleton (ms)':>15}{'speedup':>10}")
+    for name, (callback, args) in CASES.items():
+        after[callback](*args)  # builds the skeleton
+        px_ms = time_build(before[callback], args)
+        skeleton_ms = time_build(after[callback], args)
+        speedup = px_ms / skeleton_ms
+        print(f"{name:<22}{px_ms:>10.1f}{skeleton_ms:>15.2f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
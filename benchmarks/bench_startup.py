@@ -0,0 +1,186 @@
+# ============================================================================
+# COLD-START BENCHMARK
+# ============================================================================
+# Imports dash_app in fresh Python processes, as a new gunicorn worker or
+# autoscaled instance would, and reports the startup phases it times (see
+# src/startup.py) plus the process wall time. The run fails (exit code 1)
+# when the median startup exceeds the budget, or a phase its own budget.
+#
+# The figure store goes to a temporary file and the warm-up is off, so a
+# run neither reads nor writes the shared store. One untimed run first
+# fills the OS file cache and the bytecode caches.
+#
+# Run from the repository root:
+#     python -m benchmarks.bench_startup [--budget 2.5] [--runs 5]
+#         [--phase-budget data=0.5 ...] [--imports 15]
+# ============================================================================
+
+"""Cold-start phases of dash_app, held to a time budget."""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from config import BASE_DIR
+
+# Median seconds from the first import to a ready app (every phase)
+BUDGET_SECONDS = 2.5
+RUNS = 5
+
+_MARKER = "STARTUP_PHASES "
+_CHILD = (
+    "import json, dash_app; "
+    f"print({_MARKER!r} + json.dumps(dash_app.startup.phases))"
+)
+
+
+def _child_env(store_dir):
+    env = dict(os.environ)
+    env["WARMUP_ON_STARTUP"] = "0"
+    env["FIGURE_STORE_PATH"] = os.path.join(store_dir, "figures.sqlite3")
+    return env
+
+
+def startup_run(store_dir):
+    """
+    Import dash_app in a fresh process.
+
+    Returns:
+    dict: Seconds per startup phase, plus "total" (every phase) and
+        "process" (wall time of the whole process, interpreter included)
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD],
+        cwd=BASE_DIR,
+        env=_child_env(store_dir),
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing dash_app failed:\n{result.stderr}")
+
+    line = next(
+        line for line in result.stdout.splitlines() if line.startswith(_MARKER)
+    )
+    phases = json.loads(line[len(_MARKER):])
+    phases["total"] = sum(phases.values())
+    phases["process"] = elapsed
+    return phases
+
+
+def slowest_imports(store_dir, count):
+    """
+    The modules dash_app imports directly, slowest first, from -X importtime.
+
+    Returns:
+    list: (module, cumulative seconds) pairs
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import dash_app"],
+        cwd=BASE_DIR,
+        env=_child_env(store_dir),
+        capture_output=True,
+        text=True,
+    )
+    # A module's imports are listed before it, one nesting level deeper
+    imports, children = [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        # Two spaces per nesting level, after the separator's own space
+        name = name[1:]
+        level = (len(name) - len(name.lstrip())) // 2
+        if level == 1:
+            children.append((name.strip(), int(cumulative) / 1e6))
+        elif level == 0:
+            if name == "dash_app":
+                imports = children
+            children = []
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:count]
+
+
+def run(runs=RUNS):
+    """
+    Median seconds per phase over runs fresh processes (after an untimed one).
+
+    Returns:
+    dict: Phase -> median seconds, in startup order
+    """
+    with tempfile.TemporaryDirectory() as store_dir:
+        startup_run(store_dir)
+        samples = [startup_run(store_dir) for _ in range(runs)]
+    return {name: statistics.median(s[name] for s in samples) for name in samples[0]}
+
+
+def over_budget(medians, budget=BUDGET_SECONDS, phase_budgets=None):
+    """
+    Phases slower than their budget.
+
+    Returns:
+    list: One message per exceeded budget
+    """
+    budgets = dict(phase_budgets or {})
+    budgets["total"] = budget
+    return [
+        f"{name}: {medians[name] * 1000:.0f} ms, budget {limit * 1000:.0f} ms"
+        for name, limit in budgets.items()
+        if name in medians and medians[name] > limit
+    ]
+
+
+def _phase_budget(text):
+    name, _, seconds = text.partition("=")
+    return name, float(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=float, default=BUDGET_SECONDS)
+    parser.add_argument(
+        "--phase-budget",
+        type=_phase_budget,
+        nargs="+",
+        default=[],
+        metavar="PHASE=SECONDS",
+    )
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument(
+        "--imports",
+        type=int,
+        default=0,
+        metavar="N",
+        help="also list the N slowest modules dash_app imports",
+    )
+    args = parser.parse_args()
+
+    medians = run(args.runs)
+    print(f"{'phase':<12}{'ms':>10}")
+    for name, seconds in medians.items():
+        print(f"{name:<12}{seconds * 1000:>10.0f}")
+
+    if args.imports:
+        print(f"\n{'import':<40}{'ms':>10}")
+        with tempfile.TemporaryDirectory() as store_dir:
+            for name, seconds in slowest_imports(store_dir, args.imports):
+                print(f"{name:<40}{seconds * 1000:>10.0f}")
+
+    found = over_budget(medians, args.budget, dict(args.phase_budget))
+    for message in found:
+        print(f"Over budget: {message}")
+    if found:
+        sys.exit(1)
+    print(f"Cold start within budget ({args.budget * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+# ============================================================================
+# LOAD TEST
+# ============================================================================
+# Starts the dashboard locally (Flask's threaded dev server, or one gunicorn
+# worker with the sync or gthread worker class) and replays the
+# _dash-update-component requests of realistic user sessions against it at
+# increasing concurrency. Reports throughput, latency percentiles and
+# error rates, overall and per callback, for every concurrency level.
+#
+# A session is what the browser sends for: a page load, medication
+# switches in the line chart, heatmap and sex ratio dropdowns, a sex/age
+# checkbox toggle and a press of the choropleth's play button. Requests are
+# derived like the Dash renderer does: every server-side callback with a
+# changed input fires, and the outputs it returns fire their dependents.
+# Clientside callbacks are not run, so actions handled in the browser (e.g.
+# the choropleth animation with CHOROPLETH_CLIENTSIDE_ANIMATION=1) send
+# nothing.
+#
+# Run from the repository root:
+#     python -m benchmarks.load_test [--modes dev gunicorn-sync gunicorn-gthread]
+#         [--levels 1 2 4 8 16] [--duration 10] [--warmup 0]
+#         [--json results.json]
+# ============================================================================
+
+"""Ramped load test of one dashboard worker."""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from config import BASE_DIR, GENDER_MAP, VALID_AGE_GROUPS
+
+HOST = "127.0.0.1"
+SERVER_MODES = ("dev", "gunicorn-sync", "gunicorn-gthread")
+LEVELS = (1, 2, 4, 8, 16)
+DURATION = 10.0
+GTHREAD_THREADS = 8
+STARTUP_TIMEOUT = 120.0
+REQUEST_TIMEOUT = 60.0
+
+# Browser viewport the sessions report through the breakpoint component
+VIEWPORT = {"widthBreakpoint": "desktop", "width": 1440, "height": 900}
+
+MEDICATIONS = [
+    "All medications",
+    "Methylphenidate",
+    "Lisdexamfetamine",
+    "Atomoxetine",
+    "Guanfacine",
+    "Dextroamphetamine",
+]
+YEARS = range(2006, 2025)
+
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def server_command(mode, port):
+    """Command starting one worker in mode, or None if it can't run here."""
+    if mode == "dev":
+        return [
+            sys.executable,
+            "-c",
+            "from dash_app import app; "
+            f"app.run(host='{HOST}', port={port}, threaded=True, debug=False)",
+        ]
+    gunicorn = shutil.which("gunicorn")
+    if gunicorn is None:
+        return None
+    command = [gunicorn, "--workers", "1", "--bind", f"{HOST}:{port}"]
+    if mode == "gunicorn-sync":
+        command += ["--worker-class", "sync"]
+    else:
+        command += ["--worker-class", "gthread", "--threads", str(GTHREAD_THREADS)]
+    return command + ["dash_app:server"]
+
+
+class Server:
+    """The dashboard running in a child process, for the with block."""
+
+    def __init__(self, command, port, store_path):
+        self.command = command
+        self.port = port
+        self.env = dict(os.environ, FIGURE_STORE_PATH=store_path)
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            self.command,
+            cwd=BASE_DIR,
+            env=self.env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.process.returncode}")
+            try:
+                connection = http.client.HTTPConnection(HOST, self.port, timeout=5)
+                connection.request("GET", "/")
+                if connection.getresponse().status == 200:
+                    return self
+            except OSError:
+                pass
+            time.sleep(0.25)
+        self.__exit__()
+        raise RuntimeError("Server did not start in time")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+# ============================================================================
+# SESSIONS
+# ============================================================================
+
+
+def _get_json(connection, path):
+    connection.request("GET", path)
+    response = connection.getresponse()
+    return json.loads(response.read())
+
+
+def layout_values(node, values=None):
+    """Every component property set in the layout, as "id.prop" -> value."""
+    if values is None:
+        values = {}
+    if isinstance(node, list):
+        for child in node:
+            layout_values(child, values)
+    elif isinstance(node, dict):
+        props = node.get("props", {})
+        if isinstance(props.get("id"), str):
+            for prop, value in props.items():
+                if prop != "children":
+                    values[f"{props['id']}.{prop}"] = value
+        layout_values(props.get("children"), values)
+    return values
+
+
+def _prop_ids(items):
+    return [f"{item['id']}.{item['property']}" for item in items]
+
+
+def _output_ids(output):
+    """ "id.prop" of every output of a dependency (without the @hash)."""
+    outputs = output[2:-2].split("...") if output.startswith("..") else [output]
+    return [item.split("@")[0] for item in outputs]
+
+
+class Session:
+    """
+    One browser tab: the component properties it holds and the requests
+    its actions send.
+    """
+
+    def __init__(self, dependencies, initial, rng):
+        self.dependencies = [
+            dep for dep in dependencies if not dep.get("clientside_function")
+        ]
+        self.values = dict(initial)
+        self.rng = rng
+
+    @staticmethod
+    def label(dependency):
+        """Short name of a callback: its first output."""
+        return _output_ids(dependency["output"])[0]
+
+    def _body(self, dependency, changed):
+        def _items(items):
+            return [
+                {
+                    "id": item["id"],
+                    "property": item["property"],
+                    "value": self.values.get(f"{item['id']}.{item['property']}"),
+                }
+                for item in items
+            ]
+
+        outputs = [
+            {"id": output.rsplit(".", 1)[0], "property": output.rsplit(".", 1)[1]}
+            for output in _output_ids(dependency["output"])
+        ]
+        return {
+            "output": dependency["output"],
+            "outputs": outputs if dependency["output"].startswith("..") else outputs[0],
+            "inputs": _items(dependency["inputs"]),
+            "state": _items(dependency["state"]),
+            "changedPropIds": [
+                prop for prop in _prop_ids(dependency["inputs"]) if prop in changed
+            ],
+        }
+
+    def _fire(self, send, dependencies, changed, depth=0):
+        """Send the dependencies' requests, then those of what they changed."""
+        updated = set()
+        for dependency in dependencies:
+            response = send(self.label(dependency), self._body(dependency, changed))
+            for component_id, props in (response or {}).items():
+                for prop, value in props.items():
+                    self.values[f"{component_id}.{prop}"] = value
+                    updated.add(f"{component_id}.{prop}")
+        if updated and depth < 5:
+            self._fire(send, self._triggered(updated), updated, depth + 1)
+
+    def _triggered(self, changed):
+        return [
+            dep
+            for dep in self.dependencies
+            if changed & set(_prop_ids(dep["inputs"]))
+        ]
+
+    def page_load(self, send):
+        """The callbacks the renderer fires when the page loads."""
+        initial = [
+            dep for dep in self.dependencies if not dep.get("prevent_initial_call")
+        ]
+        self._fire(send, initial, set())
+
+    def run(self, send):
+        """Page load, medication switches, a checkbox toggle and map play."""
+        self.page_load(send)
+        for dropdown in ("medication", "heatmap-medication", "ratio-medication"):
+            self._set(send, f"{dropdown}-dropdown.value", self.rng.choice(MEDICATIONS))
+
+        sexes = list(GENDER_MAP.values())
+        ages = list(VALID_AGE_GROUPS)
+        self._set(send, "sex-checklist.value", self.rng.sample(sexes, 2))
+        self._set(send, "age-checklist.value", self.rng.sample(ages, 3))
+
+        # Play: the button, then one interval tick per remaining year
+        self._set(send, "choropleth-play-btn.n_clicks", 1)
+        for tick in range(1, len(YEARS)):
+            self._set(send, "choropleth-interval.n_intervals", tick)
+
+    def _set(self, send, prop, value):
+        """A user action: set one property and fire what depends on it."""
+        self.values[prop] = value
+        self._fire(send, self._triggered({prop}), {prop})
+
+
+# ============================================================================
+# LOAD GENERATION
+# ============================================================================
+
+
+class Recorder:
+    """Latency and outcome of every request, by callback."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, label, seconds, ok):
+        with self._lock:
+            self.latencies[label].append(seconds)
+            if not ok:
+                self.errors[label] += 1
+
+
+def _user(port, dependencies, initial, seed, deadline, recorder):
+    """One virtual user running sessions back to back until the deadline."""
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection(HOST, port, timeout=REQUEST_TIMEOUT)
+
+    class _Deadline(Exception):
+        pass
+
+    def send(label, body):
+        nonlocal connection
+        if time.monotonic() >= deadline:
+            raise _Deadline
+        payload = json.dumps(body).encode("utf-8")
+        start = time.perf_counter()
+        try:
+            connection.request(
+                "POST",
+                "/_dash-update-component",
+                payload,
+                {"Content-Type": "application/json"},
+            )
+            response = connection.getresponse()
+            data = response.read()
+            ok = response.status in (200, 204)
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection(HOST, port, timeout=REQUEST_TIMEOUT)
+            recorder.add(label, time.perf_counter() - start, False)
+            return None
+        recorder.add(label, time.perf_counter() - start, ok)
+        if response.status != 200:
+            return None
+        return json.loads(data).get("response")
+
+    try:
+        while time.monotonic() < deadline:
+            Session(dependencies, initial, rng).run(send)
+    except _Deadline:
+        pass
+    finally:
+        connection.close()
+
+
+def run_level(port, dependencies, initial, users, duration):
+    """Run users concurrent sessions for duration seconds."""
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(
+            target=_user,
+            args=(port, dependencies, initial, seed, deadline, recorder),
+        )
+        for seed in range(users)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - start
+
+
+def _summary(latencies, errors, elapsed):
+    latencies = np.asarray(latencies) * 1e3
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99))
+    return {
+        "requests": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "error_rate": errors / len(latencies),
+    }
+
+
+def report(recorder, elapsed):
+    """Overall and per-callback summaries of one level."""
+    per_callback = {
+        label: _summary(latencies, recorder.errors[label], elapsed)
+        for label, latencies in sorted(recorder.latencies.items())
+    }
+    everything = [x for latencies in recorder.latencies.values() for x in latencies]
+    if not everything:
+        return {"overall": None, "callbacks": {}}
+    overall = _summary(everything, sum(recorder.errors.values()), elapsed)
+    return {"overall": overall, "callbacks": per_callback}
+
+
+def _print_row(name, summary):
+    print(
+        f"  {name:<34}{summary['requests']:>8}{summary['throughput']:>9.1f}"
+        f"{summary['p50_ms']:>9.1f}{summary['p95_ms']:>9.1f}{summary['p99_ms']:>9.1f}"
+        f"{summary['error_rate']:>8.1%}"
+    )
+
+
+def load_test(mode, levels=LEVELS, duration=DURATION, store_path=None, warmup=0.0):
+    """
+    Start one worker in mode and ramp the concurrency through levels.
+
+    Parameters:
+    mode: One of SERVER_MODES
+    levels: Numbers of concurrent users, in order
+    duration: Seconds per level
+    store_path: Figure store of the server (default: a new, empty one)
+    warmup: Seconds of untimed single-user load before the first level, so
+        it doesn't pay for building figures and skeletons
+
+    Returns:
+    dict: Users -> report, or None if the mode can't run here
+    """
+    port = _free_port()
+    command = server_command(mode, port)
+    if command is None:
+        print(f"{mode}: gunicorn is not installed, skipped")
+        return None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = store_path or os.path.join(tmp, "figures.sqlite3")
+        with Server(command, port, store_path):
+            connection = http.client.HTTPConnection(HOST, port, timeout=30)
+            dependencies = _get_json(connection, "/_dash-dependencies")
+            initial = layout_values(_get_json(connection, "/_dash-layout"))
+            connection.close()
+            initial.update({f"breakpoint.{k}": v for k, v in VIEWPORT.items()})
+            # Set by the breakpoint clientside callback, which is not run
+            initial["layout-breakpoint.data"] = VIEWPORT["widthBreakpoint"]
+            initial["initial-breakpoint.data"] = VIEWPORT["widthBreakpoint"]
+
+            if warmup > 0:
+                run_level(port, dependencies, initial, 1, warmup)
+
+            results = {}
+            for users in levels:
+                recorder, elapsed = run_level(
+                    port, dependencies, initial, users, duration
+                )
+                results[users] = report(recorder, elapsed)
+                overall = results[users]["overall"]
+                print(f"{mode}, {users} user(s):")
+                print(
+                    f"  {'callback':<34}{'requests':>8}{'req/s':>9}{'p50 ms':>9}"
+                    f"{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}"
+                )
+                if overall is None:
+                    print("  no requests completed")
+                    continue
+                for label, summary in results[users]["callbacks"].items():
+                    _print_row(label, summary)
+                _print_row("all callbacks", overall)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", nargs="+", choices=SERVER_MODES, default=["dev"])
+    parser.add_argument("--levels", nargs="+", type=int, default=list(LEVELS))
+    parser.add_argument("--duration", type=float, default=DURATION)
+    parser.add_argument(
+        "--store", default=None, help="figure store of the server (default: empty)"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=0.0, help="untimed seconds before the ramp"
+    )
+    parser.add_argument("--json", default=None, help="write the results here")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        results[mode] = load_test(
+            mode, args.levels, args.duration, args.store, args.warmup
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
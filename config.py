@@ -5,8 +5,6 @@
 # Stores all global settings, color palettes, templates, and mappings.
 # ============================================================================
 
-import plotly.graph_objects as go
-import plotly.io as pio
 import os
 
 # Paths
@@ -14,6 +12,18 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROCESSED_DATA_PATH = os.path.join(BASE_DIR, "data", "processed")
 RAW_DATA_PATH = os.path.join(BASE_DIR, "data", "raw")
 PROCESSED_CSV = os.path.join(PROCESSED_DATA_PATH, "adhd_medication_2006-2024.csv")
+CACHE_DATA_PATH = os.path.join(BASE_DIR, "data", "cache")
+GEOJSON_PATH = os.path.join(BASE_DIR, "swedish_provinces.geojson")
+GEOJSON_LOD_DIR = os.path.join(BASE_DIR, "data", "geo")
+
+# Simplified county geometry per layout breakpoint (python -m src.geometry).
+# tolerance and min_area are in degrees / square degrees of latitude
+GEOJSON_LOD = {
+    "mobile": {"tolerance": 0.01, "decimals": 2, "min_area": 0.01},
+    "tablet": {"tolerance": 0.006, "decimals": 3, "min_area": 0.004},
+    "desktop": {"tolerance": 0.003, "decimals": 3, "min_area": 0.001},
+    "large": {"tolerance": 0.002, "decimals": 3, "min_area": 0.0005},
+}
 
 # Mapping ATC codes to medication names
 MED_NAME_MAP = {
@@ -24,6 +34,11 @@ MED_NAME_MAP = {
     "C02AC02 Guanfacin": "Guanfacine",
 }
 
+# Mapping aggregate ATC groups to dashboard categories
+MED_GROUP_MAP = {
+    "N06BA,C02AC02 Adhd-läkemedel": "All medications",
+}
+
 # Gender mapping
 GENDER_MAP = {"Män": "Boys", "Kvinnor": "Girls", "Båda könen": "Both sexes"}
 
@@ -64,9 +79,36 @@ FILES_AND_AGES = {
 VALID_AGE_GROUPS = ["5-9", "10-14", "15-19", "20-24"]
 VALID_GENDERS = ["Män", "Kvinnor", "Båda könen"]
 
-# Data paths
-RAW_DATA_PATH = "data/raw/"
-PROCESSED_DATA_PATH = "data/processed/"
+# Byte budget of the in-memory cache of serialized callback figures
+FIGURE_CACHE_MAX_BYTES = int(
+    os.environ.get("FIGURE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+)
+
+# SQLite file shared by every worker on the host, and its byte budget
+FIGURE_STORE_PATH = os.environ.get(
+    "FIGURE_STORE_PATH", os.path.join(CACHE_DATA_PATH, "figures.sqlite3")
+)
+FIGURE_STORE_MAX_BYTES = int(
+    os.environ.get("FIGURE_STORE_MAX_BYTES", 512 * 1024 * 1024)
+)
+
+# Number of figure skeletons (serialized figures with slots for the data,
+# one per chart structure) kept per worker; 0 builds every figure with
+# plotly express
+FIGURE_SKELETON_ENTRIES = int(os.environ.get("FIGURE_SKELETON_ENTRIES", 512))
+
+# Number of recent calls per callback the /metrics quantiles are computed
+# over; 0 turns the callback instrumentation off
+CALLBACK_METRICS_WINDOW = int(os.environ.get("CALLBACK_METRICS_WINDOW", 1024))
+
+# Build every figure into the figure store when dash_app is imported
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "0") == "1"
+
+# Animate the choropleth in the browser from one response per sex/age
+# selection, instead of one server round trip per year
+CHOROPLETH_CLIENTSIDE_ANIMATION = (
+    os.environ.get("CHOROPLETH_CLIENTSIDE_ANIMATION", "1") == "1"
+)
 
 # ============================================================================
 # VISUALIZATION STYLING CONFIGURATION
@@ -76,9 +118,11 @@ PROCESSED_DATA_PATH = "data/processed/"
 BG_COLOR = "#FFFFFA"
 TEXT_COLOR = "#073E44"
 
-# Create a custom Plotly template
-bengtegard_template = go.layout.Template(
-    layout=go.Layout(
+# Custom Plotly template, kept as a plain dict: validating it costs about
+# 100 ms, so src.visualizations.dashboard_template registers it on the first
+# figure build instead of every import of config
+bengtegard_template = dict(
+    layout=dict(
         font=dict(family="Monospace", color=TEXT_COLOR, size=12),
         paper_bgcolor=BG_COLOR,
         plot_bgcolor=BG_COLOR,
@@ -111,9 +155,6 @@ bengtegard_template = go.layout.Template(
     )
 )
 
-# Register template
-pio.templates["bengtegard"] = bengtegard_template
-
 # Color mappings for the dashboard
 GENDER_COLORS = {
     "Boys": "#1B9E77",
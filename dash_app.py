@@ -3,36 +3,65 @@
 # ============================================================================
 # Entry point for the ADHD medication dashboard Dash application.
 # Initializes the app, loads data, registers callbacks, and starts the server.
+#
+# Each startup phase is timed (see src/startup.py) and reported once the app
+# is ready; benchmarks/bench_startup.py holds them to a cold-start budget.
 # ============================================================================
 
-import sys
-import os
-import dash
+from src.startup import StartupTimer
 
-from src.layouts import create_layout
-from src.callbacks import register_callbacks
-from src.data_processing import (
-    load_processed_csv,
-    load_and_process_all_data,
-    load_geojson,
-)
+startup = StartupTimer()
+
+with startup.phase("imports"):
+    import dash
+
+    from config import WARMUP_ON_STARTUP
+    from src.layouts import create_layout
+    from src.callbacks import register_callbacks
+    from src.data_registry import get_registry
+    from src.figure_cache import FigureCache
+    from src.figure_store import SQLiteFigureStore
+    from src.metrics import CallbackMetrics
 
 # Initialize app
-app = dash.Dash(__name__)
+with startup.phase("app"):
+    app = dash.Dash(__name__)
 
-# Load data
-df_raw = load_processed_csv()
-df_grouped, df_grouped_regional = load_and_process_all_data(df_raw)
-geojson_counties = load_geojson()
+# Load data once per process through the shared registry
+with startup.phase("data"):
+    registry = get_registry().load_all()
+print(registry.report())
 
 # Assign layout
-app.layout = create_layout()
+with startup.phase("layout"):
+    app.layout = create_layout()
 
 # Expose Flask server for gunicorn
 server = app.server
 
-# Register callbacks
-register_callbacks(app, df_grouped, df_grouped_regional, geojson_counties)
+# Register callbacks; built figures are cached in memory and in a SQLite
+# file shared by every worker on the host
+with startup.phase("callbacks"):
+    figure_cache = FigureCache(store=SQLiteFigureStore())
+    metrics = CallbackMetrics()
+    register_callbacks(app, registry, figure_cache, metrics=metrics)
+
+    # Per-callback latency (select/figure/serialize) and response size
+    # quantiles, and the figure cache counters, in the Prometheus text
+    # format on /metrics
+    metrics.track_cache("memory", figure_cache.stats)
+    metrics.track_cache("store", figure_cache.store.stats)
+    metrics.attach(server)
+
+# Optionally build every figure before serving; with gunicorn --preload the
+# master warms the shared store once for all workers
+if WARMUP_ON_STARTUP:
+    with startup.phase("warmup"):
+        from src.warmup import warm_up
+
+        warm_up(registry)
+
+print(startup.report())
 
 if __name__ == "__main__":
     app.run(threaded=True)
@@ -0,0 +1,111 @@
+// ============================================================================
+// STATIC EXPORT SWITCHER
+// ============================================================================
+// When the dashboard is served from a static export (export_static.py),
+// callback requests are answered from the pre-rendered files in
+// _dash-static/ instead of POSTing to _dash-update-component. States that
+// were not exported still go to the live server. Without an export (no
+// _dash-static/manifest.json) every request goes to the server as usual.
+//
+// Kept out of assets/ so the live app never loads it: export_static.py
+// copies it into the export and adds it to the exported index.html only.
+// ============================================================================
+
+(function () {
+    var STATIC_DIR = "_dash-static/";
+    var nativeFetch = window.fetch.bind(window);
+    var manifestPromise = null;
+
+    function urlBase() {
+        var config = document.getElementById("_dash-config");
+        try {
+            return JSON.parse(config.textContent).requests_pathname_prefix || "/";
+        } catch (e) {
+            return "/";
+        }
+    }
+
+    // Resolves to the export manifest, or null when there is no export
+    function loadManifest() {
+        if (!manifestPromise) {
+            manifestPromise = nativeFetch(urlBase() + STATIC_DIR + "manifest.json")
+                .then(function (response) {
+                    return response.ok ? response.json() : null;
+                })
+                .catch(function () {
+                    return null;
+                });
+        }
+        return manifestPromise;
+    }
+
+    // Same canonical form as canonical_request() in export_static.py
+    function canonicalRequest(payload, ignored) {
+        function values(items) {
+            return (items || []).map(function (item) {
+                var value = item.value === undefined ? null : item.value;
+                if (ignored.indexOf(item.id + "." + item.property) !== -1) {
+                    return null;
+                }
+                return Array.isArray(value) ? value.slice().sort() : value;
+            });
+        }
+        return JSON.stringify([
+            payload.output,
+            values(payload.inputs),
+            values(payload.state),
+        ]);
+    }
+
+    function sha256Hex(text) {
+        return crypto.subtle
+            .digest("SHA-256", new TextEncoder().encode(text))
+            .then(function (buffer) {
+                return Array.from(new Uint8Array(buffer))
+                    .map(function (b) {
+                        return b.toString(16).padStart(2, "0");
+                    })
+                    .join("");
+            });
+    }
+
+    // Pre-rendered response for a callback request body, or null
+    function staticResponse(body, manifest) {
+        return Promise.resolve()
+            .then(function () {
+                var payload = JSON.parse(body);
+                return sha256Hex(canonicalRequest(payload, manifest.ignored || []));
+            })
+            .then(function (digest) {
+                return nativeFetch(urlBase() + STATIC_DIR + digest + ".json");
+            })
+            .then(function (response) {
+                return response.ok ? response : null;
+            })
+            .catch(function () {
+                return null;
+            });
+    }
+
+    window.fetch = function (input, init) {
+        var url = typeof input === "string" ? input : input && input.url;
+        var isCallback =
+            url &&
+            url.indexOf("_dash-update-component") !== -1 &&
+            init &&
+            init.method === "POST" &&
+            typeof init.body === "string";
+        if (!isCallback || !(window.crypto && crypto.subtle)) {
+            return nativeFetch(input, init);
+        }
+
+        return loadManifest().then(function (manifest) {
+            var exported = manifest
+                ? staticResponse(init.body, manifest)
+                : Promise.resolve(null);
+            return exported.then(function (response) {
+                return response || nativeFetch(input, init);
+            });
+        });
+    };
+})();
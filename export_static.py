@@ -0,0 +1,274 @@
+# ============================================================================
+# STATIC EXPORT
+# ============================================================================
+# Pre-renders every dashboard state to files so the dashboard can be served
+# from nginx or a CDN without Python on the request path.
+#
+# The export contains the page shell (index.html, _dash-layout,
+# _dash-dependencies, component bundles and assets) and one JSON response
+# per callback state in _dash-static/, with .gz (and .br, if the brotli
+# package is installed) variants for gzip_static/brotli_static. The
+# browser-side switcher in export_assets/static_switcher.js, injected into
+# the exported index.html only, answers callback requests from those files
+# and falls back to the live server for states that were not exported.
+#
+# Run from the repository root:
+#     python export_static.py [--out static_export] [--workers N]
+# ============================================================================
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:  # optional: only needed for .br files
+    brotli = None
+
+import dash_app
+from config import BASE_DIR
+from src.layouts import breakpoint_names
+from src.warmup import WARMUP_CALLBACKS, warm_up, warmup_tasks
+
+STATIC_DIR = "_dash-static"
+
+# Scripts of the export only (not in assets/, which the live app serves)
+SWITCHER_SCRIPT = os.path.join(BASE_DIR, "export_assets", "static_switcher.js")
+
+# Callback inputs/states that never change the response; the switcher sends
+# them as null (the figures get the full height for their breakpoint and are
+# built for the current one, not the first, and the line chart is exported
+# as a full figure, never as a patch against the figure the browser already
+# has)
+IGNORED_PROPS = [
+    "breakpoint.width",
+    "breakpoint.height",
+    "initial-breakpoint.data",
+    "line-selection.data",
+]
+
+# Callbacks that only depend on the breakpoint
+LAYOUT_CALLBACKS = ("update_all_chart_containers", "update_all_controls_style")
+
+
+def canonical_request(output, inputs, state):
+    """
+    Canonical JSON of a callback request (mirrored in static_switcher.js).
+
+    Array values are sorted (checklist order does not matter) and the
+    IGNORED_PROPS values are replaced by null.
+    """
+
+    def _values(items):
+        values = []
+        for item in items:
+            value = item.get("value")
+            if f"{item['id']}.{item['property']}" in IGNORED_PROPS:
+                value = None
+            elif isinstance(value, list):
+                value = sorted(value)
+            values.append(value)
+        return values
+
+    return json.dumps(
+        [output, _values(inputs), _values(state)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def request_hash(output, inputs, state) -> str:
+    canonical = canonical_request(output, inputs, state)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _write(path, data: bytes, compress=False):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if compress:
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + ".br", "wb") as f:
+                f.write(brotli.compress(data))
+
+
+def _callback_specs(app):
+    """Callback function name -> (output, input ids, state ids)."""
+    specs = {}
+    for output, callback in app.callback_map.items():
+        function = callback.get("callback")
+        if function is None:  # clientside callback
+            continue
+        specs[function.__name__] = (
+            output,
+            [(item["id"], item["property"]) for item in callback["inputs"]],
+            [(item["id"], item["property"]) for item in callback["state"]],
+        )
+    return specs
+
+
+def _request_body(spec, args):
+    """The _dash-update-component request the renderer sends for args."""
+    output, input_ids, state_ids = spec
+
+    def _prop(item):
+        component_id, prop = item.rsplit(".", 1)
+        return {"id": component_id, "property": prop}
+
+    if output.startswith(".."):
+        outputs = [_prop(item) for item in output.strip(".").split("...")]
+    else:
+        outputs = _prop(output)
+
+    inputs = [
+        {"id": i, "property": p, "value": v}
+        for (i, p), v in zip(input_ids, args[: len(input_ids)])
+    ]
+    state = [
+        {"id": i, "property": p, "value": v}
+        for (i, p), v in zip(state_ids, args[len(input_ids) :])
+    ]
+    return {
+        "output": output,
+        "outputs": outputs,
+        "inputs": inputs,
+        "state": state,
+        "changedPropIds": [f"{item['id']}.{item['property']}" for item in inputs],
+    }
+
+
+def export_shell(app, client, out_dir):
+    """Write the page, layout, dependencies, bundles and assets."""
+    index = client.get("/")
+    _write(
+        os.path.join(out_dir, "index.html"),
+        _with_switcher(app, index.data),
+        compress=True,
+    )
+    for route in ("_dash-layout", "_dash-dependencies"):
+        data = client.get(f"/{route}").data
+        _write(os.path.join(out_dir, route), data, compress=True)
+
+    # Bundles referenced by the page (fingerprinted names) ...
+    urls = re.findall(r'(?:src|href)="(/[^"]+)"', index.data.decode("utf-8"))
+    # ... and every registered bundle, incl. async chunks loaded by name
+    for package, paths in app.registered_paths.items():
+        urls += [f"/_dash-component-suites/{package}/{path}" for path in paths]
+
+    for url in sorted(set(urls)):
+        path = urlsplit(url).path
+        # Assets are copied below; source maps are not shipped with Dash
+        if path.startswith("/assets/") or path.endswith(".map"):
+            continue
+        response = client.get(url)
+        if response.status_code == 200:
+            target = os.path.join(out_dir, path.lstrip("/"))
+            _write(target, response.data, compress=True)
+
+    shutil.copytree(
+        app.config.assets_folder, os.path.join(out_dir, "assets"), dirs_exist_ok=True
+    )
+    shutil.copy2(SWITCHER_SCRIPT, os.path.join(out_dir, "assets"))
+
+
+def _with_switcher(app, page: bytes) -> bytes:
+    """
+    The page with the static switcher loaded before the renderer starts, so
+    it sees the first callback request.
+    """
+    url = app.get_asset_url(os.path.basename(SWITCHER_SCRIPT))
+    marker = b'<script id="_dash-renderer"'
+    if marker not in page:
+        raise RuntimeError("Renderer script not found in the exported page")
+    tag = f'<script src="{url}"></script>\n            '.encode("utf-8")
+    return page.replace(marker, tag + marker, 1)
+
+
+def export_callbacks(app, client, out_dir, callbacks=WARMUP_CALLBACKS):
+    """
+    Write one response file per callback state.
+
+    Returns:
+    dict: Number of files written, states skipped and bytes written
+    """
+    specs = _callback_specs(app)
+    tasks = [(name, (bp,)) for name in LAYOUT_CALLBACKS for bp in breakpoint_names]
+    tasks += warmup_tasks(dash_app.registry, callbacks, every_request=True)
+
+    step = max(1, len(tasks) // 20)
+    written, skipped, size = 0, 0, 0
+    start = time.perf_counter()
+
+    for done, (name, args) in enumerate(tasks, start=1):
+        body = _request_body(specs[name], args)
+        response = client.post("/_dash-update-component", json=body)
+        if response.status_code != 200:
+            skipped += 1
+        else:
+            digest = request_hash(body["output"], body["inputs"], body["state"])
+            path = os.path.join(out_dir, STATIC_DIR, f"{digest}.json")
+            _write(path, response.data, compress=True)
+            written += 1
+            size += len(response.data)
+
+        if done % step == 0 or done == len(tasks):
+            elapsed = time.perf_counter() - start
+            print(f"Export: {done}/{len(tasks)} states, {elapsed:.1f} s")
+
+    manifest = {
+        "version": dash_app.figure_cache.version(),
+        "ignored": IGNORED_PROPS,
+        "states": written,
+    }
+    _write(
+        os.path.join(out_dir, STATIC_DIR, "manifest.json"),
+        json.dumps(manifest, indent=2).encode("utf-8"),
+    )
+    return {"written": written, "skipped": skipped, "bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-render every dashboard state to static files."
+    )
+    parser.add_argument("--out", default="static_export")
+    parser.add_argument(
+        "--callbacks", nargs="+", choices=WARMUP_CALLBACKS, default=WARMUP_CALLBACKS
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="warm the figure store on a process pool first",
+    )
+    args = parser.parse_args()
+
+    if args.workers:
+        warm_up(dash_app.registry, workers=args.workers, callbacks=args.callbacks)
+
+    app = dash_app.app
+    client = app.server.test_client()
+
+    print(f"Exporting page shell to {args.out}...")
+    export_shell(app, client, args.out)
+
+    print("Exporting callback states...")
+    result = export_callbacks(app, client, args.out, args.callbacks)
+    print(
+        f"Exported {result['written']} states ({result['bytes'] / 2**20:.1f} MB "
+        f"uncompressed), skipped {result['skipped']}"
+    )
+    if brotli is None:
+        print("brotli is not installed; wrote .gz variants only")
+
+
+if __name__ == "__main__":
+    main()
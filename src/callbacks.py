@@ -5,57 +5,525 @@
 # animations, heatmaps, and interactive components etc.
 # ============================================================================
 
+import threading
+
 import dash
-from dash import html
-from dash.dependencies import Input, Output, State
-import plotly.express as px
+import numpy as np
+from dash import Patch, html
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import plotly.graph_objects as go
 
 from config import (
     BG_COLOR,
+    CHOROPLETH_CLIENTSIDE_ANIMATION,
     TEXT_COLOR,
     FACET_COLORS,
     FACET_TITLE_MAP,
     GENDER_COLORS,
-    bengtegard_template,
 )
 from src.layouts import get_chart_container_style, get_controls_style
 
 # Import data processing functions
-from src.data_processing import (
-    load_processed_csv,
-    load_and_process_all_data,
-    create_cumulative_data,
-    load_geojson,
-)
+from src.data_registry import get_registry
+from src.data_cube import NATIONAL_COUNTY
+from src.figure_cache import FigureCache
+from src.figure_diff import figure_json, figure_patch
+from src.metrics import CallbackMetrics, phase
+from src.skeletons import FigureSkeleton, SkeletonCache
 
 # Import visualization helpers
 from src.visualizations import (
-    plot_gender_ratios,
+    dashboard_template,
+    plot_gender_ratio_frame,
     prepare_choropleth_data,
-    get_national_trend_context,
+    format_national_trend,
     apply_responsive_layout,
+    county_order,
+    responsive_height,
+    responsive_layout_patch,
 )
 
+# plotly express reads the shared figure templates in a way that is not
+# thread-safe, so figures are built one at a time; with the skeletons a
+# build only happens for a structure not seen before
+_build_lock = threading.Lock()
+
+# ============================================================================
+# FIGURE CACHE KEYS
+# ============================================================================
+# Map callback arguments to the inputs that actually change the output:
+# width is never used, height only through responsive_height, and checklist
+# order does not matter.
+
+
+def _medication_key(selected_medication):
+    if selected_medication == "separator":
+        return "All medications"
+    return selected_medication
+
+
+def _selection_key(values):
+    return tuple(sorted(values or []))
+
+
+def _line_chart_key(
+    selected_medication, selected_genders, selected_ages, bp, width, height
+):
+    return (
+        _medication_key(selected_medication),
+        _selection_key(selected_genders),
+        _selection_key(selected_ages),
+        bp,
+        responsive_height(bp, height, "line"),
+    )
+
+
+def _line_trace_key(trace):
+    # One line per sex label and age facet; the facet axes are renumbered
+    # when ages are ticked, so the age is read from the hover data
+    return (trace.get("legendgroup"), trace["customdata"][0][1])
+
+
+def _bar_chart_key(n_clicks, bp, width, height):
+    # The chart only depends on whether the button has been clicked
+    return (bool(n_clicks), bp, responsive_height(bp, height, "bar"))
+
+
+def _heatmap_key(
+    selected_medication,
+    selected_county,
+    selected_gender,
+    selected_age,
+    selected_order,
+    initial_bp,
+    bp,
+    width,
+    height,
+):
+    # The county order only applies to the all-counties heatmap
+    if selected_county != "All counties":
+        selected_order = None
+    return (
+        _medication_key(selected_medication),
+        selected_county,
+        selected_gender,
+        selected_age,
+        selected_order,
+        bp,
+        responsive_height(bp, height, "line"),
+    )
+
+
+def _ratio_county(selected_county):
+    """Cube county of the sex ratio chart ("All counties" is national)."""
+    if selected_county in (None, "All counties", "separator"):
+        return NATIONAL_COUNTY
+    return selected_county
+
+
+def _gender_ratio_key(
+    selected_medication, selected_county, initial_bp, bp, width, height
+):
+    return (
+        _medication_key(selected_medication),
+        _ratio_county(selected_county),
+        bp,
+        responsive_height(bp, height, "ratio"),
+    )
+
+
+def _choropleth_key(initial_bp, bp, year, sex, age_group, width, height):
+    return (year, sex, age_group, bp, responsive_height(bp, height, "map"))
+
+
+def _choropleth_patch_key(year, sex, age_group):
+    return (year, sex, age_group)
+
+
+def _choropleth_years_key(sex, age_group):
+    return (sex, age_group)
+
+
+def _relayout_key(bp, width, height, map_level):
+    return (
+        bp,
+        responsive_height(bp, height, "line"),
+        responsive_height(bp, height, "map"),
+        map_level,
+    )
+
+
+# ============================================================================
+# CHOROPLETH HELPERS
+# ============================================================================
+# Shared by the full map build and the recolouring patch, so both produce
+# the same values for a year/sex/age selection.
+
+
+def _choropleth_frame(cube, year, sex, age_group):
+    """County values of "All medications" for one year/sex/age."""
+    return prepare_choropleth_data(
+        cube.to_frame(
+            "All medications",
+            cube.regional_counties,
+            sex=sex,
+            age_group=age_group,
+            year=year,
+        ),
+        year,
+        age_group,
+        sex,
+    )
+
+
+def _choropleth_title(year, sex, age_group):
+    return f"ADHD Prescription Rates by County ({sex}, Age {age_group})<br>{year}"
+
+
+def _choropleth_trend(county_stats, year, sex, age_group):
+    """National trend annotation text for the map."""
+    row = county_stats.row("All medications", sex, age_group, year)
+    if row is None:
+        return format_national_trend(None, None)
+    return format_national_trend(row["national"], row["baseline"])
+
+
+def _choropleth_stats(county_stats, year, sex, age_group):
+    """Highest/lowest/spread summary shown next to the map."""
+    row = county_stats.row("All medications", sex, age_group, year)
+    if row is None or row["counties"] == 0:
+        return html.Div([html.H4("No data available", style={"color": TEXT_COLOR})])
+
+    highest_county, highest_rate = row["max_county"], row["max"]
+    lowest_county, lowest_rate = row["min_county"], row["min"]
+    std_rate = row["std"]
+
+    return html.Div(
+        [
+            html.H4(
+                f"Statistics for {year}",
+                style={"marginBottom": 15, "color": TEXT_COLOR},
+            ),
+            html.Div(
+                [
+                    html.Div(
+                        [
+                            html.Strong("Highest Rate: "),
+                            f"{highest_county} ({highest_rate:.1f} per 1000)",
+                        ],
+                        style={"marginBottom": 5, "color": TEXT_COLOR},
+                    ),
+                    html.Div(
+                        [
+                            html.Strong("Lowest Rate: "),
+                            f"{lowest_county} ({lowest_rate:.1f} per 1000)",
+                        ],
+                        style={"marginBottom": 5, "color": TEXT_COLOR},
+                    ),
+                    html.Div(
+                        [
+                            html.Strong("Standard Deviation: "),
+                            f"{std_rate:.1f}",
+                        ],
+                        style={"marginBottom": 5, "color": TEXT_COLOR},
+                    ),
+                ]
+            ),
+        ]
+    )
+
+
+def _choropleth_years(cube, county_stats, sex, age_group):
+    """
+    Every year of the map for one sex/age selection, in compact form.
+
+    Counties are listed once and values holds one row per year (None where
+    a county has no data), so the browser can recolour the map for any
+    year without a server round trip.
+    """
+    years = [int(year) for year in cube.labels["year"]]
+    frames = [_choropleth_frame(cube, year, sex, age_group) for year in years]
+
+    # county_geo -> county name, in the order the map lists them
+    counties = {}
+    for df_map in frames:
+        counties.update(zip(df_map["county_geo"], df_map["county"]))
+
+    values = []
+    for df_map in frames:
+        by_county = dict(zip(df_map["county_geo"], df_map["patients_per_1000"]))
+        values.append([by_county.get(geo) for geo in counties])
+
+    return {
+        "years": years,
+        "locations": list(counties),
+        "hovertext": list(counties.values()),
+        "values": values,
+        "titles": [_choropleth_title(year, sex, age_group) for year in years],
+        "trends": [
+            _choropleth_trend(county_stats, year, sex, age_group) for year in years
+        ],
+        "stats": [
+            _choropleth_stats(county_stats, year, sex, age_group) for year in years
+        ],
+    }
+
+
 # ============================================================================
-# LOAD AND PROCESS DATA
+# FIGURE SKELETONS
 # ============================================================================
+# Slot paths and per-request values of the figure skeletons (see
+# src/skeletons.py). The values are what the plotly express builds put in
+# the same properties; render_skeleton checks that before keeping a
+# skeleton.
+
+
+def _line_chart_title(selected_medication):
+    return f"ADHD Medication Prescriptions in Sweden - {selected_medication}"
+
+
+def _line_slider_steps(df_anim):
+    """Year slider steps of the line chart, one per animation frame."""
+    return [
+        {
+            "args": [
+                [str(year)],
+                {
+                    "frame": {"duration": 0, "redraw": False},
+                    "mode": "immediate",
+                    "fromcurrent": True,
+                    "transition": {"duration": 0, "easing": "linear"},
+                },
+            ],
+            "label": str(year),
+            "method": "animate",
+        }
+        for year in sorted(df_anim["year"].unique())
+    ]
+
+
+def _line_traces(df_anim):
+    """(label, age group) of every line in the chart, sorted."""
+    return tuple(sorted(set(zip(df_anim["label"], df_anim["age_group"]))))
 
-# Load raw CSV
-df_raw = load_processed_csv()
 
-# Process national and regional datasets
-df_grouped_national, df_grouped_regional = load_and_process_all_data(df_raw)
+def _line_chart_slots(figure, lines):
+    slots = {
+        "title": [("layout", "title", "text")],
+        "steps": [("layout", "sliders", 0, "steps")],
+        "y_range": [
+            ("layout", axis, "range")
+            for axis in figure["layout"]
+            if axis.startswith("yaxis")
+        ],
+    }
+    for index, trace in enumerate(figure["data"]):
+        line = lines.index(_line_trace_key(trace))
+        for prop in ("x", "y", "customdata"):
+            slots[f"{prop}{line}"] = [("data", index, prop)]
+    return slots
+
+
+def _line_chart_values(df_anim, lines, selected_medication):
+    values = {
+        "title": _line_chart_title(selected_medication),
+        "steps": _line_slider_steps(df_anim),
+        "y_range": [0, df_anim["patients_per_1000"].max() * 1.1],
+    }
+    labels = df_anim["label"].to_numpy()
+    ages = df_anim["age_group"].to_numpy()
+    for line, (label, age_group) in enumerate(lines):
+        rows = df_anim[(labels == label) & (ages == age_group)]
+        values[f"x{line}"] = rows["year"].to_numpy()
+        values[f"y{line}"] = rows["patients_per_1000"].to_numpy()
+        values[f"customdata{line}"] = rows[
+            ["sex", "age_group", "change_since_2006"]
+        ].to_numpy()
+    return values
+
+
+def _heatmap_slots(figure):
+    return {
+        "title": [("layout", "title", "text")],
+        "x": [
+            ("data", 0, "x"),
+            ("layout", "xaxis", "tickvals"),
+            ("layout", "xaxis", "ticktext"),
+        ],
+        "y": [("data", 0, "y")],
+        "z": [("data", 0, "z")],
+        "customdata": [("data", 0, "customdata")],
+    }
+
+
+def _heatmap_values(cube, selected_medication, selected_gender, selected_age, order):
+    """
+    County x year matrix of the heatmap, straight from the cube.
+
+    Counties and years without any data are left out; the multipliers
+    (change since the first year with data) go in customdata for hover.
+    """
+    counties = cube.regional_counties
+    selection = (selected_medication, counties, selected_gender, selected_age)
+    values = cube.select(*selection)
+    multipliers = cube.select(*selection, measure="multiplier")
+
+    present = ~np.isnan(values)
+    rows = np.flatnonzero(present.any(axis=1))
+    columns = np.flatnonzero(present.any(axis=0))
+    rows = rows[county_order(values[np.ix_(rows, columns)], order)]
+    cells = np.ix_(rows, columns)
+    return {
+        "x": [str(cube.labels["year"][i]) for i in columns],
+        "y": [counties[i] for i in rows],
+        "z": values[cells],
+        "customdata": multipliers[cells],
+    }
+
+
+def _county_line_slots(figure):
+    return {
+        "title": [("layout", "title", "text")],
+        "x": [("data", 0, "x")],
+        "y": [("data", 0, "y")],
+        "years": [("layout", "xaxis", "tickvals"), ("layout", "xaxis", "ticktext")],
+        "last_x": [("layout", "annotations", 0, "x")],
+        "last_y": [("layout", "annotations", 0, "y")],
+        "multiplier": [("layout", "annotations", 0, "text")],
+    }
+
+
+def _county_line_values(df_single, title):
+    last_point = df_single.iloc[-1]
+    return {
+        "title": title,
+        "x": df_single["year"].to_numpy(),
+        "y": df_single["patients_per_1000"].to_numpy(),
+        "years": df_single["year"].unique(),
+        "last_x": last_point["year"],
+        "last_y": last_point["patients_per_1000"],
+        "multiplier": f"x{last_point['multiplier']:.1f}",
+    }
+
+
+def _gender_ratio_title(selected_medication, county):
+    title = (
+        "Boys-to-Girls ADHD Prescription Ratio by Age Group - "
+        f"{selected_medication}"
+    )
+    if county != NATIONAL_COUNTY:
+        title += f", {county}"
+    return title
+
+
+def _gender_ratio_slots(figure):
+    slots = {"title": [("layout", "title", "text")]}
+    slots["years"] = [("data", index, "x") for index in range(len(figure["data"]))]
+    for index in range(len(figure["data"])):
+        slots[f"y{index}"] = [("data", index, "y")]
+    return slots
+
+
+def _gender_ratio_values(gender_ratios, selected_medication, county, title):
+    """One line of ratios per age group, in age group order."""
+    ratios = gender_ratios.select(selected_medication, county)
+    values = {
+        "title": title,
+        "years": np.asarray(gender_ratios.labels["year"]),
+    }
+    for index, row in enumerate(ratios):
+        values[f"y{index}"] = row
+    return values
+
+
+def _choropleth_slots(figure):
+    return {
+        "locations": [("data", 0, "locations")],
+        "hovertext": [("data", 0, "hovertext")],
+        "z": [("data", 0, "z")],
+        "customdata": [("data", 0, "customdata")],
+        "title": [("layout", "title", "text")],
+        "trend": [("layout", "annotations", 0, "text")],
+    }
+
+
+def _choropleth_values(df_map, year, sex, age_group, trend_context):
+    return {
+        "locations": df_map["county_geo"].to_numpy(),
+        "hovertext": df_map["county"].to_numpy(),
+        "z": df_map["patients_per_1000"].to_numpy(),
+        "customdata": df_map[["county_geo", "patients_per_1000"]].to_numpy(),
+        "title": _choropleth_title(year, sex, age_group),
+        "trend": trend_context,
+    }
 
-# Load GeoJson map of Sweden counties
-geojson_counties = load_geojson()
 
 # ============================================================================
 # 1. LINE CHART ANIMATION
 # ============================================================================
 
 
-def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_counties):
+def register_callbacks(
+    app, registry=None, figure_cache=None, skeleton_cache=None, metrics=None
+):
+    """
+    Register every dashboard callback on the app.
+
+    Parameters:
+    app: The Dash app
+    registry: DataRegistry to read datasets from (default: the process-wide one)
+    figure_cache: FigureCache for the figure callbacks (default: a new
+        in-memory one); it is keyed by the dataset and code version
+    skeleton_cache: SkeletonCache of the figure skeletons (default: a new
+        one); SkeletonCache(max_entries=0) builds every figure with plotly
+        express
+    metrics: CallbackMetrics timing every callback (default: a new one);
+        attach it to the server to record responses and serve /metrics
+
+    Returns:
+    dict: Callback name -> the registered Python callback function
+    """
+    if registry is None:
+        registry = get_registry()
+    if figure_cache is None:
+        figure_cache = FigureCache()
+    figure_cache.attach(registry)
+    if skeleton_cache is None:
+        skeleton_cache = SkeletonCache()
+    registry.add_rebuild_listener(skeleton_cache.clear)
+    if metrics is None:
+        metrics = CallbackMetrics()
+
+    def render_skeleton(structure, values, build, slots):
+        """
+        Figure for one request, from the skeleton of its structure.
+
+        Parameters:
+        structure: Hashable key of everything the skeleton fixes
+        values: Slot name -> value for this request
+        build: Builds the figure with plotly express (no arguments)
+        slots: Maps the serialized figure to its slot paths
+
+        Returns:
+        dict or go.Figure: The rendered skeleton, or on the first request of
+        a structure the plotly express figure; it becomes the skeleton if
+        rendering it with values gives back the same figure
+        """
+        with phase("figure"):
+            skeleton = skeleton_cache.get(structure)
+            if skeleton is not None:
+                return skeleton.render(values)
+
+            with _build_lock:
+                figure = build()
+            if skeleton_cache.max_entries > 0:
+                serialized = figure_json(figure)
+                skeleton = FigureSkeleton(serialized, slots(serialized))
+                if skeleton.render(values) == serialized:
+                    skeleton_cache.put(structure, skeleton)
+                else:
+                    print(f"Figure skeleton for {structure} does not match; not kept")
+            return figure
 
     # ============================================================================
     # UPDATE CHART AREA AND SIDEBARS DYNAMICALLY
@@ -66,8 +534,9 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
         Output("choropleth-chart-container", "style"),
         Output("heatmap-chart-container", "style"),
         Output("ratio-chart-container", "style"),
-        Input("breakpoint", "widthBreakpoint"),
+        Input("layout-breakpoint", "data"),
     )
+    @metrics.instrument("update_all_chart_containers")
     def update_all_chart_containers(breakpoint):
         """Dynamically adjust all chart container CSS for responsiveness."""
 
@@ -95,62 +564,79 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
         Output("line-controls-style", "style"),
         Output("choropleth-controls-style", "style"),
         Output("heatmap-controls-style", "style"),
-        Input("breakpoint", "widthBreakpoint"),
+        Input("layout-breakpoint", "data"),
     )
+    @metrics.instrument("update_all_controls_style")
     def update_all_controls_style(breakpoint):
         style = get_controls_style(breakpoint)
         return style, style, style
 
+    # Copy the breakpoint to layout-breakpoint and relayout-breakpoint once
+    # it has stopped changing, so a drag-resize across several breakpoints
+    # restyles the page once; the first one is copied straight away
+    app.clientside_callback(
+        ClientsideFunction(namespace="breakpoint", function_name="debounce"),
+        [
+            Output("layout-breakpoint", "data"),
+            Output("relayout-breakpoint", "data"),
+        ],
+        Input("breakpoint", "widthBreakpoint"),
+        State("layout-breakpoint", "data"),
+    )
+
     @app.callback(
-        Output("line-animation", "figure"),
         [
-            Input("medication-dropdown", "value"),
-            Input("sex-checklist", "value"),
-            Input("age-checklist", "value"),
-            Input("breakpoint", "widthBreakpoint"),
+            Output("line-animation", "figure", allow_duplicate=True),
+            Output("bar-chart", "figure", allow_duplicate=True),
+            Output("county-heatmap", "figure", allow_duplicate=True),
+            Output("sex-ratio-plot", "figure", allow_duplicate=True),
+            Output("choropleth-map", "figure", allow_duplicate=True),
+            Output("choropleth-geojson-level", "data", allow_duplicate=True),
         ],
+        Input("relayout-breakpoint", "data"),
         [
             State("breakpoint", "width"),
             State("breakpoint", "height"),
+            State("choropleth-geojson-level", "data"),
         ],
+        prevent_initial_call=True,
     )
-    def update_line_chart(
-        selected_medication, selected_genders, selected_ages, bp, width, height
-    ):
-        """Update main line animation chart based on user selections."""
-
-        # Handle 'separator' selection
-        if selected_medication == "separator":
-            selected_medication = "All medications"
-
-        # Filter data
-        df_filtered = df_grouped_national[
-            (df_grouped_national["medication_category"] == selected_medication)
-            & (df_grouped_national["sex"].isin(selected_genders))
-            & (df_grouped_national["age_group"].isin(selected_ages))
-        ]
-
-        # Prepare cumulative data for animation
-        df_anim = create_cumulative_data(df_filtered)
-
-        def make_simple_label(row):
-            if row["sex"] == "Boys":
-                return "Boys"
-            elif row["sex"] == "Girls":
-                return "Girls"
-            else:
-                return "Both"
+    @metrics.instrument("relayout_figures")
+    @figure_cache.memoize("relayout_figures", _relayout_key)
+    def relayout_figures(bp, width, height, map_level):
+        """
+        Apply the breakpoint's layout to every figure already on the page.
 
-        # Assign lables
-        df_anim["Label"] = df_anim.apply(make_simple_label, axis=1)
+        Sends layout-only patches (height, font, margin, legend) instead of
+        rebuilding the figures. The map also gets the geometry simplified
+        for the new breakpoint, but only if it has been built (map_level is
+        the level of detail it has) with a different level of detail.
+        """
+        if bp is None:
+            raise dash.exceptions.PreventUpdate
 
-        # Calulcate change from 2006 for hover
-        df_anim["multiplier"] = df_anim.groupby(
-            ["Label", "age_group", "medication_category"]
-        )["patients_per_1000"].transform(
-            lambda x: (x / x.iloc[0]).round(2) if any(x > 0) else float("nan")
+        map_patch = responsive_layout_patch(bp, height, chart_type="map")
+        level = registry.geojson_level(bp)
+        if map_level is not None and level != map_level:
+            map_patch["data"][0]["geojson"] = registry.geojson_for(bp)
+        else:
+            level = map_level
+
+        return (
+            responsive_layout_patch(bp, height, chart_type="line"),
+            responsive_layout_patch(bp, height, chart_type="bar"),
+            responsive_layout_patch(bp, height, chart_type="line"),
+            responsive_layout_patch(bp, height, chart_type="ratio"),
+            map_patch,
+            level,
         )
 
+    def build_line_chart(
+        df_anim, selected_medication, selected_ages, bp, width, height
+    ):
+        """Line animation chart built with plotly express."""
+        import plotly.express as px
+
         # Assign colors to labels
         label_colors = {
             "Boys": GENDER_COLORS["Boys"],
@@ -167,24 +653,22 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
             df_anim,
             x="year",
             y="patients_per_1000",
-            color="Label",
+            color="label",
             line_shape="spline",
             facet_row="age_group",
-            animation_frame="Year",
-            animation_group="Label",
             markers=True,
-            title=f"ADHD Medication Prescriptions in Sweden - {selected_medication}",
+            title=_line_chart_title(selected_medication),
             color_discrete_map=label_colors,
             range_x=[2006, 2024],
             range_y=y_range,
-            custom_data=["sex", "age_group", "multiplier"],
+            custom_data=["sex", "age_group", "change_since_2006"],
         )
 
         # Layout and annotations
         line_fig.update_layout(
             legend_title_text="Sex",
             xaxis_title="Year",
-            template="bengtegard",
+            template=dashboard_template(),
             hovermode="x",
             paper_bgcolor=BG_COLOR,
             plot_bgcolor=BG_COLOR,
@@ -219,12 +703,27 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
                     "direction": "left",
                     "showactive": True,
                     "type": "buttons",
+                    "pad": {"r": 10, "t": 70},
                     "x": 0.1,
                     "xanchor": "right",
                     "y": 0,
                     "yanchor": "top",
                 }
             ],
+            # Steps refer to the frames added client-side, one per year
+            sliders=[
+                {
+                    "active": 0,
+                    "currentvalue": {"prefix": "Year="},
+                    "len": 0.9,
+                    "pad": {"b": 10, "t": 60},
+                    "steps": _line_slider_steps(df_anim),
+                    "x": 0.1,
+                    "xanchor": "left",
+                    "y": 0,
+                    "yanchor": "top",
+                }
+            ],
         )
 
         hover_template = (
@@ -237,7 +736,7 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
 
         hover_font_size = 10 if len(selected_ages) > 2 else 12
 
-        # Update initial traces
+        # Update traces
         for trace in line_fig.data:
             trace.update(
                 cliponaxis=False,
@@ -255,21 +754,6 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
                 ),
             )
 
-        # Update all animation frames
-        for frame in line_fig.frames:
-            for trace in frame.data:
-                trace.update(
-                    hovertemplate=hover_template,
-                    hoverlabel=dict(
-                        font=dict(
-                            size=hover_font_size,
-                            color=label_colors.get(trace.name, "white"),
-                        ),
-                        bgcolor=BG_COLOR,
-                        bordercolor=BG_COLOR,
-                    ),
-                )
-
         # Update axes
         line_fig.update_yaxes(
             # showspikes=True,
@@ -312,36 +796,131 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
 
         return line_fig
 
-    # ============================================================================
-    # 2. STATIC BAR CHART
-    # ============================================================================
+    @figure_cache.memoize("line_chart_figure", _line_chart_key)
+    def line_chart_figure(
+        selected_medication, selected_genders, selected_ages, bp, width, height
+    ):
+        """
+        Build the main line animation chart for a set of user selections.
+
+        The figure holds each line once, with every year; the cumulative
+        animation frames are built in the browser (assets/line_animation.js).
+        """
+
+        # Handle 'separator' selection
+        if selected_medication == "separator":
+            selected_medication = "All medications"
+
+        # Slice national data from the cube
+        df_filtered = registry.cube.to_frame(
+            selected_medication,
+            NATIONAL_COUNTY,
+            sex=selected_genders,
+            age_group=selected_ages,
+        )
+
+        # Labels and the change from 2006 (for hover) are computed at ingest
+        df_anim = df_filtered
+
+        if df_anim.empty:
+            # Nothing selected: an empty chart, not worth a skeleton
+            with phase("figure"), _build_lock:
+                return build_line_chart(
+                    df_anim, selected_medication, selected_ages, bp, width, height
+                )
+
+        lines = _line_traces(df_anim)
+        structure = (
+            "line",
+            _selection_key(selected_genders),
+            _selection_key(selected_ages),
+            lines,
+            bp,
+            responsive_height(bp, height, "line"),
+        )
+        return render_skeleton(
+            structure,
+            _line_chart_values(df_anim, lines, selected_medication),
+            lambda: build_line_chart(
+                df_anim, selected_medication, selected_ages, bp, width, height
+            ),
+            lambda figure: _line_chart_slots(figure, lines),
+        )
+
     @app.callback(
-        Output("bar-chart", "figure"),
         [
-            Input("show-bar-chart-btn", "n_clicks"),
-            Input("breakpoint", "widthBreakpoint"),
+            Output("line-animation-source", "data"),
+            Output("line-selection", "data"),
+        ],
+        [
+            Input("medication-dropdown", "value"),
+            Input("sex-checklist", "value"),
+            Input("age-checklist", "value"),
+            Input("initial-breakpoint", "data"),
         ],
         [
+            State("line-selection", "data"),
+            State("breakpoint", "widthBreakpoint"),
             State("breakpoint", "width"),
             State("breakpoint", "height"),
         ],
     )
-    def barplot_20_vs_24(n_clicks, bp, width, height):
+    @metrics.instrument("update_line_chart")
+    def update_line_chart(
+        selected_medication,
+        selected_genders,
+        selected_ages,
+        initial_bp,
+        shown_selection,
+        bp,
+        width,
+        height,
+    ):
         """
-        Create a grouped bar plot showing ADHD medication use among 5–24-year-olds
-        by sex (Boys/Girls) for years 2020 and 2024.
+        Update main line animation chart based on user selections.
+
+        line-selection holds the arguments of the figure the browser has.
+        A new medication sends the whole figure; ticking a sex or age box
+        only sends a Patch that removes or adds the affected lines (and
+        restyles the facets), since both figures are in the figure cache.
+        Waits for the first breakpoint, so the figure is built for it.
         """
-        if not n_clicks:
+        if initial_bp is None:
             raise dash.exceptions.PreventUpdate
 
-        # Filter dataframe
-        df_bar_2024 = df_grouped_national[
-            (df_grouped_national["medication_category"] == "All medications")
-            & (df_grouped_national["sex"].isin(["Boys", "Girls"]))
-            & (df_grouped_national["year"].isin([2020, 2024]))
-        ].copy()
+        selection = [
+            selected_medication,
+            selected_genders,
+            selected_ages,
+            bp,
+            width,
+            height,
+        ]
+        figure = line_chart_figure(*selection)
+
+        shown_medication = shown_selection and _medication_key(shown_selection[0])
+        if shown_medication != _medication_key(selected_medication):
+            return figure, selection
 
-        df_bar_2024["year"] = df_bar_2024["year"].astype(str)
+        shown_figure = line_chart_figure(*shown_selection)
+        with phase("figure"):
+            patch = figure_patch(shown_figure, figure, _line_trace_key)
+        return patch, selection
+
+    # Expand the line chart into cumulative animation frames in the browser
+    app.clientside_callback(
+        ClientsideFunction(namespace="line_animation", function_name="build_frames"),
+        Output("line-animation", "figure"),
+        Input("line-animation-source", "data"),
+    )
+
+    # ============================================================================
+    # 2. STATIC BAR CHART
+    # ============================================================================
+
+    def build_bar_chart(df_bar_2024, bp, width, height):
+        """2020 vs 2024 bar chart built with plotly express."""
+        import plotly.express as px
 
         # Create the figure
         bar_plot = px.bar(
@@ -369,7 +948,7 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
 
         # Update layout to match Swedish style
         bar_plot.update_layout(
-            template=bengtegard_template,
+            template=dashboard_template(),
             title=dict(
                 text="ADHD Medication Use Among Individuals Aged 5–24, by Sex: 2020 vs 2024",
                 x=0.5,
@@ -421,12 +1000,47 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
 
         return bar_plot
 
+    @app.callback(
+        Output("bar-chart", "figure"),
+        [
+            Input("show-bar-chart-btn", "n_clicks"),
+        ],
+        [
+            State("breakpoint", "widthBreakpoint"),
+            State("breakpoint", "width"),
+            State("breakpoint", "height"),
+        ],
+    )
+    @metrics.instrument("barplot_20_vs_24")
+    @figure_cache.memoize("barplot_20_vs_24", _bar_chart_key)
+    def barplot_20_vs_24(n_clicks, bp, width, height):
+        """
+        Create a grouped bar plot showing ADHD medication use among 5–24-year-olds
+        by sex (Boys/Girls) for years 2020 and 2024.
+        """
+        if not n_clicks:
+            raise dash.exceptions.PreventUpdate
+
+        # Slice national data from the cube
+        df_bar_2024 = registry.cube.to_frame(
+            "All medications",
+            NATIONAL_COUNTY,
+            sex=["Boys", "Girls"],
+            year=[2020, 2024],
+        )
+
+        df_bar_2024["year"] = df_bar_2024["year"].astype(str)
+
+        with phase("figure"), _build_lock:
+            return build_bar_chart(df_bar_2024, bp, width, height)
+
     # Show/hide the chart when button is clicked
     @app.callback(
         Output("bar-chart", "style"),
         Input("show-bar-chart-btn", "n_clicks"),
         State("bar-chart", "style"),
     )
+    @metrics.instrument("toggle_bar_chart")
     def toggle_bar_chart(n_clicks, current_style):
         if n_clicks and n_clicks > 0:
             # Toggle display
@@ -440,6 +1054,121 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
     # 3. COUNTY-LEVEL HEATMAP
     # ============================================================================
 
+    def build_county_heatmap(heatmap, title, bp, width, height):
+        """County x year heatmap, one cell per value of the cube."""
+        heatmap_fig = go.Figure(
+            go.Heatmap(
+                x=heatmap["x"],
+                y=heatmap["y"],
+                z=heatmap["z"],
+                customdata=heatmap["customdata"],
+                coloraxis="coloraxis",
+                hovertemplate=(
+                    "<b>Year:</b> %{x}<br>"
+                    "<b>County:</b> %{y}<br>"
+                    "<b>Patients per 1,000:</b> %{z}<br>"
+                    "<b>Change since first year:</b> x%{customdata:.1f}"
+                    "<extra></extra>"
+                ),
+                hoverlabel=dict(bgcolor=TEXT_COLOR),
+            )
+        )
+
+        heatmap_fig.update_layout(
+            title={
+                "text": title,
+                "x": 0.5,
+                "xanchor": "center",
+            },
+            xaxis_title="Year",
+            yaxis_title="County",
+            template=dashboard_template(),
+            paper_bgcolor=BG_COLOR,
+            plot_bgcolor=BG_COLOR,
+            font_color=TEXT_COLOR,
+            coloraxis=dict(
+                colorscale="Viridis",
+                colorbar=dict(
+                    title="Patients per 1000",
+                    tickfont=dict(size=10, color=TEXT_COLOR),
+                ),
+            ),
+        )
+
+        # Label every year
+        heatmap_fig.update_xaxes(
+            tickmode="array",
+            tickvals=heatmap["x"],
+            ticktext=heatmap["x"],
+        )
+        heatmap_fig.update_yaxes(title_standoff=4, automargin=True)
+
+        # Apply breakpoints configuration
+        heatmap_fig = apply_responsive_layout(heatmap_fig, bp, width, height)
+
+        return heatmap_fig
+
+    def build_county_line(df_single, title, bp, width, height):
+        """Line chart of a single county built with plotly express."""
+        import plotly.express as px
+
+        heatmap_fig = px.line(
+            df_single,
+            x="year",
+            y="patients_per_1000",
+            color="age_group",
+            markers=True,
+            color_discrete_map=FACET_COLORS,
+            title=title,
+        )
+        heatmap_fig.update_layout(
+            hovermode="x",
+            xaxis_title="Year",
+            yaxis_title="Patients per 1000 inhabitants",
+            template=dashboard_template(),
+            paper_bgcolor=BG_COLOR,
+            plot_bgcolor=BG_COLOR,
+            font_color=TEXT_COLOR,
+            legend_title_text="Age Group",
+        )
+        # Update axes and add a custom hovertemplate
+        heatmap_fig.update_xaxes(
+            showspikes=True,
+            tickmode="array",
+            tickvals=df_single["year"].unique(),
+            ticktext=df_single["year"].unique(),
+        )
+        heatmap_fig.update_yaxes(showspikes=True, tick0=0, dtick=10)
+
+        for trace in heatmap_fig.data:
+            trace.update(
+                hovertemplate=(
+                    "<b>Year:</b> %{x}<br>"
+                    "<b>Patients per 1,000:</b> %{y:.1f}<extra></extra>"
+                ),
+                hoverlabel=dict(
+                    font=dict(color=FACET_COLORS.get(trace.name, "white")),
+                    bgcolor=BG_COLOR,
+                    bordercolor=BG_COLOR,
+                ),
+            )
+        # Add multiplier annotation at the end of the line
+        last_point = df_single.iloc[-1]
+        heatmap_fig.add_annotation(
+            x=last_point["year"],
+            y=last_point["patients_per_1000"],
+            text=f"x{last_point['multiplier']:.1f}",
+            showarrow=False,
+            xshift=10,  # Shift text to the right of the point
+            font=dict(size=14, color=FACET_COLORS.get(last_point["age_group"])),
+            xanchor="left",
+        )
+
+        # Apply breakpoints configuration
+        heatmap_fig = apply_responsive_layout(heatmap_fig, bp, width, height)
+
+        return heatmap_fig
+
     @app.callback(
         [Output("county-heatmap", "figure"), Output("county-heatmap-note", "style")],
         [
@@ -447,93 +1176,55 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
             Input("heatmap-county-dropdown", "value"),
             Input("heatmap-sex-radio", "value"),
             Input("heatmap-age-radio", "value"),
-            Input("breakpoint", "widthBreakpoint"),
+            Input("heatmap-order-radio", "value"),
+            Input("initial-breakpoint", "data"),
         ],
         [
+            State("breakpoint", "widthBreakpoint"),
             State("breakpoint", "width"),
             State("breakpoint", "height"),
         ],
     )
+    @metrics.instrument("update_heatmap")
+    @figure_cache.memoize("update_heatmap", _heatmap_key)
     def update_heatmap(
         selected_medication,
         selected_county,
         selected_gender,
         selected_age,
+        selected_order,
+        initial_bp,
         bp,
         width,
         height,
     ):
         """Update county-level heatmap for selected medication, sex, and age."""
 
+        # Wait for the first breakpoint, so the figure is built for it
+        if initial_bp is None:
+            raise dash.exceptions.PreventUpdate
+
         if selected_medication == "separator":
             selected_medication = "All medications"
 
-        df_heat = df_grouped_regional[
-            (df_grouped_regional["medication_category"] == selected_medication)
-            & (df_grouped_regional["sex"] == selected_gender)
-            & (df_grouped_regional["age_group"] == selected_age)
-        ].copy()
-
-        df_heat["year"] = df_heat["year"].astype(str)
-
-        # Calculate multiplier from first available year (with data > 0) for each county
-        df_heat["multiplier"] = df_heat.groupby("county")[
-            "patients_per_1000"
-        ].transform(
-            lambda x: (x / x[x > 0].iloc[0]).round(2) if len(x[x > 0]) > 0 else 0
-        )
+        cube = registry.cube
 
         # Heatmap is the default (all counties)
         if selected_county == "All counties":
-            heatmap_fig = px.density_heatmap(
-                df_heat,
-                x="year",
-                y="county",
-                z="patients_per_1000",
-                labels={"patients_per_1000": "Patients per 1,000"},
-                nbinsx=len(df_heat["year"].unique()),
-                text_auto=False,
-                color_continuous_scale="Viridis",
+            title = (
+                "ADHD Prescriptions in Sweden by County<br>"
+                f"<sup>{selected_medication}, {selected_gender}, Age {selected_age}</sup>"
             )
-
-            heatmap_fig.update_layout(
-                title={
-                    "text": f"ADHD Prescriptions in Sweden by County<br><sup>{selected_medication}, {selected_gender}, Age {selected_age}</sup>",
-                    "x": 0.5,
-                    "xanchor": "center",
-                },
-                xaxis_title="Year",
-                yaxis_title="County",
-                template="bengtegard",
-                paper_bgcolor=BG_COLOR,
-                plot_bgcolor=BG_COLOR,
-                font_color=TEXT_COLOR,
-                coloraxis_colorbar=dict(title="Patients per 1000"),
-            )
-            heatmap_fig.update_coloraxes(
-                colorbar_tickfont_size=10,
-                colorbar_tickfont_color=TEXT_COLOR,
-            )
-
-            # Update axes and add a custom hovertemplate
-            heatmap_fig.update_xaxes(
-                tickmode="array",
-                tickvals=df_heat["year"].unique(),
-                ticktext=df_heat["year"].unique(),
+            heatmap = _heatmap_values(
+                cube, selected_medication, selected_gender, selected_age, selected_order
             )
-            heatmap_fig.update_yaxes(title_standoff=4, automargin=True)
-            heatmap_fig.update_traces(
-                hovertemplate=(
-                    "<b>Year:</b> %{x}<br>"
-                    "<b>County:</b> %{y}<br>"
-                    "<b>Patients per 1,000:</b> %{z}<extra></extra>"
-                ),
-                hoverlabel=dict(bgcolor=TEXT_COLOR),
+            heatmap_fig = render_skeleton(
+                ("heatmap", bp, responsive_height(bp, height, "line")),
+                {"title": title, **heatmap},
+                lambda: build_county_heatmap(heatmap, title, bp, width, height),
+                _heatmap_slots,
             )
 
-            # Apply breakpoints configuration
-            heatmap_fig = apply_responsive_layout(heatmap_fig, bp, width, height)
-
             note_style = {
                 "fontSize": "11px",
                 "color": TEXT_COLOR,
@@ -545,62 +1236,31 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
 
         # Line chart if single county
         else:
-            df_single = df_heat[df_heat["county"] == selected_county]
-            heatmap_fig = px.line(
-                df_single,
-                x="year",
-                y="patients_per_1000",
-                color="age_group",
-                markers=True,
-                color_discrete_map=FACET_COLORS,
-                title=f"ADHD Prescriptions in {selected_county}<br><sub>{selected_medication} | {selected_gender} | Age {selected_age}</sub>",
-            )
-            heatmap_fig.update_layout(
-                hovermode="x",
-                xaxis_title="Year",
-                yaxis_title="Patients per 1000 inhabitants",
-                template="bengtegard",
-                paper_bgcolor=BG_COLOR,
-                plot_bgcolor=BG_COLOR,
-                font_color=TEXT_COLOR,
-                legend_title_text="Age Group",
+            # The multiplier from the first year with data > 0 is computed at
+            # ingest
+            df_single = cube.to_frame(
+                selected_medication,
+                selected_county,
+                sex=selected_gender,
+                age_group=selected_age,
             )
-            # Update axes and add a custom hovertemplate
-            heatmap_fig.update_xaxes(
-                showspikes=True,
-                tickmode="array",
-                tickvals=df_single["year"].unique(),
-                ticktext=df_single["year"].unique(),
+            df_single["year"] = df_single["year"].astype(str)
+            title = (
+                f"ADHD Prescriptions in {selected_county}<br>"
+                f"<sub>{selected_medication} | {selected_gender} | Age {selected_age}</sub>"
             )
-            heatmap_fig.update_yaxes(showspikes=True, tick0=0, dtick=10)
-
-            for trace in heatmap_fig.data:
-                trace.update(
-                    hovertemplate=(
-                        "<b>Year:</b> %{x}<br>"
-                        "<b>Patients per 1,000:</b> %{y:.1f}<extra></extra>"
-                    ),
-                    hoverlabel=dict(
-                        font=dict(color=FACET_COLORS.get(trace.name, "white")),
-                        bgcolor=BG_COLOR,
-                        bordercolor=BG_COLOR,
-                    ),
-                )
-            # Add multiplier annotation at the end of the line
-            last_point = df_single.iloc[-1]
-            heatmap_fig.add_annotation(
-                x=last_point["year"],
-                y=last_point["patients_per_1000"],
-                text=f"x{last_point['multiplier']:.1f}",
-                showarrow=False,
-                xshift=10,  # Shift text to the right of the point
-                font=dict(size=14, color=FACET_COLORS.get(last_point["age_group"])),
-                xanchor="left",
+            heatmap_fig = render_skeleton(
+                (
+                    "county_line",
+                    selected_age,
+                    bp,
+                    responsive_height(bp, height, "line"),
+                ),
+                _county_line_values(df_single, title),
+                lambda: build_county_line(df_single, title, bp, width, height),
+                _county_line_slots,
             )
 
-            # Apply breakpoints configuration
-            heatmap_fig = apply_responsive_layout(heatmap_fig, bp, width, height)
-
             # Show note only when a specific county is selected
             note_style = {
                 "fontSize": "11px",
@@ -617,32 +1277,11 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
     # 4. GENDER RATIO PLOT
     # ============================================================================
 
-    @app.callback(
-        Output("sex-ratio-plot", "figure"),
-        [
-            Input("ratio-medication-dropdown", "value"),
-            Input("breakpoint", "widthBreakpoint"),
-        ],
-        [
-            State("breakpoint", "width"),
-            State("breakpoint", "height"),
-        ],
-    )
-    def update_gender_ratio(selected_medication, bp, width, height):
-        """Update the sex ratio chart based on medication selection."""
-
-        if selected_medication == "separator":
-            selected_medication = "All medications"
-
-        df_filtered = df_grouped_national[
-            df_grouped_national["medication_category"] == selected_medication
-        ]
-        fig = plot_gender_ratios(df_filtered)
-
-        fig.update_layout(
-            title=f"Boys-to-Girls ADHD Prescription Ratio by Age Group - {selected_medication}"
-        )
-        fig = apply_responsive_layout(
+    def build_gender_ratio(df_ratio, title, bp, width, height):
+        """Sex ratio chart built with plotly express."""
+        fig = plot_gender_ratio_frame(df_ratio)
+        fig.update_layout(title=title)
+        return apply_responsive_layout(
             fig,
             bp,
             width,
@@ -650,54 +1289,51 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
             chart_type="ratio",
         )
 
-        return fig
-
-    # ============================================================================
-    # 5. CHOROPLETH MAP
-    # ============================================================================
-
     @app.callback(
-        [Output("choropleth-map", "figure"), Output("choropleth-stats", "children")],
+        Output("sex-ratio-plot", "figure"),
         [
-            Input("choropleth-year-slider", "value"),
-            Input("choropleth-sex-radio", "value"),
-            Input("choropleth-age-radio", "value"),
-            Input("breakpoint", "widthBreakpoint"),
+            Input("ratio-medication-dropdown", "value"),
+            Input("ratio-county-dropdown", "value"),
+            Input("initial-breakpoint", "data"),
         ],
         [
+            State("breakpoint", "widthBreakpoint"),
             State("breakpoint", "width"),
             State("breakpoint", "height"),
         ],
     )
-    def update_choropleth(year, sex, age_group, bp, width, height):
-        """Update choropleth map and statistics based on selections."""
+    @metrics.instrument("update_gender_ratio")
+    @figure_cache.memoize("update_gender_ratio", _gender_ratio_key)
+    def update_gender_ratio(
+        selected_medication, selected_county, initial_bp, bp, width, height
+    ):
+        """Update the sex ratio chart for the selected medication and county."""
 
-        if geojson_counties is None:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="GeoJSON file not found.",
-                xref="paper",
-                yref="paper",
-                x=0.5,
-                y=0.5,
-                xanchor="center",
-                yanchor="middle",
-                showarrow=False,
-                font_size=16,
-            )
-            fig.update_layout(
-                template="bengtegard",
-                paper_bgcolor=BG_COLOR,
-                font_color=TEXT_COLOR,
-            )
-            stats = html.Div([html.H4("GeoJSON file missing", style={"color": "red"})])
-            return fig, stats
+        # Wait for the first breakpoint, so the figure is built for it
+        if initial_bp is None:
+            raise dash.exceptions.PreventUpdate
 
-        df_map = prepare_choropleth_data(df_grouped_regional, year, age_group, sex)
-        if df_map.empty:
-            fig = go.Figure()
+        if selected_medication == "separator":
+            selected_medication = "All medications"
+
+        # Ratios are precomputed for every medication, county and age group
+        county = _ratio_county(selected_county)
+        gender_ratios = registry.gender_ratios
+        title = _gender_ratio_title(selected_medication, county)
+
+        if np.isnan(gender_ratios.select(selected_medication, county)).all():
+            # No girls' values anywhere: every ratio is undefined, so say so
+            # instead of drawing nothing (not worth a skeleton)
+            with phase("figure"), _build_lock:
+                fig = build_gender_ratio(
+                    gender_ratios.to_frame(selected_medication, county),
+                    title,
+                    bp,
+                    width,
+                    height,
+                )
             fig.add_annotation(
-                text="No data available for selected parameters",
+                text="No data for this selection",
                 xref="paper",
                 yref="paper",
                 x=0.5,
@@ -707,25 +1343,35 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
                 showarrow=False,
                 font_size=16,
             )
-            fig.update_layout(
-                template="bengtegard",
-                paper_bgcolor=BG_COLOR,
-                font_color=TEXT_COLOR,
-            )
-            stats = html.Div([html.H4("No data available", style={"color": "red"})])
-            return fig, stats
+            return fig
+
+        return render_skeleton(
+            ("ratio", bp, responsive_height(bp, height, "ratio")),
+            _gender_ratio_values(gender_ratios, selected_medication, county, title),
+            lambda: build_gender_ratio(
+                gender_ratios.to_frame(selected_medication, county),
+                title,
+                bp,
+                width,
+                height,
+            ),
+            _gender_ratio_slots,
+        )
+
+    # ============================================================================
+    # 5. CHOROPLETH MAP
+    # ============================================================================
+
+    def build_choropleth(
+        df_map, geojson_counties, title, trend_context, bp, width, height
+    ):
+        """County map built with plotly express."""
+        import plotly.express as px
 
         # Max for color scale
-        max_all = df_grouped_regional[
-            df_grouped_regional["medication_category"] == "All medications"
-        ]["patients_per_1000"].max()
+        max_all = registry.county_stats.color_max("All medications")
         color_scale_max = max_all * 1.1
 
-        # National trend context
-        trend_context = get_national_trend_context(
-            df_grouped_national, year, age_group, sex
-        )
-
         # Create choropleth figure
         map_fig = px.choropleth(
             df_map,
@@ -761,9 +1407,9 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
             plot_bgcolor=BG_COLOR,
             font_color=TEXT_COLOR,
             transition={"duration": 900, "easing": "cubic-in-out"},
-            template=bengtegard_template,
+            template=dashboard_template(),
             title={
-                "text": f"ADHD Prescription Rates by County ({sex}, Age {age_group})<br>{year}",
+                "text": title,
                 "x": 0.5,
                 "xanchor": "center",
                 "yanchor": "top",
@@ -792,107 +1438,298 @@ def register_callbacks(app, df_grouped_national, df_grouped_regional, geojson_co
             bordercolor=BG_COLOR,
         )
 
-        # Statistics summary
-        if len(df_map) > 0:
-            highest_county = df_map.loc[df_map["patients_per_1000"].idxmax(), "county"]
-            highest_rate = df_map["patients_per_1000"].max()
-            lowest_county = df_map.loc[df_map["patients_per_1000"].idxmin(), "county"]
-            lowest_rate = df_map["patients_per_1000"].min()
-            std_rate = df_map["patients_per_1000"].std()
-
-            stats = html.Div(
-                [
-                    html.H4(
-                        f"Statistics for {year}",
-                        style={"marginBottom": 15, "color": TEXT_COLOR},
-                    ),
-                    html.Div(
-                        [
-                            html.Div(
-                                [
-                                    html.Strong("Highest Rate: "),
-                                    f"{highest_county} ({highest_rate:.1f} per 1000)",
-                                ],
-                                style={"marginBottom": 5, "color": TEXT_COLOR},
-                            ),
-                            html.Div(
-                                [
-                                    html.Strong("Lowest Rate: "),
-                                    f"{lowest_county} ({lowest_rate:.1f} per 1000)",
-                                ],
-                                style={"marginBottom": 5, "color": TEXT_COLOR},
-                            ),
-                            html.Div(
-                                [
-                                    html.Strong("Standard Deviation: "),
-                                    f"{std_rate:.1f}",
-                                ],
-                                style={"marginBottom": 5, "color": TEXT_COLOR},
-                            ),
-                        ]
-                    ),
-                ]
-            )
-        else:
-            stats = html.Div(
-                [html.H4("No data available", style={"color": TEXT_COLOR})]
-            )
         map_fig = apply_responsive_layout(map_fig, bp, width, height, chart_type="map")
 
-        return map_fig, stats
+        return map_fig
 
-    # ============================================================================
-    # 6. CHOROPLETH ANIMATION CONTROLS
-    # ============================================================================
     @app.callback(
         [
-            Output("choropleth-year-slider", "value"),
-            Output("choropleth-interval", "disabled"),
-            Output("choropleth-animation-state", "data"),
+            Output("choropleth-map", "figure"),
+            Output("choropleth-stats", "children"),
+            Output("choropleth-geojson-level", "data"),
         ],
         [
-            Input("choropleth-play-btn", "n_clicks"),
-            Input("choropleth-pause-btn", "n_clicks"),
-            Input("choropleth-interval", "n_intervals"),
+            # Only fires once, for the first breakpoint; see relayout_figures
+            # and section 6
+            Input("initial-breakpoint", "data"),
         ],
         [
-            State("choropleth-animation-state", "data"),
+            State("breakpoint", "widthBreakpoint"),
             State("choropleth-year-slider", "value"),
+            State("choropleth-sex-radio", "value"),
+            State("choropleth-age-radio", "value"),
+            State("breakpoint", "width"),
+            State("breakpoint", "height"),
         ],
     )
-    def control_and_animate_choropleth(
-        play_clicks, pause_clicks, n_intervals, animation_state, current_year
-    ):
-        """Combined play/pause controls and animation for choropleth."""
-        ctx = dash.callback_context
-        if not ctx.triggered:
-            return (
-                current_year,
-                True,
-                animation_state or {"playing": False, "current_year": current_year},
+    @metrics.instrument("update_choropleth")
+    @figure_cache.memoize("update_choropleth", _choropleth_key)
+    def update_choropleth(initial_bp, bp, year, sex, age_group, width, height):
+        """
+        Build the choropleth map (with the county geometry) and statistics,
+        and the level of detail of the geometry.
+
+        Runs once the first breakpoint is known, with the geometry simplified
+        for it. Breakpoint changes are applied by relayout_figures and
+        year/sex/age changes recolour the map, both without rebuilding it.
+        """
+        if initial_bp is None:
+            raise dash.exceptions.PreventUpdate
+
+        geojson_counties = registry.geojson_for(bp)
+        cube = registry.cube
+
+        if geojson_counties is None:
+            fig = go.Figure()
+            fig.add_annotation(
+                text="GeoJSON file not found.",
+                xref="paper",
+                yref="paper",
+                x=0.5,
+                y=0.5,
+                xanchor="center",
+                yanchor="middle",
+                showarrow=False,
+                font_size=16,
+            )
+            fig.update_layout(
+                template=dashboard_template(),
+                paper_bgcolor=BG_COLOR,
+                font_color=TEXT_COLOR,
             )
+            stats = html.Div([html.H4("GeoJSON file missing", style={"color": "red"})])
+            return fig, stats, None
 
-        # Find out which button was clicked
-        trigger_id = ctx.triggered[0]["prop_id"].split(".")[0]
+        df_map = _choropleth_frame(cube, year, sex, age_group)
+        if df_map.empty:
+            fig = go.Figure()
+            fig.add_annotation(
+                text="No data available for selected parameters",
+                xref="paper",
+                yref="paper",
+                x=0.5,
+                y=0.5,
+                xanchor="center",
+                yanchor="middle",
+                showarrow=False,
+                font_size=16,
+            )
+            fig.update_layout(
+                template=dashboard_template(),
+                paper_bgcolor=BG_COLOR,
+                font_color=TEXT_COLOR,
+            )
+            stats = html.Div([html.H4("No data available", style={"color": "red"})])
+            return fig, stats, None
+
+        # National trend context
+        county_stats = registry.county_stats
+        trend_context = _choropleth_trend(county_stats, year, sex, age_group)
+
+        map_fig = render_skeleton(
+            ("map", bp, responsive_height(bp, height, "map")),
+            _choropleth_values(df_map, year, sex, age_group, trend_context),
+            lambda: build_choropleth(
+                df_map,
+                geojson_counties,
+                _choropleth_title(year, sex, age_group),
+                trend_context,
+                bp,
+                width,
+                height,
+            ),
+            _choropleth_slots,
+        )
 
-        # Handle play button
-        if trigger_id == "choropleth-play-btn":
-            start_year = 2006 if current_year >= 2024 else current_year
-            return start_year, False, {"playing": True, "current_year": start_year}
+        # Statistics summary
+        stats = _choropleth_stats(county_stats, year, sex, age_group)
 
-        # Handle pause button
-        elif trigger_id == "choropleth-pause-btn":
-            return current_year, True, {"playing": False, "current_year": current_year}
+        return map_fig, stats, registry.geojson_level(bp)
+
+    # ============================================================================
+    # 6. CHOROPLETH RECOLOURING AND ANIMATION
+    # ============================================================================
+    if CHOROPLETH_CLIENTSIDE_ANIMATION:
+        # Every year of the selected sex/age in one response; the year slider
+        # and the play/pause animation then recolour the map in the browser
+        @app.callback(
+            Output("choropleth-year-values", "data"),
+            [
+                Input("choropleth-sex-radio", "value"),
+                Input("choropleth-age-radio", "value"),
+            ],
+        )
+        @metrics.instrument("load_choropleth_years")
+        @figure_cache.memoize("load_choropleth_years", _choropleth_years_key)
+        def load_choropleth_years(sex, age_group):
+            """All years of the map's values, titles and statistics."""
+            if registry.geojson is None:
+                raise dash.exceptions.PreventUpdate
+            return _choropleth_years(
+                registry.cube, registry.county_stats, sex, age_group
+            )
 
-        # Handle animation interval
-        elif trigger_id == "choropleth-interval":
-            if not animation_state.get("playing", False):
-                return current_year, True, animation_state
+        app.clientside_callback(
+            ClientsideFunction(
+                namespace="choropleth_animation", function_name="recolour"
+            ),
+            [
+                Output("choropleth-map", "figure", allow_duplicate=True),
+                Output("choropleth-stats", "children", allow_duplicate=True),
+            ],
+            [
+                Input("choropleth-year-slider", "value"),
+                Input("choropleth-year-values", "data"),
+            ],
+            State("choropleth-map", "figure"),
+            prevent_initial_call=True,
+        )
 
-            next_year = current_year + 1
-            if next_year > 2024:
-                # Stop animation at 2024
-                return 2024, True, {"playing": False, "current_year": 2024}
-            return next_year, False, animation_state
+        app.clientside_callback(
+            ClientsideFunction(
+                namespace="choropleth_animation", function_name="animate"
+            ),
+            [
+                Output("choropleth-year-slider", "value"),
+                Output("choropleth-interval", "disabled"),
+                Output("choropleth-animation-state", "data"),
+            ],
+            [
+                Input("choropleth-play-btn", "n_clicks"),
+                Input("choropleth-pause-btn", "n_clicks"),
+                Input("choropleth-interval", "n_intervals"),
+            ],
+            [
+                State("choropleth-animation-state", "data"),
+                State("choropleth-year-slider", "value"),
+                State("choropleth-year-values", "data"),
+            ],
+            prevent_initial_call=True,
+        )
+
+        choropleth_callbacks = {"load_choropleth_years": load_choropleth_years}
+    else:
+        # Server-side: recolour with a Patch, animate through the interval
+        @app.callback(
+            [
+                Output("choropleth-map", "figure", allow_duplicate=True),
+                Output("choropleth-stats", "children", allow_duplicate=True),
+            ],
+            [
+                Input("choropleth-year-slider", "value"),
+                Input("choropleth-sex-radio", "value"),
+                Input("choropleth-age-radio", "value"),
+            ],
+            prevent_initial_call=True,
+        )
+        @metrics.instrument("patch_choropleth")
+        @figure_cache.memoize("patch_choropleth", _choropleth_patch_key)
+        def patch_choropleth(year, sex, age_group):
+            """
+            Recolour the map for a new year/sex/age selection.
+
+            Only the county values, title and trend annotation are sent; the
+            geometry built by update_choropleth stays in the browser.
+            """
+            cube = registry.cube
+            df_map = _choropleth_frame(cube, year, sex, age_group)
+            if registry.geojson is None or df_map.empty:
+                # Nothing to recolour (no geometry, or no data for the selection)
+                raise dash.exceptions.PreventUpdate
+
+            values = df_map["patients_per_1000"]
+            patched = Patch()
+            patched["data"][0]["locations"] = df_map["county_geo"].tolist()
+            patched["data"][0]["hovertext"] = df_map["county"].tolist()
+            patched["data"][0]["z"] = values.tolist()
+            patched["data"][0]["customdata"] = [
+                [geo, value] for geo, value in zip(df_map["county_geo"], values)
+            ]
+            patched["layout"]["title"]["text"] = _choropleth_title(
+                year, sex, age_group
+            )
+            county_stats = registry.county_stats
+            patched["layout"]["annotations"][0]["text"] = _choropleth_trend(
+                county_stats, year, sex, age_group
+            )
+
+            return patched, _choropleth_stats(county_stats, year, sex, age_group)
+
+        @app.callback(
+            [
+                Output("choropleth-year-slider", "value"),
+                Output("choropleth-interval", "disabled"),
+                Output("choropleth-animation-state", "data"),
+            ],
+            [
+                Input("choropleth-play-btn", "n_clicks"),
+                Input("choropleth-pause-btn", "n_clicks"),
+                Input("choropleth-interval", "n_intervals"),
+            ],
+            [
+                State("choropleth-animation-state", "data"),
+                State("choropleth-year-slider", "value"),
+            ],
+        )
+        @metrics.instrument("control_and_animate_choropleth")
+        def control_and_animate_choropleth(
+            play_clicks, pause_clicks, n_intervals, animation_state, current_year
+        ):
+            """Combined play/pause controls and animation for choropleth."""
+            ctx = dash.callback_context
+            if not ctx.triggered:
+                return (
+                    current_year,
+                    True,
+                    animation_state
+                    or {"playing": False, "current_year": current_year},
+                )
+
+            # Find out which button was clicked
+            trigger_id = ctx.triggered[0]["prop_id"].split(".")[0]
+
+            # Handle play button
+            if trigger_id == "choropleth-play-btn":
+                start_year = 2006 if current_year >= 2024 else current_year
+                return start_year, False, {"playing": True, "current_year": start_year}
+
+            # Handle pause button
+            elif trigger_id == "choropleth-pause-btn":
+                return (
+                    current_year,
+                    True,
+                    {"playing": False, "current_year": current_year},
+                )
+
+            # Handle animation interval
+            elif trigger_id == "choropleth-interval":
+                if not animation_state.get("playing", False):
+                    return current_year, True, animation_state
+
+                next_year = current_year + 1
+                if next_year > 2024:
+                    # Stop animation at 2024
+                    return 2024, True, {"playing": False, "current_year": 2024}
+                return next_year, False, animation_state
+
+            return current_year, True, animation_state
+
+        choropleth_callbacks = {
+            "patch_choropleth": patch_choropleth,
+            "control_and_animate_choropleth": control_and_animate_choropleth,
+        }
 
-        return current_year, True, animation_state
+    # The functions themselves, e.g. for warming the figure cache
+    return {
+        "update_all_chart_containers": update_all_chart_containers,
+        "update_all_controls_style": update_all_controls_style,
+        "relayout_figures": relayout_figures,
+        "line_chart_figure": line_chart_figure,
+        "update_line_chart": update_line_chart,
+        "barplot_20_vs_24": barplot_20_vs_24,
+        "toggle_bar_chart": toggle_bar_chart,
+        "update_heatmap": update_heatmap,
+        "update_gender_ratio": update_gender_ratio,
+        "update_choropleth": update_choropleth,
+        **choropleth_callbacks,
+    }
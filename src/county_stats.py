@@ -0,0 +1,159 @@
+# ============================================================================
+# COUNTY STATISTICS MODULE
+# ============================================================================
+# This file contains the county statistics table: for every (medication,
+# sex, age group, year) the min/max (and their counties), standard
+# deviation and percentiles of the regional values, plus the national value
+# and its change since the baseline year. It is built once from the data
+# cube at ingest, so the map's statistics panel, trend annotation and colour
+# scale are dictionary lookups instead of scans of the regional data.
+# ============================================================================
+
+"""Precomputed per-slice county statistics."""
+
+import warnings
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_cube import NATIONAL_COUNTY, DataCube
+
+# Year the national change is measured from
+BASELINE_YEAR = 2006
+
+# Percentiles of the county values kept in every row
+PERCENTILES = (25, 50, 75)
+
+# Dimensions of a row key, in order
+ROW_DIMS = ("medication_category", "sex", "age_group", "year")
+
+
+def _nanpercentile(values: np.ndarray, q) -> np.ndarray:
+    """
+    np.nanpercentile over the last axis. It loops over the slices in Python
+    (most of the build time), so only the slices with missing values go
+    through it; the rest take the vectorised np.percentile, which gives the
+    same values.
+    """
+    flat = values.reshape(-1, values.shape[-1])
+    gaps = np.isnan(flat).any(axis=-1)
+    result = np.empty((len(q), flat.shape[0]))
+    result[:, ~gaps] = np.percentile(flat[~gaps], q, axis=-1)
+    if gaps.any():
+        result[:, gaps] = np.nanpercentile(flat[gaps], q, axis=-1)
+    return result.reshape((len(q),) + values.shape[:-1])
+
+
+class CountyStats:
+    """
+    Statistics of the regional values of every cube slice.
+
+    A row (see row) holds:
+    counties: number of counties with a value
+    min, max, min_county, max_county: extremes and the (first) county
+        reaching them
+    std: sample standard deviation (NaN with fewer than two counties)
+    p25, p50, p75: percentiles (linear interpolation)
+    national: national value (None if missing)
+    baseline: national value in BASELINE_YEAR (None if missing)
+    change_since_baseline: national change since BASELINE_YEAR in percent
+        (None if either value is missing or the baseline is 0)
+
+    Statistics of slices without any county value are None.
+    """
+
+    def __init__(self, rows: Dict[tuple, dict], color_max: Dict[str, float]):
+        self._rows = rows
+        self._color_max = color_max
+
+    @classmethod
+    def from_cube(cls, cube: DataCube) -> "CountyStats":
+        """Compute every row from the cube in a few vectorised passes."""
+        counties = cube.regional_counties
+
+        # (medication, sex, age, year, county)
+        values = np.moveaxis(cube.select(county=counties), 1, -1)
+        present = ~np.isnan(values)
+        count = present.sum(axis=-1)
+
+        with warnings.catch_warnings():
+            # All-NaN slices and single-county std give NaN, as intended
+            warnings.simplefilter("ignore", RuntimeWarning)
+            minimum = np.nanmin(values, axis=-1)
+            maximum = np.nanmax(values, axis=-1)
+            std = np.nanstd(values, axis=-1, ddof=1)
+            percentiles = _nanpercentile(values, PERCENTILES)
+            color_max = np.nanmax(values, axis=(1, 2, 3, 4))
+        argmin = np.where(present, values, np.inf).argmin(axis=-1)
+        argmax = np.where(present, values, -np.inf).argmax(axis=-1)
+
+        national = cube.select(county=NATIONAL_COUNTY)
+        years = cube.labels["year"]
+        if BASELINE_YEAR in years:
+            baseline = national[..., years.index(BASELINE_YEAR)]
+        else:
+            baseline = np.full(national.shape[:-1], np.nan)
+
+        def _value(x):
+            return None if np.isnan(x) else float(x)
+
+        rows = {}
+        for index in np.ndindex(count.shape):
+            medication, sex, age_group, year = (
+                cube.labels[dim][i] for dim, i in zip(ROW_DIMS, index)
+            )
+            national_value = _value(national[index])
+            baseline_value = _value(baseline[index[:-1]])
+            change = None
+            if None not in (national_value, baseline_value) and baseline_value != 0:
+                change = (national_value - baseline_value) / baseline_value * 100
+
+            if count[index]:
+                county_stats = {
+                    "min": float(minimum[index]),
+                    "max": float(maximum[index]),
+                    "min_county": counties[argmin[index]],
+                    "max_county": counties[argmax[index]],
+                    "std": float(std[index]),
+                    **{
+                        f"p{q}": float(percentiles[(k,) + index])
+                        for k, q in enumerate(PERCENTILES)
+                    },
+                }
+            else:
+                county_stats = dict.fromkeys(
+                    ["min", "max", "min_county", "max_county", "std"]
+                    + [f"p{q}" for q in PERCENTILES]
+                )
+
+            rows[(medication, sex, age_group, int(year))] = {
+                "counties": int(count[index]),
+                **county_stats,
+                "national": national_value,
+                "baseline": baseline_value,
+                "change_since_baseline": change,
+            }
+
+        medications = cube.labels["medication_category"]
+        return cls(
+            rows,
+            {
+                medication: float(value)
+                for medication, value in zip(medications, color_max)
+                if not np.isnan(value)
+            },
+        )
+
+    def row(self, medication_category, sex, age_group, year) -> Optional[dict]:
+        """Statistics of one slice, or None if it is not in the cube."""
+        return self._rows.get((medication_category, sex, age_group, int(year)))
+
+    def color_max(self, medication_category) -> float:
+        """Largest county value of a medication over every sex, age and year."""
+        return self._color_max[medication_category]
+
+    def to_frame(self) -> pd.DataFrame:
+        """The whole table, one row per (medication, sex, age group, year)."""
+        index = pd.MultiIndex.from_tuples(list(self._rows), names=ROW_DIMS)
+        return pd.DataFrame(list(self._rows.values()), index=index)
@@ -0,0 +1,208 @@
+# ============================================================================
+# DATA CACHE MODULE
+# ============================================================================
+# This file contains a build-once columnar cache (NumPy .npz) of the
+# processed national and regional DataFrames. The cache is keyed by a
+# content hash of every input, so it rebuilds itself when any input changes.
+# ============================================================================
+
+"""On-disk columnar cache for the processed dashboard DataFrames."""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    CACHE_DATA_PATH,
+    COUNTY_MAP,
+    FILES_AND_AGES,
+    GENDER_MAP,
+    MED_GROUP_MAP,
+    MED_NAME_MAP,
+    PROCESSED_CSV,
+    RAW_DATA_PATH,
+    VALID_AGE_GROUPS,
+    VALID_GENDERS,
+)
+from src.data_processing import load_processed_csv, load_and_process_all_data
+
+# Bump when the on-disk layout of the cache file changes
+CACHE_FORMAT_VERSION = 2
+
+CACHE_PREFIX = "grouped-"
+FRAME_NAMES = ("national", "regional")
+
+
+def dataset_fingerprint(csv_path=PROCESSED_CSV, data_path=RAW_DATA_PATH) -> str:
+    """
+    Compute a content hash of every input to the processed DataFrames.
+
+    Covers the processed CSV, the raw Excel files, the config.py mappings and
+    the source of the data processing module itself.
+
+    Parameters:
+    csv_path: Path to the processed CSV
+    data_path: Path to the directory containing Excel files
+
+    Returns:
+    str: Hex digest identifying this version of the dataset
+    """
+    digest = hashlib.sha256()
+    digest.update(f"format={CACHE_FORMAT_VERSION}".encode())
+
+    input_files = [csv_path]
+    input_files += [os.path.join(data_path, f) for f in sorted(FILES_AND_AGES)]
+    input_files.append(os.path.join(os.path.dirname(__file__), "data_processing.py"))
+
+    for file_path in input_files:
+        digest.update(os.path.basename(file_path).encode())
+        try:
+            with open(file_path, "rb") as f:
+                digest.update(f.read())
+        except FileNotFoundError:
+            digest.update(b"<missing>")
+
+    mappings = {
+        "MED_NAME_MAP": MED_NAME_MAP,
+        "MED_GROUP_MAP": MED_GROUP_MAP,
+        "GENDER_MAP": GENDER_MAP,
+        "COUNTY_MAP": COUNTY_MAP,
+        "FILES_AND_AGES": FILES_AND_AGES,
+        "VALID_AGE_GROUPS": VALID_AGE_GROUPS,
+        "VALID_GENDERS": VALID_GENDERS,
+    }
+    digest.update(json.dumps(mappings, sort_keys=True).encode())
+
+    return digest.hexdigest()
+
+
+def _frame_to_arrays(name: str, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Flatten a DataFrame into plain NumPy arrays (labels as codes + categories)."""
+    arrays = {f"{name}__columns": np.array(df.columns, dtype=str)}
+
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Keep the declared category order, including unused categories
+            arrays[f"{name}__{col}__catcodes"] = series.cat.codes.to_numpy()
+            arrays[f"{name}__{col}__categories"] = np.asarray(
+                series.cat.categories, dtype=str
+            )
+        elif pd.api.types.is_numeric_dtype(series):
+            arrays[f"{name}__{col}__values"] = series.to_numpy()
+        else:
+            codes, categories = pd.factorize(series)
+            arrays[f"{name}__{col}__codes"] = codes.astype(np.int32)
+            arrays[f"{name}__{col}__categories"] = np.asarray(categories, dtype=str)
+
+    return arrays
+
+
+def _arrays_to_frame(name: str, npz) -> pd.DataFrame:
+    """Rebuild a DataFrame from the arrays written by _frame_to_arrays."""
+    data = {}
+
+    for col in npz[f"{name}__columns"]:
+        if f"{name}__{col}__values" in npz.files:
+            data[col] = npz[f"{name}__{col}__values"]
+        elif f"{name}__{col}__catcodes" in npz.files:
+            data[col] = pd.Categorical.from_codes(
+                npz[f"{name}__{col}__catcodes"],
+                npz[f"{name}__{col}__categories"].tolist(),
+            )
+        else:
+            categorical = pd.Categorical.from_codes(
+                npz[f"{name}__{col}__codes"], npz[f"{name}__{col}__categories"]
+            )
+            data[col] = np.asarray(categorical, dtype=object)
+
+    return pd.DataFrame(data)
+
+
+def save_cached_frames(
+    df_national: pd.DataFrame, df_regional: pd.DataFrame, cache_path: str
+) -> None:
+    """
+    Write both processed DataFrames to a single .npz file.
+
+    The file is written to a temporary name and then atomically renamed, so
+    concurrent gunicorn workers never see a half-written cache.
+    """
+    arrays = {}
+    arrays.update(_frame_to_arrays("national", df_national))
+    arrays.update(_frame_to_arrays("regional", df_regional))
+
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_cached_frames(cache_path: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Read both processed DataFrames from a cache file."""
+    with np.load(cache_path, allow_pickle=False) as npz:
+        return tuple(_arrays_to_frame(name, npz) for name in FRAME_NAMES)
+
+
+def _remove_stale_caches(cache_dir: str, keep_path: str) -> None:
+    """Delete cache files left behind by earlier versions of the inputs."""
+    for path in glob.glob(os.path.join(cache_dir, f"{CACHE_PREFIX}*.npz")):
+        if os.path.abspath(path) != os.path.abspath(keep_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def load_cached_data(
+    csv_path=PROCESSED_CSV,
+    data_path=RAW_DATA_PATH,
+    cache_dir=CACHE_DATA_PATH,
+    fingerprint=None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Load the processed national and regional data, building the cache if needed.
+
+    Parameters:
+    csv_path: Path to the processed CSV
+    data_path: Path to raw data files
+    cache_dir: Directory holding the .npz cache files
+    fingerprint: dataset_fingerprint of the inputs, if already computed
+
+    Returns:
+    Tuple[pd.DataFrame, pd.DataFrame]: (df_grouped_national, df_grouped_regional)
+    """
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(csv_path, data_path)
+    cache_path = os.path.join(cache_dir, f"{CACHE_PREFIX}{fingerprint[:16]}.npz")
+
+    if os.path.exists(cache_path):
+        try:
+            return load_cached_frames(cache_path)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Ignoring unreadable data cache {cache_path}: {e}")
+
+    df_raw = load_processed_csv(csv_path)
+    df_grouped, df_grouped_regional = load_and_process_all_data(df_raw, data_path)
+
+    try:
+        save_cached_frames(df_grouped, df_grouped_regional, cache_path)
+        _remove_stale_caches(cache_dir, cache_path)
+    except OSError as e:
+        print(f"Could not write data cache {cache_path}: {e}")
+
+    return df_grouped, df_grouped_regional
@@ -0,0 +1,289 @@
+# ============================================================================
+# DATA CUBE MODULE
+# ============================================================================
+# This file contains a dense NumPy cube of patients_per_1000 values (and the
+# derived per-series measures) indexed by integer codes (medication x county
+# x sex x age_group x year). It is built once at startup so callbacks can
+# slice it instead of scanning the full DataFrames with boolean masks.
+# ============================================================================
+
+"""Dense NumPy data cube with a small slicing API."""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing import VALUE_DECIMALS
+
+VALUE_COLUMN = "patients_per_1000"
+
+# Derived measures stored next to the values (see add_derived_columns)
+DERIVED_MEASURES = ("multiplier", "change_since_2006")
+
+# Columns that depend on a single axis, stored once per label of that axis
+AXIS_ATTRIBUTES = {"label": "sex"}
+
+# Cube axes, in storage order. year is last so every slice over the leading
+# axes is a contiguous time series.
+DIMS = ("medication_category", "county", "sex", "age_group", "year")
+
+# Axis order of the rows returned by to_frame (matches the processed CSV)
+FRAME_ORDER = ("medication_category", "year", "county", "sex", "age_group")
+
+# County label of the national rows
+NATIONAL_COUNTY = "Riket"
+
+# Column order of the grouped DataFrames
+FRAME_COLUMNS = [
+    "year",
+    "county",
+    "sex",
+    "age_group",
+    "medication_category",
+    VALUE_COLUMN,
+]
+
+
+class DataCube:
+    """
+    Dense arrays of patients_per_1000 values with one axis per dimension.
+
+    Labels on every axis keep the order in which they first appear in the
+    source data (years are sorted), so frames built from the cube have the
+    same row order as boolean-mask filtering of the source DataFrames.
+    Values are float64 so figures get the exact source values; the cube is
+    small (~240 KB per measure) next to the frames it is built from.
+
+    The derived measures (multiplier, change_since_2006) share the shape of
+    the values array and are kept in measures; values is
+    measures["patients_per_1000"].
+    """
+
+    def __init__(
+        self,
+        measures: Dict[str, np.ndarray],
+        labels: Dict[str, list],
+        categories: Optional[Dict[str, list]] = None,
+        attributes: Optional[Dict[str, Dict]] = None,
+    ):
+        # Slices are views, so keep callers from writing through them
+        for array in measures.values():
+            array.flags.writeable = False
+        self.measures = dict(measures)
+        self.values = self.measures[VALUE_COLUMN]
+        self.labels = {dim: list(labels[dim]) for dim in DIMS}
+        self._codes = {
+            dim: {label: i for i, label in enumerate(self.labels[dim])}
+            for dim in DIMS
+        }
+
+        # Columns of to_frame: categoricals over the source category order
+        # (codes looked up per cube index), int16 years
+        categories = categories or {}
+        self._column_builders = {}
+        for dim in DIMS:
+            if dim == "year":
+                years = np.asarray(self.labels[dim], dtype=np.int16)
+                self._column_builders[dim] = years.take
+            else:
+                dtype = pd.CategoricalDtype(categories.get(dim, self.labels[dim]))
+                cat_codes = dtype.categories.get_indexer(self.labels[dim])
+                self._column_builders[dim] = (
+                    lambda index, cat_codes=cat_codes, dtype=dtype: (
+                        pd.Categorical.from_codes(cat_codes.take(index), dtype=dtype)
+                    )
+                )
+
+        # Axis attributes (label per sex) become categoricals looked up the
+        # same way, through the codes of their axis
+        self._attribute_builders = {}
+        for name, mapping in (attributes or {}).items():
+            dim = AXIS_ATTRIBUTES[name]
+            dtype = pd.CategoricalDtype(list(dict.fromkeys(mapping.values())))
+            cat_codes = dtype.categories.get_indexer(
+                [mapping[label] for label in self.labels[dim]]
+            )
+            self._attribute_builders[name] = (
+                dim,
+                lambda index, cat_codes=cat_codes, dtype=dtype: (
+                    pd.Categorical.from_codes(cat_codes.take(index), dtype=dtype)
+                ),
+            )
+
+    @classmethod
+    def from_frames(cls, *frames: pd.DataFrame) -> "DataCube":
+        """
+        Build a cube from one or more grouped DataFrames.
+
+        Derived measures and axis attributes are included when every frame
+        has them.
+
+        Parameters:
+        frames: Grouped national and/or regional DataFrames
+
+        Returns:
+        DataCube: Cube with NaN for combinations missing from the data
+        """
+        extra = [
+            col
+            for col in DERIVED_MEASURES + tuple(AXIS_ATTRIBUTES)
+            if all(col in frame.columns for frame in frames)
+        ]
+        df = pd.concat(
+            [frame[list(DIMS) + [VALUE_COLUMN] + extra] for frame in frames],
+            ignore_index=True,
+        )
+
+        labels = {}
+        categories = {}
+        codes = []
+        for dim in DIMS:
+            dim_codes, uniques = pd.factorize(df[dim], sort=(dim == "year"))
+            labels[dim] = [
+                v.item() if isinstance(v, np.generic) else v for v in uniques
+            ]
+            if isinstance(df[dim].dtype, pd.CategoricalDtype):
+                categories[dim] = list(df[dim].cat.categories)
+            codes.append(dim_codes)
+
+        shape = tuple(len(labels[dim]) for dim in DIMS)
+        measures = {}
+        for measure in (VALUE_COLUMN,) + DERIVED_MEASURES:
+            if measure in df.columns:
+                measures[measure] = np.full(shape, np.nan)
+                measures[measure][tuple(codes)] = np.round(
+                    df[measure].to_numpy(dtype=float), VALUE_DECIMALS
+                )
+
+        attributes = {}
+        for name, dim in AXIS_ATTRIBUTES.items():
+            if name in df.columns:
+                pairs = df[[dim, name]].drop_duplicates(dim)
+                attributes[name] = dict(
+                    zip(pairs[dim].astype(object), pairs[name].astype(object))
+                )
+
+        return cls(measures, labels, categories, attributes)
+
+    @property
+    def regional_counties(self) -> List[str]:
+        """Every county label except the national total."""
+        return [c for c in self.labels["county"] if c != NATIONAL_COUNTY]
+
+    # ------------------------------------------------------------------------
+    # Index helpers
+    # ------------------------------------------------------------------------
+
+    def code(self, dim: str, label) -> int:
+        """Integer code of a label on one axis (KeyError if unknown)."""
+        return self._codes[dim][label]
+
+    def _axis_index(self, dim: str, selection):
+        """Translate a label, list of labels or None into an axis index."""
+        if selection is None:
+            return slice(None)
+        if isinstance(selection, (list, tuple, set, np.ndarray, pd.Index)):
+            wanted = set(selection)
+            # Keep cube order rather than selection order (like Series.isin)
+            return [i for i, label in enumerate(self.labels[dim]) if label in wanted]
+        return self.code(dim, selection)
+
+    def _index_list(self, dim: str, selection) -> List[int]:
+        index = self._axis_index(dim, selection)
+        if isinstance(index, slice):
+            return list(range(len(self.labels[dim])))
+        if isinstance(index, list):
+            return index
+        return [index]
+
+    # ------------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------------
+
+    def select(
+        self,
+        medication_category=None,
+        county=None,
+        sex=None,
+        age_group=None,
+        year=None,
+        measure=VALUE_COLUMN,
+    ) -> np.ndarray:
+        """
+        Slice the cube.
+
+        Each argument is a single label (drops the axis), a list of labels
+        (keeps the axis, in cube order) or None (keeps the whole axis).
+        Without list arguments the result is a view into the cube, and
+        fixing the leading axes gives a contiguous block.
+
+        Returns:
+        np.ndarray: Values of measure for the remaining axes, in DIMS order
+        """
+        selections = (medication_category, county, sex, age_group, year)
+        result = self.measures[measure]
+
+        # Apply one axis at a time so list selections don't broadcast together
+        axis = 0
+        for dim, selection in zip(DIMS, selections):
+            index = self._axis_index(dim, selection)
+            result = result[(slice(None),) * axis + (index,)]
+            if not isinstance(index, int):
+                axis += 1
+
+        return result
+
+    def to_frame(
+        self,
+        medication_category=None,
+        county=None,
+        sex=None,
+        age_group=None,
+        year=None,
+    ) -> pd.DataFrame:
+        """
+        Long-format DataFrame for a slice of the cube.
+
+        Columns and row order match the grouped DataFrames, so the result can
+        replace boolean-mask filtering of those frames. Combinations missing
+        from the source data are left out.
+
+        Returns:
+        pd.DataFrame: Columns year, county, sex, age_group, medication_category,
+        patients_per_1000, then any axis attributes and derived measures
+        """
+        selections = {
+            "medication_category": medication_category,
+            "county": county,
+            "sex": sex,
+            "age_group": age_group,
+            "year": year,
+        }
+        index = {dim: self._index_list(dim, selections[dim]) for dim in DIMS}
+        block_index = np.ix_(*(index[dim] for dim in DIMS))
+        axes = [DIMS.index(dim) for dim in FRAME_ORDER]
+
+        blocks = {
+            measure: array[block_index].transpose(axes).ravel()
+            for measure, array in self.measures.items()
+        }
+        block_shape = tuple(len(index[dim]) for dim in FRAME_ORDER)
+
+        keep = ~np.isnan(blocks[VALUE_COLUMN])
+        positions = np.indices(block_shape).reshape(len(FRAME_ORDER), -1)[:, keep]
+        axis_index = {
+            dim: np.asarray(index[dim], dtype=np.intp)[pos]
+            for dim, pos in zip(FRAME_ORDER, positions)
+        }
+
+        columns = {dim: self._column_builders[dim](axis_index[dim]) for dim in DIMS}
+        columns[VALUE_COLUMN] = blocks[VALUE_COLUMN][keep]
+        for name, (dim, builder) in self._attribute_builders.items():
+            columns[name] = builder(axis_index[dim])
+        for measure in DERIVED_MEASURES:
+            if measure in blocks:
+                columns[measure] = blocks[measure][keep]
+
+        order = FRAME_COLUMNS + [col for col in columns if col not in FRAME_COLUMNS]
+        return pd.DataFrame({col: columns[col] for col in order})
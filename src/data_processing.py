@@ -9,11 +9,16 @@
 
 import pandas as pd
 import os
+import sys
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Tuple
 
 from config import (
     MED_NAME_MAP,
+    MED_GROUP_MAP,
     GENDER_MAP,
     COUNTY_MAP,
     FILES_AND_AGES,
@@ -21,7 +26,101 @@ from config import (
     VALID_GENDERS,
     RAW_DATA_PATH,
     PROCESSED_CSV,
+    GEOJSON_LOD_DIR,
 )
+from src.geometry import lod_path
+
+
+# Fixed category orders for the processed DataFrames
+CATEGORY_ORDERS = {
+    "county": ["Riket"] + list(COUNTY_MAP.values()),
+    "sex": list(GENDER_MAP.values()),
+    "age_group": VALID_AGE_GROUPS,
+    "medication_category": list(MED_NAME_MAP.values()) + list(MED_GROUP_MAP.values()),
+}
+
+# Short legend labels per sex, used by the line chart
+SEX_LABELS = {"Boys": "Boys", "Girls": "Girls", "Both sexes": "Both"}
+
+# The processed CSV has at most three decimals; rounding to them after the
+# float32 -> float64 upcast gives back the exact source values
+VALUE_DECIMALS = 3
+
+# First year of the data, the baseline of change_since_2006
+BASELINE_YEAR = 2006
+
+# One time series per combination of these columns
+SERIES_KEYS = ["county", "sex", "age_group", "medication_category"]
+
+# Compact dtypes: categoricals for labels, int16 years and float32 values
+COMPACT_DTYPES = {
+    "year": "int16",
+    **{col: pd.CategoricalDtype(cats) for col, cats in CATEGORY_ORDERS.items()},
+    "medication_name": pd.CategoricalDtype(CATEGORY_ORDERS["medication_category"]),
+    "patients_per_1000": "float32",
+    "label": pd.CategoricalDtype(list(dict.fromkeys(SEX_LABELS.values()))),
+    "multiplier": "float32",
+    "change_since_2006": "float32",
+}
+
+
+def to_compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert label columns to fixed-order categoricals and downcast numerics.
+
+    Parameters:
+    df: Processed or grouped dataframe
+
+    Returns:
+    pd.DataFrame: Same data using the dtypes in COMPACT_DTYPES
+    """
+    return df.astype(
+        {col: dtype for col, dtype in COMPACT_DTYPES.items() if col in df.columns}
+    )
+
+
+def add_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the per-series columns the charts display, computed once at ingest.
+
+    - label: short legend label of the sex (Boys/Girls/Both)
+    - multiplier: value relative to the first year with data > 0 in the
+      series (heatmap); 0 for series without any data > 0
+    - change_since_2006: value relative to the 2006 value (line chart hover);
+      NaN for series without any data > 0
+
+    Parameters:
+    df: Grouped national or regional dataframe
+
+    Returns:
+    pd.DataFrame: Copy of df with the derived columns added
+    """
+    df = df.copy()
+    values = df["patients_per_1000"].astype("float64").round(VALUE_DECIMALS)
+    series = [df[key] for key in SERIES_KEYS]
+
+    # "first" skips NaN, so masking values <= 0 gives the first year with data
+    by_year = df["year"].argsort(kind="stable")
+    first_positive = (
+        values.where(values > 0)
+        .iloc[by_year]
+        .groupby([s.iloc[by_year] for s in series], observed=True, sort=False)
+        .transform("first")
+        .reindex(df.index)
+    )
+    baseline = (
+        values.where(df["year"] == BASELINE_YEAR)
+        .groupby(series, observed=True, sort=False)
+        .transform("first")
+    )
+    has_data = first_positive.notna()
+
+    df["label"] = df["sex"].astype(str).map(SEX_LABELS).fillna("Both")
+    df["multiplier"] = (values / first_positive).round(2).where(has_data, 0.0)
+    # A zero 2006 value gives inf, as the line chart hover always has
+    df["change_since_2006"] = (values / baseline).round(2).where(has_data)
+
+    return to_compact_dtypes(df)
 
 
 def load_processed_csv(path=PROCESSED_CSV) -> pd.DataFrame:
@@ -38,44 +137,107 @@ def load_geojson(file_path="swedish_provinces.geojson"):
         return None
 
 
-def import_adhd_excel(region_filter="all", data_path=RAW_DATA_PATH):
+def load_geojson_lod(breakpoint, lod_dir=GEOJSON_LOD_DIR):
     """
-    Import and combine the ADHD Excel files into a long format DataFrame.
+    Simplified county GeoJSON for a layout breakpoint (see src/geometry.py).
+
+    Returns None if that level of detail has not been generated.
+    """
+    path = lod_path(breakpoint, lod_dir)
+    if not os.path.exists(path):
+        return None
+    return load_geojson(path)
+
+
+def _read_adhd_workbook(file_path):
+    """Read one ADHD Excel workbook (header row is the second row in the sheet)."""
+    return pd.read_excel(file_path, header=1)
+
+
+def read_adhd_workbooks(data_path=RAW_DATA_PATH, parallel=True):
+    """
+    Read every ADHD Excel workbook listed in FILES_AND_AGES.
+
+    openpyxl parsing is CPU-bound, so the workbooks are parsed in parallel
+    with a process pool unless parallel is False. The pool forks: this runs
+    while dash_app is imported, and spawned workers would import it again.
+    Where forking is unavailable or unsafe (Windows, macOS) the workbooks
+    are read serially.
 
     Parameters:
-    region_filter: "riket" for national data only, "regional" for counties only, "all" for both.
     data_path: Path to the directory containing Excel files.
+    parallel: Parse the workbooks in separate processes.
 
     Returns:
-    pd.DataFrame: Combined data in long format
+    list: One raw DataFrame per workbook that exists
     """
-    all_data = []
-
-    for filename, age_group in FILES_AND_AGES.items():
-        file_path = os.path.join(data_path, filename)
+    file_paths = {
+        filename: os.path.join(data_path, filename) for filename in FILES_AND_AGES
+    }
+
+    def _collect(results):
+        all_data = []
+        for filename, result in results:
+            try:
+                all_data.append(result())
+            except FileNotFoundError:
+                print(f"File {filename} does not exist at {file_paths[filename]}")
+        return all_data
+
+    can_fork = (
+        "fork" in multiprocessing.get_all_start_methods() and sys.platform != "darwin"
+    )
+    if parallel and can_fork and len(file_paths) > 1:
         try:
-            # Header row is second row in the sheet
-            df_temp = pd.read_excel(file_path, header=1)
-            all_data.append(df_temp)
-        except FileNotFoundError:
-            print(f"File {filename} does not exist at {file_path}")
+            max_workers = min(len(file_paths), os.cpu_count() or 1)
+            with ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("fork")
+            ) as pool:
+                futures = {
+                    filename: pool.submit(_read_adhd_workbook, file_path)
+                    for filename, file_path in file_paths.items()
+                }
+                return _collect(
+                    (filename, future.result) for filename, future in futures.items()
+                )
+        except (OSError, BrokenProcessPool) as e:
+            print(f"Parallel Excel parsing unavailable ({e}), reading serially")
+
+    return _collect(
+        (filename, lambda file_path=file_path: _read_adhd_workbook(file_path))
+        for filename, file_path in file_paths.items()
+    )
+
+
+def import_adhd_excel_partitions(
+    data_path=RAW_DATA_PATH, parallel=True
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Import the ADHD Excel files once and split them into national and county data.
+
+    Each workbook is parsed once and the combined data is melted once; the
+    result is then partitioned on the Region column.
+
+    Parameters:
+    data_path: Path to the directory containing Excel files.
+    parallel: Parse the workbooks in separate processes.
+
+    Returns:
+    Tuple[pd.DataFrame, pd.DataFrame]: (riket, regional) in long format, or
+    (None, None) if no workbook could be read
+    """
+    all_data = read_adhd_workbooks(data_path, parallel=parallel)
 
     if not all_data:
-        return None
+        return None, None
 
     # Combine all age-group DataFrames
     df_all = pd.concat(all_data, ignore_index=True)
 
-    # Apply region filter
-    if region_filter == "riket":
-        df_all = df_all[df_all["Region"] == "Riket"]
-    elif region_filter == "regional":
-        df_all = df_all[df_all["Region"] != "Riket"]
-
     # Filter for valid age groups and genders
     df_all = df_all[
         (df_all["Kön"].isin(VALID_GENDERS)) & (df_all["Ålder"].isin(VALID_AGE_GROUPS))
-    ].copy()
+    ]
 
     # Identify year columns (all columns that are purely digits)
     year_cols = [c for c in df_all.columns if str(c).isdigit()]
@@ -102,7 +264,51 @@ def import_adhd_excel(region_filter="all", data_path=RAW_DATA_PATH):
     # Convert year to integer
     df_long["year"] = df_long["year"].astype(int)
 
-    return df_long
+    # Partition national and county rows
+    is_riket = df_long["county"] == "Riket"
+    df_riket = df_long[is_riket].reset_index(drop=True)
+    df_regional = df_long[~is_riket].reset_index(drop=True)
+
+    return df_riket, df_regional
+
+
+def import_adhd_excel(region_filter="all", data_path=RAW_DATA_PATH):
+    """
+    Import and combine the ADHD Excel files into a long format DataFrame.
+
+    Parameters:
+    region_filter: "riket" for national data only, "regional" for counties only, "all" for both.
+    data_path: Path to the directory containing Excel files.
+
+    Returns:
+    pd.DataFrame: Combined data in long format
+    """
+    df_riket, df_regional = import_adhd_excel_partitions(data_path)
+
+    if df_riket is None:
+        return None
+
+    if region_filter == "riket":
+        return df_riket
+    elif region_filter == "regional":
+        return df_regional
+
+    return pd.concat([df_riket, df_regional], ignore_index=True)
+
+
+def has_api_aggregate(df: pd.DataFrame) -> bool:
+    """
+    Check whether the data already holds the API-fetched "All medications" series.
+
+    Parameters:
+    df: Raw dataframe from data fetcher, or a processed dataframe
+
+    Returns:
+    bool: True if the aggregate ADHD group is present
+    """
+    if "medication_name" in df.columns:
+        return bool((df["medication_name"] == "All medications").any())
+    return bool(df["Läkemedel"].isin(list(MED_GROUP_MAP)).any())
 
 
 def process_national_data(df: pd.DataFrame) -> pd.DataFrame:
@@ -134,13 +340,15 @@ def process_national_data(df: pd.DataFrame) -> pd.DataFrame:
         }
     )
 
-    # Map medications to individual names
-    df_national["medication_name"] = df_national["medication"].map(MED_NAME_MAP)
+    # Map medications to individual names (and the ADHD group to "All medications")
+    df_national["medication_name"] = df_national["medication"].map(
+        {**MED_NAME_MAP, **MED_GROUP_MAP}
+    )
 
     # Map sex values to English
     df_national["sex"] = df_national["sex"].map(GENDER_MAP)
 
-    return df_national
+    return to_compact_dtypes(df_national)
 
 
 def process_regional_data(df: pd.DataFrame) -> pd.DataFrame:
@@ -172,17 +380,19 @@ def process_regional_data(df: pd.DataFrame) -> pd.DataFrame:
         }
     )
 
-    # Map ATC codes to individual ADHD medication names
-    df_regional["medication_name"] = df_regional["medication"].map(MED_NAME_MAP)
+    # Map ATC codes to individual ADHD medication names (and the ADHD group)
+    df_regional["medication_name"] = df_regional["medication"].map(
+        {**MED_NAME_MAP, **MED_GROUP_MAP}
+    )
 
     # Map sex values to English
     df_regional["sex"] = df_regional["sex"].map(GENDER_MAP)
 
-    return df_regional
+    return to_compact_dtypes(df_regional)
 
 
 def create_grouped_national_data(
-    df_national: pd.DataFrame, data_path=RAW_DATA_PATH
+    df_national: pd.DataFrame, data_path=RAW_DATA_PATH, df_all_adhd_national=None
 ) -> pd.DataFrame:
     """
     Create grouped national dataset combining individual medications and all medications.
@@ -190,6 +400,7 @@ def create_grouped_national_data(
     Parameters:
     df_national: Processed national dataframe
     data_path: Path to raw data files
+    df_all_adhd_national: Already imported national Excel data (imported if None)
 
     Returns:
     pd.DataFrame: Grouped national data
@@ -198,10 +409,17 @@ def create_grouped_national_data(
     df_individual_nat = df_national.dropna(subset=["medication_name"]).copy()
     df_individual_nat["medication_category"] = df_individual_nat["medication_name"]
 
-    # Import "All ADHD medications" data
-    df_all_adhd_national = import_adhd_excel(region_filter="riket", data_path=data_path)
+    # Import "All ADHD medications" data, unless the API data already has it
+    if has_api_aggregate(df_individual_nat):
+        df_all_adhd_national = pd.DataFrame()
+    elif df_all_adhd_national is None:
+        df_all_adhd_national = import_adhd_excel(
+            region_filter="riket", data_path=data_path
+        )
+    else:
+        df_all_adhd_national = df_all_adhd_national.copy()
 
-    if df_all_adhd_national is not None:
+    if df_all_adhd_national is not None and not df_all_adhd_national.empty:
         # Map sex
         df_all_adhd_national["sex"] = df_all_adhd_national["sex"].map(GENDER_MAP)
         # Add medication category
@@ -219,23 +437,18 @@ def create_grouped_national_data(
         "patients_per_1000",
     ]
 
-    df_grouped = pd.concat(
-        [
-            df_individual_nat[columns_keep],
-            (
-                df_all_adhd_national[columns_keep]
-                if not df_all_adhd_national.empty
-                else pd.DataFrame(columns=columns_keep)
-            ),
-        ],
-        ignore_index=True,
-    )
+    # Skip an empty Excel frame so it doesn't upcast the columns to object
+    parts = [df_individual_nat[columns_keep]]
+    if not df_all_adhd_national.empty:
+        parts.append(df_all_adhd_national[columns_keep])
 
-    return df_grouped
+    df_grouped = pd.concat(parts, ignore_index=True)
+
+    return to_compact_dtypes(df_grouped)
 
 
 def create_grouped_regional_data(
-    df_regional: pd.DataFrame, data_path=RAW_DATA_PATH
+    df_regional: pd.DataFrame, data_path=RAW_DATA_PATH, df_all_adhd_regional=None
 ) -> pd.DataFrame:
     """
     Create grouped regional dataset combining individual medications and all medications.
@@ -243,6 +456,7 @@ def create_grouped_regional_data(
     Parameters:
     df_regional: Processed regional dataframe
     data_path: Path to raw data files
+    df_all_adhd_regional: Already imported county Excel data (imported if None)
 
     Returns:
     pd.DataFrame: Grouped regional data
@@ -250,15 +464,20 @@ def create_grouped_regional_data(
     # Individual medications for regional data
     df_individual_reg = df_regional.dropna(
         subset=["medication_name"]
-    ).copy()  # keep only the 5 ADHD meds
+    ).copy()  # keep only the 5 ADHD meds and the ADHD group
     df_individual_reg["medication_category"] = df_individual_reg["medication_name"]
 
-    # Import the "All ADHD medications" regional data
-    df_all_adhd_regional = import_adhd_excel(
-        region_filter="regional", data_path=data_path
-    )
+    # Import the "All ADHD medications" regional data, unless the API data has it
+    if has_api_aggregate(df_individual_reg):
+        df_all_adhd_regional = pd.DataFrame()
+    elif df_all_adhd_regional is None:
+        df_all_adhd_regional = import_adhd_excel(
+            region_filter="regional", data_path=data_path
+        )
+    else:
+        df_all_adhd_regional = df_all_adhd_regional.copy()
 
-    if df_all_adhd_regional is not None:
+    if df_all_adhd_regional is not None and not df_all_adhd_regional.empty:
         df_all_adhd_regional["sex"] = df_all_adhd_regional["sex"].map(GENDER_MAP)
         df_all_adhd_regional["medication_category"] = "All medications"
 
@@ -282,40 +501,14 @@ def create_grouped_regional_data(
     ]
 
     # Combine the DataFrames
-    df_grouped_regional = pd.concat(
-        [
-            df_individual_reg[columns_keep],
-            (
-                df_all_adhd_regional[columns_keep]
-                if not df_all_adhd_regional.empty
-                else pd.DataFrame(columns=columns_keep)
-            ),
-        ],
-        ignore_index=True,
-    )
+    # Skip an empty Excel frame so it doesn't upcast the columns to object
+    parts = [df_individual_reg[columns_keep]]
+    if not df_all_adhd_regional.empty:
+        parts.append(df_all_adhd_regional[columns_keep])
 
-    return df_grouped_regional
+    df_grouped_regional = pd.concat(parts, ignore_index=True)
 
-
-def create_cumulative_data(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Create cumulative data frames for animation.
-
-    Parameters:
-    df: Input dataframe
-
-    Returns:
-    pd.DataFrame: Cumulative data for animation
-    """
-    cumulative_frames = []
-    years = sorted(df["year"].unique())
-
-    for year in years:
-        frame_data = df[df["year"] <= year].copy()
-        frame_data["Year"] = year  # this is the animation frame
-        cumulative_frames.append(frame_data)
-
-    return pd.concat(cumulative_frames, ignore_index=True)
+    return to_compact_dtypes(df_grouped_regional)
 
 
 def make_label(row: pd.Series) -> str:
@@ -355,13 +548,33 @@ def load_and_process_all_data(
     Returns:
     Tuple[pd.DataFrame, pd.DataFrame]: (df_grouped_national, df_grouped_regional)
     """
+    if has_api_aggregate(raw_df):
+        # "All medications" comes from the API data, no Excel needed
+        df_all_adhd_national = df_all_adhd_regional = pd.DataFrame()
+    else:
+        print("Importing Excel data...")
+        df_all_adhd_national, df_all_adhd_regional = import_adhd_excel_partitions(
+            data_path
+        )
+        if df_all_adhd_national is None:
+            # No workbooks found; pass empty frames so they are not re-imported
+            df_all_adhd_national = df_all_adhd_regional = pd.DataFrame()
+
     print("Processing national data...")
     df_national = process_national_data(raw_df)
-    df_grouped_national = create_grouped_national_data(df_national, data_path)
+    df_grouped_national = create_grouped_national_data(
+        df_national, data_path, df_all_adhd_national
+    )
 
     print("Processing regional data...")
     df_regional = process_regional_data(raw_df)
-    df_grouped_regional = create_grouped_regional_data(df_regional, data_path)
+    df_grouped_regional = create_grouped_regional_data(
+        df_regional, data_path, df_all_adhd_regional
+    )
+
+    print("Adding derived columns...")
+    df_grouped_national = add_derived_columns(df_grouped_national)
+    df_grouped_regional = add_derived_columns(df_grouped_regional)
 
     print("Data processing completed!")
 
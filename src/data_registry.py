@@ -0,0 +1,256 @@
+# ============================================================================
+# DATA REGISTRY MODULE
+# ============================================================================
+# This file contains the process-wide registry of loaded datasets. Both
+# dash_app.py and the callbacks read the national frame, the regional frame
+# and the GeoJSON from here, so every dataset is built once per process.
+# ============================================================================
+
+"""Lazily-initialised, process-wide registry of the dashboard datasets."""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from config import GEOJSON_LOD, GEOJSON_PATH, PROCESSED_CSV, RAW_DATA_PATH
+from src.data_cache import dataset_fingerprint, load_cached_data
+from src.county_stats import CountyStats
+from src.data_cube import DataCube
+from src.data_processing import load_geojson, load_geojson_lod
+from src.gender_ratio import GenderRatios
+
+
+class DataRegistry:
+    """
+    Holds the processed datasets and builds each one on first access.
+
+    The DataFrame properties return shallow copies; with copy-on-write
+    (always on since pandas 3.0, which requirements.txt requires) any
+    modification made by a caller stays local to that copy. The GeoJSON dict
+    is shared and must be treated as immutable.
+    """
+
+    def __init__(
+        self,
+        csv_path=PROCESSED_CSV,
+        data_path=RAW_DATA_PATH,
+        geojson_path=GEOJSON_PATH,
+    ):
+        self.csv_path = csv_path
+        self.data_path = data_path
+        self.geojson_path = geojson_path
+
+        self._lock = threading.RLock()
+        self._fingerprint = None
+        self._frames = None
+        self._cube = None
+        self._county_stats = None
+        self._gender_ratios = None
+        self._geojson = None
+        self._geojson_loaded = False
+        self._geojson_lods: Dict[str, Optional[dict]] = {}
+
+        # Seconds spent building each dataset, filled in as they are built
+        self.build_times: Dict[str, float] = {}
+
+        # Called after every rebuild, e.g. to drop caches of derived results
+        self._rebuild_listeners: List[Callable[[], None]] = []
+
+    # ------------------------------------------------------------------------
+    # Builders
+    # ------------------------------------------------------------------------
+
+    def _ensure_frames(self):
+        if self._frames is None:
+            with self._lock:
+                if self._frames is None:
+                    start = time.perf_counter()
+                    fingerprint = dataset_fingerprint(self.csv_path, self.data_path)
+                    frames = load_cached_data(
+                        self.csv_path, self.data_path, fingerprint=fingerprint
+                    )
+                    self.build_times["frames"] = time.perf_counter() - start
+                    self._fingerprint = fingerprint
+                    self._frames = frames
+        return self._frames
+
+    def _ensure_cube(self):
+        if self._cube is None:
+            frames = self._ensure_frames()
+            with self._lock:
+                if self._cube is None:
+                    start = time.perf_counter()
+                    cube = DataCube.from_frames(*frames)
+                    self.build_times["cube"] = time.perf_counter() - start
+                    self._cube = cube
+        return self._cube
+
+    def _ensure_county_stats(self):
+        if self._county_stats is None:
+            cube = self._ensure_cube()
+            with self._lock:
+                if self._county_stats is None:
+                    start = time.perf_counter()
+                    county_stats = CountyStats.from_cube(cube)
+                    self.build_times["county_stats"] = time.perf_counter() - start
+                    self._county_stats = county_stats
+        return self._county_stats
+
+    def _ensure_gender_ratios(self):
+        if self._gender_ratios is None:
+            cube = self._ensure_cube()
+            with self._lock:
+                if self._gender_ratios is None:
+                    start = time.perf_counter()
+                    gender_ratios = GenderRatios.from_cube(cube)
+                    self.build_times["gender_ratios"] = time.perf_counter() - start
+                    self._gender_ratios = gender_ratios
+        return self._gender_ratios
+
+    def _ensure_geojson(self):
+        if not self._geojson_loaded:
+            with self._lock:
+                if not self._geojson_loaded:
+                    start = time.perf_counter()
+                    self._geojson = load_geojson(self.geojson_path)
+                    self.build_times["geojson"] = time.perf_counter() - start
+                    self._geojson_loaded = True
+        return self._geojson
+
+    def _ensure_geojson_lod(self, breakpoint):
+        if breakpoint not in self._geojson_lods:
+            with self._lock:
+                if breakpoint not in self._geojson_lods:
+                    start = time.perf_counter()
+                    geojson = load_geojson_lod(breakpoint)
+                    elapsed = time.perf_counter() - start
+                    self.build_times["geojson_lod"] = (
+                        self.build_times.get("geojson_lod", 0.0) + elapsed
+                    )
+                    self._geojson_lods[breakpoint] = geojson
+        return self._geojson_lods[breakpoint]
+
+    # ------------------------------------------------------------------------
+    # Read-only handles
+    # ------------------------------------------------------------------------
+
+    @property
+    def fingerprint(self) -> str:
+        """Content hash of the inputs the loaded frames were built from."""
+        self._ensure_frames()
+        return self._fingerprint
+
+    @property
+    def national(self) -> pd.DataFrame:
+        """Grouped national data (one row per year/sex/age/medication)."""
+        return self._ensure_frames()[0].copy(deep=False)
+
+    @property
+    def regional(self) -> pd.DataFrame:
+        """Grouped regional data (one row per county/year/sex/age/medication)."""
+        return self._ensure_frames()[1].copy(deep=False)
+
+    @property
+    def cube(self) -> DataCube:
+        """Dense cube over national (county "Riket") and regional data."""
+        return self._ensure_cube()
+
+    @property
+    def county_stats(self) -> CountyStats:
+        """Per-slice county statistics (map statistics, trend, colour scale)."""
+        return self._ensure_county_stats()
+
+    @property
+    def gender_ratios(self) -> GenderRatios:
+        """Boys/Girls ratios per medication, county, age group and year."""
+        return self._ensure_gender_ratios()
+
+    @property
+    def geojson(self) -> Optional[dict]:
+        """County GeoJSON, or None if the file is missing."""
+        return self._ensure_geojson()
+
+    def geojson_for(self, breakpoint) -> Optional[dict]:
+        """
+        County GeoJSON simplified for a layout breakpoint, or the full
+        GeoJSON if that level of detail has not been generated.
+        """
+        if breakpoint in GEOJSON_LOD:
+            geojson = self._ensure_geojson_lod(breakpoint)
+            if geojson is not None:
+                return geojson
+        return self._ensure_geojson()
+
+    def geojson_level(self, breakpoint) -> str:
+        """
+        Level of detail geojson_for returns for a breakpoint: the breakpoint
+        itself, or "full" for the full GeoJSON.
+        """
+        if breakpoint in GEOJSON_LOD:
+            if self._ensure_geojson_lod(breakpoint) is not None:
+                return breakpoint
+        return "full"
+
+    # ------------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------------
+
+    def load_all(self) -> "DataRegistry":
+        """Build every dataset now instead of on first access."""
+        self._ensure_frames()
+        self._ensure_cube()
+        self._ensure_county_stats()
+        self._ensure_gender_ratios()
+        self._ensure_geojson()
+        for breakpoint in GEOJSON_LOD:
+            self._ensure_geojson_lod(breakpoint)
+        return self
+
+    def add_rebuild_listener(self, listener: Callable[[], None]) -> None:
+        """Call listener (no arguments) every time the datasets are rebuilt."""
+        with self._lock:
+            self._rebuild_listeners.append(listener)
+
+    def rebuild(self) -> "DataRegistry":
+        """Drop every loaded dataset, build them again and notify listeners."""
+        with self._lock:
+            self._fingerprint = None
+            self._frames = None
+            self._cube = None
+            self._county_stats = None
+            self._gender_ratios = None
+            self._geojson = None
+            self._geojson_loaded = False
+            self._geojson_lods = {}
+            self.build_times = {}
+            self.load_all()
+            listeners = list(self._rebuild_listeners)
+
+        for listener in listeners:
+            listener()
+        return self
+
+    def report(self) -> str:
+        """Human-readable summary of how long each dataset took to build."""
+        if not self.build_times:
+            return "Data registry: nothing loaded yet"
+        parts = [
+            f"{name} {secs * 1000:.0f} ms" for name, secs in self.build_times.items()
+        ]
+        return "Data registry: " + ", ".join(parts)
+
+
+_registry: Optional[DataRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> DataRegistry:
+    """Return the process-wide DataRegistry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = DataRegistry()
+    return _registry
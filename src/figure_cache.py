@@ -0,0 +1,186 @@
+# ============================================================================
+# FIGURE CACHE MODULE
+# ============================================================================
+# This file contains a size-bounded LRU cache of serialized callback outputs.
+# The main callbacks take their inputs from a small discrete space, so the
+# figures they build are memoised by dataset version, callback name and
+# normalised inputs, optionally backed by a store shared between workers.
+# ============================================================================
+
+"""Size-bounded LRU cache of serialized callback outputs."""
+
+import functools
+import glob
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from plotly.io.json import to_json_plotly
+
+from config import BASE_DIR, FIGURE_CACHE_MAX_BYTES, GEOJSON_LOD_DIR, GEOJSON_PATH
+from src.metrics import phase
+
+
+def code_version() -> str:
+    """
+    Hash of the source that builds the figures (config.py, src/*.py and the
+    map geometry), so stored figures are not served after a deploy that
+    changes them.
+    """
+    digest = hashlib.sha256()
+    paths = [os.path.join(BASE_DIR, "config.py"), GEOJSON_PATH]
+    paths += sorted(glob.glob(os.path.join(BASE_DIR, "src", "*.py")))
+    paths += sorted(glob.glob(os.path.join(GEOJSON_LOD_DIR, "*.geojson")))
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def encode_output(output) -> bytes:
+    """Serialize a callback output (figure, components, or a tuple of them)."""
+    return to_json_plotly(output).encode("utf-8")
+
+
+def decode_output(payload: bytes):
+    """Inverse of encode_output; tuples of outputs come back as lists."""
+    return json.loads(payload)
+
+
+def store_key(key: Tuple) -> str:
+    """Text form of a cache key, for stores shared between processes."""
+    return json.dumps(key, ensure_ascii=False, separators=(",", ":"))
+
+
+class FigureCache:
+    """
+    Least-recently-used cache of callback outputs, stored as JSON bytes.
+
+    Outputs are serialized once when stored and decoded on every hit, so
+    callers always get fresh objects and the byte budget bounds the memory
+    actually used. Outputs larger than the whole budget are not stored.
+
+    With a store (e.g. SQLiteFigureStore) the memory cache is a first level
+    in front of it: misses are looked up in the store and new outputs are
+    written to both.
+    """
+
+    def __init__(self, max_bytes: int = FIGURE_CACHE_MAX_BYTES, store=None):
+        self.max_bytes = max_bytes
+        self.store = store
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version_source: Optional[Callable[[], str]] = None
+
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Serialized output stored under key, or None (counts a hit or miss)."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: Hashable, payload: bytes) -> None:
+        """Store a serialized output, evicting least recently used entries."""
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= len(previous)
+
+            self._entries[key] = payload
+            self.size_bytes += len(payload)
+
+            while self.size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= len(evicted)
+                self.evictions += 1
+
+    def attach(self, registry) -> None:
+        """
+        Key entries by the registry's dataset fingerprint (and the code
+        version) and drop the in-memory entries whenever the registry is
+        rebuilt.
+        """
+        code = code_version()[:16]
+        self._version_source = lambda: f"{registry.fingerprint[:16]}-{code}"
+        registry.add_rebuild_listener(self.clear)
+
+    def version(self) -> str:
+        """Dataset version the current entries belong to ("" if not attached)."""
+        return self._version_source() if self._version_source else ""
+
+    def clear(self) -> None:
+        """Drop every in-memory entry (counters and the store are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count, size and hit/miss/eviction counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def memoize(self, name: str, key_func: Callable[..., tuple]):
+        """
+        Decorator caching a callback's output.
+
+        Parameters:
+        name: Callback name, part of every key
+        key_func: Maps the callback arguments to a hashable tuple; inputs
+            that don't change the output should be normalised or left out
+
+        Returns:
+        Callable: Decorator for the callback function
+        """
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                key = (self.version(), name) + tuple(key_func(*args))
+                payload = self.get(key)
+                if payload is None and self.store is not None:
+                    payload = self.store.get(store_key(key))
+                    if payload is not None:
+                        self.put(key, payload)
+                if payload is not None:
+                    with phase("serialize"):
+                        return decode_output(payload)
+
+                output = func(*args)
+                with phase("serialize"):
+                    payload = encode_output(output)
+                self.put(key, payload)
+                if self.store is not None:
+                    self.store.put(store_key(key), payload)
+                return output
+
+            return wrapper
+
+        return decorator
@@ -0,0 +1,92 @@
+# ============================================================================
+# FIGURE DIFF MODULE
+# ============================================================================
+# This file contains figure_patch, which turns the difference between two
+# serialized figures into a Dash Patch: traces that disappeared are
+# deleted, new traces inserted, and only the changed leaves of the kept
+# traces and the layout assigned. Applied to the old figure in the browser,
+# the patch gives exactly the new figure.
+# ============================================================================
+
+"""Partial (Patch) updates between two serialized figures."""
+
+import json
+from typing import Callable, Hashable
+
+from dash import Patch
+from plotly.io.json import to_json_plotly
+
+
+def figure_json(figure) -> dict:
+    """Plain JSON dict of a figure (go.Figure or already serialized dict)."""
+    return json.loads(to_json_plotly(figure))
+
+
+def _is_typed_array(value) -> bool:
+    # Plotly serializes numeric arrays as {"dtype": ..., "bdata": ...}
+    return isinstance(value, dict) and "bdata" in value
+
+
+def _diff(patch, old: dict, new: dict) -> None:
+    """Add the operations turning dict old into dict new to patch."""
+    for key in old.keys() - new.keys():
+        del patch[key]
+    for key, value in new.items():
+        if key in old and old[key] == value:
+            continue
+        if (
+            isinstance(old.get(key), dict)
+            and isinstance(value, dict)
+            and not _is_typed_array(value)
+        ):
+            _diff(patch[key], old[key], value)
+        else:
+            patch[key] = value
+
+
+def figure_patch(old, new, trace_key: Callable[[dict], Hashable]) -> Patch:
+    """
+    Patch that turns figure old into figure new.
+
+    Traces are matched by trace_key, so a trace that is in both figures is
+    only updated where it changed, even if it moved to another index. When
+    the kept traces are in a different order (or keys repeat), the whole
+    trace list is replaced instead.
+
+    Parameters:
+    old: The figure the browser holds (go.Figure or serialized dict)
+    new: The figure the browser should end up with
+    trace_key: Identifies a serialized trace across the two figures
+
+    Returns:
+    Patch: Operations on the figure's data and layout
+    """
+    old, new = figure_json(old), figure_json(new)
+    old_traces, new_traces = old.get("data", []), new.get("data", [])
+    old_keys = [trace_key(trace) for trace in old_traces]
+    new_keys = [trace_key(trace) for trace in new_traces]
+    kept = set(old_keys) & set(new_keys)
+
+    patch = Patch()
+    same_order = [key for key in old_keys if key in kept] == [
+        key for key in new_keys if key in kept
+    ]
+    if not same_order or len(set(old_keys)) < len(old_keys):
+        patch["data"] = new_traces
+    else:
+        # Delete from the back so the remaining indices stay valid, then
+        # insert in ascending order so every trace lands at its new index
+        for index in reversed(range(len(old_keys))):
+            if old_keys[index] not in kept:
+                del patch["data"][index]
+        old_index = {key: index for index, key in enumerate(old_keys)}
+        for index, key in enumerate(new_keys):
+            if key not in kept:
+                patch["data"].insert(index, new_traces[index])
+        for index, key in enumerate(new_keys):
+            if key in kept:
+                old_trace = old_traces[old_index[key]]
+                _diff(patch["data"][index], old_trace, new_traces[index])
+
+    _diff(patch["layout"], old.get("layout", {}), new.get("layout", {}))
+    return patch
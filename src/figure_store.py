@@ -0,0 +1,241 @@
+# ============================================================================
+# FIGURE STORE MODULE
+# ============================================================================
+# This file contains the on-disk (SQLite) figure cache shared by every
+# gunicorn worker on the host. It sits behind the in-memory FigureCache, so
+# a figure built by one worker is served by all of them and survives
+# restarts and deploys of unchanged data.
+# ============================================================================
+
+"""SQLite-backed figure cache shared between worker processes."""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from config import FIGURE_STORE_MAX_BYTES, FIGURE_STORE_PATH
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS figures (
+        key TEXT PRIMARY KEY,
+        payload BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        accessed REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS figures_accessed ON figures (accessed)",
+    # Total size of the stored figures, kept up to date by the triggers so
+    # put() only runs the eviction query when the store is over budget
+    """
+    CREATE TABLE IF NOT EXISTS usage (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        total INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS figures_insert AFTER INSERT ON figures
+    BEGIN UPDATE usage SET total = total + NEW.size; END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS figures_update AFTER UPDATE OF size ON figures
+    BEGIN UPDATE usage SET total = total - OLD.size + NEW.size; END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS figures_delete AFTER DELETE ON figures
+    BEGIN UPDATE usage SET total = total - OLD.size; END
+    """,
+    # After the triggers, so a file from before them starts with its total
+    """
+    INSERT OR IGNORE INTO usage (id, total)
+    SELECT 0, COALESCE(SUM(size), 0) FROM figures
+    """,
+)
+
+# A hit refreshes an entry's access time only if it is older than this, so
+# most reads don't write
+ACCESS_INTERVAL = 60.0
+
+# Delete the least recently used rows until the rest fit in the budget
+EVICT_SQL = """
+    DELETE FROM figures WHERE key IN (
+        SELECT key FROM (
+            SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS running
+            FROM figures
+        )
+        WHERE running > ?
+    )
+"""
+
+
+class SQLiteFigureStore:
+    """
+    Serialized figures in a SQLite file, evicted least recently used first.
+
+    The database runs in WAL mode, so readers don't block each other or the
+    single writer, and a busy timeout makes concurrent writers wait instead
+    of failing. A hit only writes (to refresh the access time the eviction
+    order uses) once every ACCESS_INTERVAL seconds per entry. Each thread
+    (and each forked worker) gets its own connection. Database errors are
+    reported and treated as cache misses, so a broken cache file never
+    breaks a callback; a hit whose access time can't be written is still
+    served.
+    """
+
+    def __init__(
+        self,
+        path: str = FIGURE_STORE_PATH,
+        max_bytes: int = FIGURE_STORE_MAX_BYTES,
+        timeout: float = 5.0,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+
+        # Counters for this process only
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Autocommit mode; put() opens its own write transaction
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        if not self._has_schema(conn):
+            # One transaction, so no write falls between the triggers and
+            # the initial total
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _has_schema(conn: sqlite3.Connection) -> bool:
+        # The last object SCHEMA creates; checked so that opening a
+        # connection doesn't take the write lock
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' "
+            "AND name = 'figures_delete'"
+        ).fetchone()
+        return row is not None
+
+    def _count(self, counter: str, n: int = 1) -> None:
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    def _report(self, action: str, error: sqlite3.Error) -> None:
+        self._count("errors")
+        print(f"Figure store {self.path}: {action} failed ({error})")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Serialized output stored under key, or None."""
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT payload, accessed FROM figures WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._report("read", e)
+            return None
+        if row is None:
+            self._count("misses")
+            return None
+
+        payload, accessed = bytes(row[0]), row[1]
+        now = time.time()
+        if now - accessed > ACCESS_INTERVAL:
+            try:
+                conn.execute(
+                    "UPDATE figures SET accessed = ? WHERE key = ?", (now, key)
+                )
+            except sqlite3.Error as e:
+                # Still a hit: only the eviction order is a little off
+                self._report("access time update", e)
+
+        self._count("hits")
+        return payload
+
+    def put(self, key: str, payload: bytes) -> None:
+        """Store a serialized output and evict entries past the byte budget."""
+        if len(payload) > self.max_bytes:
+            return
+
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # An upsert, not INSERT OR REPLACE: the rows REPLACE deletes
+                # don't fire the delete trigger
+                conn.execute(
+                    "INSERT INTO figures (key, payload, size, accessed) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "payload = excluded.payload, size = excluded.size, "
+                    "accessed = excluded.accessed",
+                    (key, sqlite3.Binary(payload), len(payload), time.time()),
+                )
+                (total,) = conn.execute("SELECT total FROM usage").fetchone()
+                evicted = 0
+                if total > self.max_bytes:
+                    evicted = conn.execute(EVICT_SQL, (self.max_bytes,)).rowcount
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self._report("write", e)
+            return
+
+        if evicted > 0:
+            self._count("evictions", evicted)
+
+    def clear(self) -> None:
+        """Delete every stored figure (for every worker)."""
+        try:
+            self._connect().execute("DELETE FROM figures")
+        except sqlite3.Error as e:
+            self._report("clear", e)
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count and size of the shared file, plus this process's counters."""
+        try:
+            entries, size = (
+                self._connect()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM figures")
+                .fetchone()
+            )
+        except sqlite3.Error as e:
+            self._report("stats", e)
+            entries, size = 0, 0
+
+        return {
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
@@ -0,0 +1,79 @@
+# ============================================================================
+# GENDER RATIO MODULE
+# ============================================================================
+# This file contains the Boys/Girls ratio table: the ratio of the boys' to
+# the girls' patients per 1000 for every medication, county (national
+# included), age group and year, computed once from the data cube with one
+# array division. The sex ratio chart reads its lines straight from here,
+# for the whole country or a single county.
+# ============================================================================
+
+"""Precomputed Boys/Girls prescription ratios."""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.data_cube import DataCube
+
+RATIO_COLUMN = "Boys_Girls_Ratio"
+
+
+def boys_girls_ratio(boys, girls) -> np.ndarray:
+    """
+    Elementwise boys / girls.
+
+    The ratio is undefined (NaN) where the girls' value is 0 or missing, so
+    those points are gaps in the chart rather than spikes.
+    """
+    boys = np.asarray(boys, dtype=float)
+    girls = np.asarray(girls, dtype=float)
+    return np.divide(boys, girls, out=np.full(boys.shape, np.nan), where=girls > 0)
+
+
+class GenderRatios:
+    """
+    Boys/Girls ratios with the cube's medication, county, age group and year
+    axes (in that order).
+    """
+
+    def __init__(self, ratios: np.ndarray, labels: Dict[str, List]):
+        self.ratios = ratios
+        self.labels = labels
+        self._index = {
+            dim: {label: i for i, label in enumerate(values)}
+            for dim, values in labels.items()
+        }
+
+    @classmethod
+    def from_cube(cls, cube: DataCube) -> "GenderRatios":
+        """Divide the cube's Boys slice by its Girls slice."""
+        ratios = boys_girls_ratio(cube.select(sex="Boys"), cube.select(sex="Girls"))
+        labels = {
+            dim: cube.labels[dim]
+            for dim in ("medication_category", "county", "age_group", "year")
+        }
+        return cls(ratios, labels)
+
+    def select(self, medication_category, county) -> np.ndarray:
+        """Ratios of one medication and county, shape (age group, year)."""
+        return self.ratios[
+            self._index["medication_category"][medication_category],
+            self._index["county"][county],
+        ]
+
+    def to_frame(self, medication_category, county) -> pd.DataFrame:
+        """
+        Ratios of one medication and county in long form (year, age_group,
+        Boys_Girls_Ratio), one row per age group and year, ordered by year.
+        """
+        ratios = self.select(medication_category, county)
+        ages, years = self.labels["age_group"], self.labels["year"]
+        return pd.DataFrame(
+            {
+                "year": np.repeat(years, len(ages)),
+                "age_group": np.tile(ages, len(years)),
+                RATIO_COLUMN: ratios.T.ravel(),
+            }
+        )
@@ -0,0 +1,371 @@
+# ============================================================================
+# MAP GEOMETRY MODULE
+# ============================================================================
+# This file contains the offline pipeline that turns the full-precision
+# county GeoJSON into smaller level-of-detail (LOD) files, one per layout
+# breakpoint. Borders shared by two counties are cut into arcs and each arc
+# is simplified once (Douglas-Peucker), so neighbouring counties keep
+# exactly the same border instead of each getting its own approximation.
+# Coordinates are then quantised to a fixed number of decimals and small
+# islands dropped.
+#
+# Run from the repository root:
+#     python -m src.geometry
+# ============================================================================
+
+"""Build the simplified level-of-detail county GeoJSON files."""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import GEOJSON_LOD, GEOJSON_LOD_DIR, GEOJSON_PATH
+
+# Longitude degrees are shorter than latitude degrees this far north;
+# distances and areas are measured with longitudes scaled by the cosine of
+# the map's mid latitude, so tolerances are in degrees of latitude
+MID_LATITUDE = 62.0
+LON_SCALE = math.cos(math.radians(MID_LATITUDE))
+
+Point = Tuple[float, float]
+
+
+def lod_path(breakpoint: str, lod_dir: str = GEOJSON_LOD_DIR) -> str:
+    """Path of the simplified GeoJSON for a layout breakpoint."""
+    stem = os.path.splitext(os.path.basename(GEOJSON_PATH))[0]
+    return os.path.join(lod_dir, f"{stem}_{breakpoint}.geojson")
+
+
+def _polygons(geometry: dict) -> list:
+    """Polygons (lists of rings) of a Polygon or MultiPolygon geometry."""
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    return geometry["coordinates"]
+
+
+def _ring_area(ring: Sequence[Point]) -> float:
+    """Area of a closed ring (shoelace formula) in square degrees of latitude."""
+    xy = np.asarray(ring, dtype=float)
+    x, y = xy[:, 0] * LON_SCALE, xy[:, 1]
+    return abs(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])) / 2
+
+
+# ============================================================================
+# SIMPLIFICATION
+# ============================================================================
+
+
+def douglas_peucker(points: Sequence[Point], tolerance: float) -> List[Point]:
+    """
+    Simplify an open line, keeping both end points.
+
+    Parameters:
+    points: (lon, lat) vertices of the line
+    tolerance: Largest allowed deviation, in degrees of latitude
+
+    Returns:
+    list: The vertices that were kept, in order
+    """
+    if len(points) < 3:
+        return list(points)
+
+    xy = np.asarray(points, dtype=float)
+    xy[:, 0] *= LON_SCALE
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        # Distance of the inner points to the segment first-last
+        start, end = xy[first], xy[last]
+        inner = xy[first + 1 : last]
+        segment = end - start
+        length = float(np.dot(segment, segment))
+        if length == 0.0:
+            distance = np.hypot(*(inner - start).T)
+        else:
+            t = np.clip((inner - start) @ segment / length, 0.0, 1.0)
+            distance = np.hypot(*(inner - start - t[:, None] * segment).T)
+
+        farthest = int(np.argmax(distance))
+        if distance[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return [tuple(point) for point, kept in zip(points, keep) if kept]
+
+
+def _vertex_owners(features: Sequence[dict]) -> Dict[Point, frozenset]:
+    """Vertex -> indices of the features whose rings contain it."""
+    owners = defaultdict(set)
+    for index, feature in enumerate(features):
+        for polygon in _polygons(feature["geometry"]):
+            for ring in polygon:
+                for point in ring:
+                    owners[tuple(point)].add(index)
+    return {point: frozenset(indices) for point, indices in owners.items()}
+
+
+def _split_ring(ring: List[Point], owners: Dict[Point, frozenset]) -> List[list]:
+    """
+    Cut a closed ring into arcs at its junctions.
+
+    A junction is a vertex where the set of counties sharing the border
+    changes, so every arc is either coastline or one shared border. A ring
+    without junctions is cut at its first vertex and the vertex farthest
+    from it, so it cannot collapse to a line.
+    """
+    points = ring[:-1]
+    n = len(points)
+    junctions = [
+        i
+        for i in range(n)
+        if len(owners[points[i]]) > 2
+        or owners[points[i]] != owners[points[i - 1]]
+        or owners[points[i]] != owners[points[(i + 1) % n]]
+    ]
+    if len(junctions) < 2:
+        start = junctions[0] if junctions else 0
+        xy = np.asarray(points, dtype=float)
+        xy[:, 0] *= LON_SCALE
+        farthest = int(np.argmax(np.hypot(*(xy - xy[start]).T)))
+        junctions = sorted({start, farthest})
+
+    arcs = []
+    for k, start in enumerate(junctions):
+        end = junctions[(k + 1) % len(junctions)]
+        if end > start:
+            arcs.append(points[start : end + 1])
+        else:  # wraps around the ring's first vertex
+            arcs.append(points[start:] + points[: end + 1])
+    return arcs
+
+
+def _quantise(points: Sequence[Point], decimals: int) -> List[list]:
+    """Round coordinates and drop vertices that become duplicates."""
+    rounded = []
+    for lon, lat in points:
+        point = [round(lon, decimals), round(lat, decimals)]
+        if not rounded or point != rounded[-1]:
+            rounded.append(point)
+    return rounded
+
+
+def simplify_geojson(
+    geojson: dict,
+    tolerance: float,
+    decimals: int,
+    min_area: float = 0.0,
+) -> dict:
+    """
+    Topology-preserving simplification of a polygon FeatureCollection.
+
+    Parameters:
+    geojson: FeatureCollection of Polygon/MultiPolygon features
+    tolerance: Douglas-Peucker tolerance, in degrees of latitude
+    decimals: Decimals kept in the output coordinates
+    min_area: Islands (polygons sharing no border) smaller than this, in
+        square degrees of latitude, are dropped; a county always keeps its
+        largest polygon
+
+    Returns:
+    dict: New FeatureCollection with the same features and properties
+    """
+    features = geojson["features"]
+    owners = _vertex_owners(features)
+    simplified_arcs: Dict[tuple, List[Point]] = {}
+
+    def _simplify_arc(arc):
+        # A shared border is met once in each direction; simplify it in one
+        # canonical direction so both counties get identical vertices
+        key = tuple(arc)
+        reverse = key[::-1] < key
+        if reverse:
+            key = key[::-1]
+        if key not in simplified_arcs:
+            simplified_arcs[key] = douglas_peucker(key, tolerance)
+        result = simplified_arcs[key]
+        return result[::-1] if reverse else result
+
+    output = []
+    for feature in features:
+        polygons = []
+        for polygon in _polygons(feature["geometry"]):
+            rings = []
+            for ring in polygon:
+                ring = [tuple(point) for point in ring]
+                points = []
+                for arc in _split_ring(ring, owners):
+                    points.extend(_simplify_arc(arc)[:-1])
+                points = _quantise(points + points[:1], decimals)
+                if len(points) >= 4:
+                    rings.append(points)
+            if not rings:
+                continue
+
+            shared = any(len(owners[tuple(point)]) > 1 for point in polygon[0])
+            polygons.append((shared, _ring_area(rings[0]), rings))
+
+        # Drop small islands, but never a county's largest polygon
+        largest = max(area for _, area, _ in polygons) if polygons else 0.0
+        kept = [
+            rings
+            for shared, area, rings in polygons
+            if shared or area >= min_area or area == largest
+        ]
+
+        if len(kept) == 1:
+            geometry = {"type": "Polygon", "coordinates": kept[0]}
+        else:
+            geometry = {"type": "MultiPolygon", "coordinates": kept}
+        output.append(
+            {
+                "type": "Feature",
+                "properties": feature["properties"],
+                "geometry": geometry,
+            }
+        )
+
+    return {"type": "FeatureCollection", "features": output}
+
+
+# ============================================================================
+# LEVEL-OF-DETAIL FILES AND REPORT
+# ============================================================================
+
+
+def _encode(geojson: dict) -> bytes:
+    return json.dumps(geojson, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def geometry_stats(geojson: dict) -> Dict[str, int]:
+    """Polygon, ring and vertex counts plus raw and gzipped sizes."""
+    polygons = [
+        polygon
+        for feature in geojson["features"]
+        for polygon in _polygons(feature["geometry"])
+    ]
+    payload = _encode(geojson)
+    return {
+        "polygons": len(polygons),
+        "vertices": sum(len(ring) for polygon in polygons for ring in polygon),
+        "bytes": len(payload),
+        "gzip_bytes": len(gzip.compress(payload, mtime=0)),
+    }
+
+
+def map_build_seconds(geojson: dict, repeat: int = 5) -> float:
+    """
+    Median time to build and serialize a county map with this geometry.
+
+    Uses the same px.choropleth call as the dashboard, with one value per
+    county.
+    """
+    import pandas as pd
+    import plotly.express as px
+
+    names = [feature["properties"]["name"] for feature in geojson["features"]]
+    df = pd.DataFrame({"county_geo": names, "value": range(len(names))})
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = px.choropleth(
+            df,
+            geojson=geojson,
+            locations="county_geo",
+            featureidkey="properties.name",
+            color="value",
+        )
+        fig.update_geos(fitbounds="locations", visible=False)
+        fig.to_json()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def build_lod_files(
+    source: str = GEOJSON_PATH,
+    lod_dir: str = GEOJSON_LOD_DIR,
+    levels: Optional[dict] = None,
+) -> List[dict]:
+    """
+    Write one simplified GeoJSON per breakpoint and report on each.
+
+    Parameters:
+    source: Full-precision county GeoJSON
+    lod_dir: Directory the LOD files are written to
+    levels: Breakpoint -> simplify_geojson keyword arguments (default:
+        GEOJSON_LOD from config)
+
+    Returns:
+    list: One row per file with its sizes, vertex count and map build time
+    """
+    levels = levels or GEOJSON_LOD
+    with open(source, "r", encoding="utf-8") as f:
+        full = json.load(f)
+
+    os.makedirs(lod_dir, exist_ok=True)
+    rows = [
+        {"level": "full", **geometry_stats(full), "seconds": map_build_seconds(full)}
+    ]
+    for breakpoint, settings in levels.items():
+        start = time.perf_counter()
+        simplified = simplify_geojson(full, **settings)
+        elapsed = time.perf_counter() - start
+
+        path = lod_path(breakpoint, lod_dir)
+        with open(path, "wb") as f:
+            f.write(_encode(simplified))
+        print(f"Wrote {path} ({elapsed * 1000:.0f} ms to simplify)")
+
+        rows.append(
+            {
+                "level": breakpoint,
+                **geometry_stats(simplified),
+                "seconds": map_build_seconds(simplified),
+            }
+        )
+    return rows
+
+
+def format_report(rows: List[dict]) -> str:
+    """Table of the build_lod_files results."""
+    lines = [
+        f"{'level':<8} {'polygons':>8} {'vertices':>8} {'size':>9} "
+        f"{'gzip':>9} {'map build':>10}"
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['level']:<8} {row['polygons']:>8} {row['vertices']:>8} "
+            f"{row['bytes'] / 1024:>7.1f}KB {row['gzip_bytes'] / 1024:>7.1f}KB "
+            f"{row['seconds'] * 1000:>8.1f}ms"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--source", default=GEOJSON_PATH)
+    parser.add_argument("--out", default=GEOJSON_LOD_DIR)
+    args = parser.parse_args()
+
+    rows = build_lod_files(args.source, args.out)
+    print(format_report(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -204,6 +204,23 @@ county_options = [
 ] + [{"label": short_name, "value": short_name} for short_name in COUNTY_MAP.values()]
 
 
+# Row order of the all-counties heatmap (see visualizations.county_order)
+heatmap_order_options = [
+    {"label": "County code", "value": "code"},
+    {"label": "Latest value", "value": "latest"},
+    {"label": "Similar trajectories", "value": "similarity"},
+]
+
+
+# Initial figure of every graph. The figure callbacks replace it once the
+# first breakpoint is known; a relayout that comes before them patches it
+# (a Patch needs a figure)
+empty_figure = {"data": [], "layout": {}}
+
+# Breakpoint names reported by WindowBreakpoints, narrowest first
+breakpoint_names = ["mobile", "tablet", "desktop", "large"]
+
+
 # Define the layout
 def create_layout():
     layout = html.Div(
@@ -212,8 +229,14 @@ def create_layout():
             WindowBreakpoints(
                 id="breakpoint",
                 widthBreakpointThresholdsPx=[768, 1024, 1440],
-                widthBreakpointNames=["mobile", "tablet", "desktop", "large"],
+                widthBreakpointNames=breakpoint_names,
             ),
+            # The breakpoint once resizing has settled (see assets/breakpoint.js)
+            dcc.Store(id="layout-breakpoint"),
+            dcc.Store(id="relayout-breakpoint"),
+            # The first breakpoint after page load; the figures are built
+            # once it is known
+            dcc.Store(id="initial-breakpoint"),
             # Hero Section
             html.Div(
                 [
@@ -541,6 +564,7 @@ def create_layout():
                                         [
                                             dcc.Graph(
                                                 id="line-animation",
+                                                figure=empty_figure,
                                                 config={"responsive": True},
                                                 style={
                                                     "width": "100%",
@@ -550,6 +574,12 @@ def create_layout():
                                                     "boxShadow": "0 4px 12px rgba(0,0,0,0.3)",
                                                 },
                                             ),
+                                            # Full line chart series from the server;
+                                            # animation frames are built client-side
+                                            dcc.Store(id="line-animation-source"),
+                                            # Arguments of the figure in the source
+                                            # store; checklist changes are patched
+                                            dcc.Store(id="line-selection"),
                                             # Button to show bar chart
                                             html.Div(
                                                 html.Button(
@@ -580,6 +610,7 @@ def create_layout():
                                             html.Div(
                                                 dcc.Graph(
                                                     id="bar-chart",
+                                                    figure=empty_figure,
                                                     style={
                                                         "display": "none",
                                                         "width": "100%",
@@ -663,6 +694,28 @@ def create_layout():
                                             "color": TEXT_COLOR,
                                         },
                                     ),
+                                    html.Label(
+                                        "County:",
+                                        style={
+                                            "fontSize": "16px",
+                                            "fontWeight": "500",
+                                            "marginTop": "16px",
+                                            "marginBottom": "8px",
+                                            "display": "block",
+                                            "color": TEXT_COLOR,
+                                        },
+                                    ),
+                                    dcc.Dropdown(
+                                        id="ratio-county-dropdown",
+                                        options=county_options,
+                                        value="All counties",
+                                        style={
+                                            "maxWidth": "300px",
+                                            "margin": "0 auto",
+                                            "backgroundColor": BG_COLOR,
+                                            "color": TEXT_COLOR,
+                                        },
+                                    ),
                                 ],
                                 style={
                                     "textAlign": "center",
@@ -675,6 +728,7 @@ def create_layout():
                             # Sex ratio chart
                             dcc.Graph(
                                 id="sex-ratio-plot",
+                                figure=empty_figure,
                                 style={
                                     "height": "100%",
                                     "width": "100%",
@@ -981,6 +1035,7 @@ def create_layout():
                                             # Map
                                             dcc.Graph(
                                                 id="choropleth-map",
+                                                figure=empty_figure,
                                                 config={"responsive": True},
                                                 style={
                                                     "backgroundColor": BG_COLOR,
@@ -1024,6 +1079,11 @@ def create_layout():
                 id="choropleth-animation-state",
                 data={"playing": False, "current_year": 2006},
             ),
+            # Every year of the map for the selected sex/age (clientside animation)
+            dcc.Store(id="choropleth-year-values"),
+            # Level of detail of the county geometry the map has (see
+            # DataRegistry.geojson_level)
+            dcc.Store(id="choropleth-geojson-level"),
             # County Heatmap Section
             html.Div(
                 [
@@ -1192,6 +1252,35 @@ def create_layout():
                                                             "accent-color": "#1B9E77",
                                                         },
                                                     ),
+                                                ],
+                                                style={"marginBottom": "20px"},
+                                            ),
+                                            # County order of the heatmap rows
+                                            html.Div(
+                                                [
+                                                    html.Label(
+                                                        "County Order:",
+                                                        style={
+                                                            "fontSize": "16px",
+                                                            "fontWeight": "500",
+                                                            "marginBottom": "8px",
+                                                            "display": "block",
+                                                            "color": TEXT_COLOR,
+                                                        },
+                                                    ),
+                                                    dcc.RadioItems(
+                                                        id="heatmap-order-radio",
+                                                        options=heatmap_order_options,
+                                                        value="code",
+                                                        inline=False,
+                                                        inputStyle={
+                                                            "margin-right": "8px"
+                                                        },
+                                                        style={
+                                                            "color": TEXT_COLOR,
+                                                            "accent-color": "#1B9E77",
+                                                        },
+                                                    ),
                                                 ]
                                             ),
                                         ],
@@ -1211,6 +1300,7 @@ def create_layout():
                                         [
                                             dcc.Graph(
                                                 id="county-heatmap",
+                                                figure=empty_figure,
                                                 config={"responsive": True},
                                                 style={
                                                     "backgroundColor": BG_COLOR,
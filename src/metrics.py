@@ -0,0 +1,269 @@
+# ============================================================================
+# CALLBACK METRICS MODULE
+# ============================================================================
+# This file contains the per-callback instrumentation: wall time split into
+# data selection, figure construction and JSON serialization, plus response
+# bytes, kept as rolling summaries (p50/p95/p99 over the last calls) and
+# served in the Prometheus text format on /metrics, together with the
+# counters of the figure caches.
+#
+# A call costs a few perf_counter reads and deque appends; quantiles are
+# only computed when /metrics is scraped.
+# ============================================================================
+
+"""Rolling latency and payload metrics of the Dash callbacks."""
+
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+from flask import Response
+
+from config import CALLBACK_METRICS_WINDOW
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Phases of a callback's wall time; "select" is what is left of the
+# callback after the figure and serialize phases timed inside it
+PHASES = ("select", "figure", "serialize", "total")
+
+# Cache stats (see FigureCache.stats) that only ever go up; the rest are
+# exported as gauges
+CACHE_COUNTERS = ("hits", "misses", "evictions", "errors")
+
+# The callback of the request being handled by this thread
+_local = threading.local()
+
+
+class _Observation:
+    """Timings of one callback call, completed when its response is sent."""
+
+    __slots__ = ("name", "end", "phases")
+
+    def __init__(self, name):
+        self.name = name
+        self.end = None
+        self.phases: Dict[str, float] = {}
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Time a block as a phase of the instrumented callback running in this
+    thread. A no-op outside instrumented callbacks; phases must not nest.
+    """
+    observation = getattr(_local, "observation", None)
+    if observation is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observation.phases[name] = observation.phases.get(name, 0.0) + elapsed
+
+
+class _RollingSummary:
+    """The last window observations, plus the running sum and count of all."""
+
+    __slots__ = ("values", "sum", "count")
+
+    def __init__(self, window):
+        self.values = deque(maxlen=window)
+        self.sum = 0.0
+        self.count = 0
+
+    def add(self, value):
+        self.values.append(value)
+        self.sum += value
+        self.count += 1
+
+
+class CallbackMetrics:
+    """
+    Per-callback latency and response size metrics.
+
+    Callbacks are wrapped with instrument (inside app.callback), and attach
+    hooks the Flask server so the time Dash spends serializing the output
+    and the response size are recorded, and serves /metrics.
+
+    Parameters:
+    window: Number of recent calls the quantiles are computed over;
+        0 disables the instrumentation
+    """
+
+    def __init__(self, window: int = CALLBACK_METRICS_WINDOW):
+        self.window = window
+        self._seconds: Dict[Tuple[str, str], _RollingSummary] = {}
+        self._bytes: Dict[str, _RollingSummary] = {}
+        self._caches: Dict[str, Callable[[], Dict[str, int]]] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------------
+
+    def instrument(self, name: str):
+        """
+        Decorator timing a callback; its output is recorded once the
+        response has been serialized (see attach).
+        """
+
+        def decorator(func):
+            if self.window <= 0:
+                return func
+
+            @functools.wraps(func)
+            def wrapper(*args):
+                observation = _Observation(name)
+                _local.observation = observation
+                try:
+                    start = time.perf_counter()
+                    output = func(*args)
+                    observation.end = time.perf_counter()
+                finally:
+                    _local.observation = None
+                observation.phases["total"] = observation.end - start
+                _local.pending = observation
+                return output
+
+            return wrapper
+
+        return decorator
+
+    def observe(self, name: str, phases: Dict[str, float], size: int) -> None:
+        """Record one call: seconds per phase and the response size in bytes."""
+        with self._lock:
+            for phase_name, seconds in phases.items():
+                key = (name, phase_name)
+                if key not in self._seconds:
+                    self._seconds[key] = _RollingSummary(self.window)
+                self._seconds[key].add(seconds)
+            if name not in self._bytes:
+                self._bytes[name] = _RollingSummary(self.window)
+            self._bytes[name].add(size)
+
+    def track_cache(self, name: str, stats: Callable[[], Dict[str, int]]) -> None:
+        """
+        Serve a cache's stats on /metrics too, labelled cache=name.
+
+        Parameters:
+        name: Label of the cache (e.g. "memory", "store")
+        stats: Returns the current stats, e.g. FigureCache.stats
+        """
+        with self._lock:
+            self._caches[name] = stats
+
+    def _finish(self, response):
+        """Complete the pending observation with serialization time and size."""
+        observation = getattr(_local, "pending", None)
+        if observation is None:
+            return response
+        _local.pending = None
+
+        # Dash serializes the output after the callback returns
+        after = time.perf_counter() - observation.end
+        phases = observation.phases
+        callback = phases["total"]
+        inside = phases.get("serialize", 0.0)
+        phases["select"] = max(0.0, callback - phases.get("figure", 0.0) - inside)
+        phases["serialize"] = inside + after
+        phases["total"] = callback + after
+        self.observe(
+            observation.name,
+            {name: phases.get(name, 0.0) for name in PHASES},
+            response.calculate_content_length() or 0,
+        )
+        return response
+
+    def attach(self, server) -> None:
+        """Record every instrumented response of server and serve /metrics."""
+        if self.window <= 0:
+            return
+
+        @server.before_request
+        def _reset_pending():
+            # Drop an observation left behind by a request that failed
+            _local.pending = None
+
+        server.after_request(self._finish)
+        server.add_url_rule("/metrics", "callback_metrics", self._metrics_view)
+
+    # ------------------------------------------------------------------------
+    # Exposition
+    # ------------------------------------------------------------------------
+
+    def _metrics_view(self):
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        with self._lock:
+            seconds = {
+                key: (list(s.values), s.sum, s.count)
+                for key, s in sorted(self._seconds.items())
+            }
+            sizes = {
+                key: (list(s.values), s.sum, s.count)
+                for key, s in sorted(self._bytes.items())
+            }
+            caches = dict(self._caches)
+
+        lines = [
+            "# HELP dash_callback_duration_seconds Callback wall time by phase "
+            f"(quantiles over the last {self.window} calls).",
+            "# TYPE dash_callback_duration_seconds summary",
+        ]
+        for (name, phase_name), summary in seconds.items():
+            labels = f'callback="{name}",phase="{phase_name}"'
+            lines += _summary_lines("dash_callback_duration_seconds", labels, *summary)
+
+        lines += [
+            "# HELP dash_callback_response_bytes Callback response body size "
+            f"(quantiles over the last {self.window} calls).",
+            "# TYPE dash_callback_response_bytes summary",
+        ]
+        for name, summary in sizes.items():
+            labels = f'callback="{name}"'
+            lines += _summary_lines("dash_callback_response_bytes", labels, *summary)
+
+        lines += _cache_lines({name: stats() for name, stats in caches.items()})
+        return "\n".join(lines) + "\n"
+
+
+def _cache_lines(stats):
+    """One counter or gauge per cache stat, with a sample per cache."""
+    lines = []
+    names = sorted({key for values in stats.values() for key in values})
+    for key in names:
+        words = key.replace("_", " ")
+        if key in CACHE_COUNTERS:
+            metric, kind = f"dash_figure_cache_{key}_total", "counter"
+            text = f"Figure cache {words} in this process."
+        else:
+            metric, kind = f"dash_figure_cache_{key}", "gauge"
+            text = f"Figure cache {words} (the store's: of the shared file)."
+        lines += [f"# HELP {metric} {text}", f"# TYPE {metric} {kind}"]
+        lines += [
+            f'{metric}{{cache="{name}"}} {values[key]}'
+            for name, values in sorted(stats.items())
+            if key in values
+        ]
+    return lines
+
+
+def _summary_lines(metric, labels, values, total, count):
+    """Quantile, _sum and _count samples of one summary."""
+    quantiles = np.quantile(values, QUANTILES)
+    lines = [
+        f'{metric}{{{labels},quantile="{q}"}} {value:.6g}'
+        for q, value in zip(QUANTILES, quantiles)
+    ]
+    lines.append(f"{metric}_sum{{{labels}}} {total:.6g}")
+    lines.append(f"{metric}_count{{{labels}}} {count}")
+    return lines
@@ -0,0 +1,122 @@
+# ============================================================================
+# FIGURE SKELETON MODULE
+# ============================================================================
+# This file contains figure skeletons: a figure built once with plotly
+# express (template, hover templates, axes, annotations and trace styling
+# included), serialized to JSON with named slots where the per-request
+# values go. Rendering a skeleton joins the pre-serialized pieces with the
+# serialized slot values, so a request with an already seen structure
+# (breakpoint, height, facets, traces) never calls plotly express.
+# ============================================================================
+
+"""Pre-serialized figures with slots for the per-request data."""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Sequence
+
+import numpy as np
+from _plotly_utils.utils import to_typed_array_spec
+from plotly.io.json import to_json_plotly
+
+from config import FIGURE_SKELETON_ENTRIES
+from src.figure_diff import figure_json
+
+SLOT_MARKER = "__skeleton_slot_{}__"
+SLOT_PATTERN = re.compile(r'"__skeleton_slot_(\w+)__"')
+
+
+def encode_value(value) -> str:
+    """
+    JSON of a slot value, encoded the way plotly encodes figure properties.
+
+    Numeric NumPy arrays become typed arrays ({"dtype", "bdata"}); other
+    values (lists, strings, numbers) are plain JSON.
+    """
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        value = to_typed_array_spec(value)
+    return to_json_plotly(value)
+
+
+class FigureSkeleton:
+    """
+    A serialized figure with named slots.
+
+    Parameters:
+    figure: Figure (go.Figure or serialized dict) built for one request
+    slots: Slot name -> paths (tuples of dict keys and list indices) of the
+        properties it fills; a slot may fill several properties
+    """
+
+    def __init__(self, figure, slots: Dict[str, Sequence[tuple]]):
+        data = figure_json(figure)
+        for name, paths in slots.items():
+            for path in paths:
+                parent = data
+                for key in path[:-1]:
+                    parent = parent[key]
+                parent[path[-1]] = SLOT_MARKER.format(name)
+
+        # Text between the slots, and the slot filling each gap
+        pieces = SLOT_PATTERN.split(
+            json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        )
+        self._texts = pieces[0::2]
+        self._slots = pieces[1::2]
+        self.slot_names = frozenset(slots)
+
+    def render_json(self, values: Dict[str, object]) -> str:
+        """Serialized figure with every slot filled from values."""
+        encoded = {name: encode_value(values[name]) for name in self.slot_names}
+        parts = [self._texts[0]]
+        for name, text in zip(self._slots, self._texts[1:]):
+            parts.append(encoded[name])
+            parts.append(text)
+        return "".join(parts)
+
+    def render(self, values: Dict[str, object]) -> dict:
+        """Figure dict with every slot filled from values."""
+        return json.loads(self.render_json(values))
+
+
+class SkeletonCache:
+    """
+    Least-recently-used skeletons by figure structure.
+
+    A structure key holds everything a skeleton fixes (chart, breakpoint,
+    height, selected facets, ...). max_entries=0 disables skeletons: every
+    lookup misses, so callers always build with plotly express.
+    """
+
+    def __init__(self, max_entries: int = FIGURE_SKELETON_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, FigureSkeleton]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[FigureSkeleton]:
+        """Skeleton stored under key, or None."""
+        with self._lock:
+            skeleton = self._entries.get(key)
+            if skeleton is not None:
+                self._entries.move_to_end(key)
+            return skeleton
+
+    def put(self, key: Hashable, skeleton: FigureSkeleton) -> None:
+        """Store a skeleton, evicting the least recently used ones."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = skeleton
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every skeleton (e.g. when the datasets are rebuilt)."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,44 @@
+# ============================================================================
+# STARTUP TIMING MODULE
+# ============================================================================
+# This file contains the startup timer dash_app uses to measure each phase
+# of a cold start (imports, app creation, data load, layout build, callback
+# registration). benchmarks/bench_startup.py reads the phases from a fresh
+# process and holds them to a budget.
+#
+# Imports nothing beyond the standard library, so dash_app can start the
+# clock before its own imports.
+# ============================================================================
+
+"""Wall time of each phase of the application's startup."""
+
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StartupTimer:
+    """Seconds spent in each named startup phase, in the order they ran."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block as a startup phase (repeated names add up)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    @property
+    def total(self) -> float:
+        """Seconds spent in every phase."""
+        return sum(self.phases.values())
+
+    def report(self) -> str:
+        """Human-readable summary of how long each phase took."""
+        parts = [f"{name} {secs * 1000:.0f} ms" for name, secs in self.phases.items()]
+        return f"Startup: {', '.join(parts)} (total {self.total * 1000:.0f} ms)"
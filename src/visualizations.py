@@ -2,31 +2,82 @@
 # VISUALIZATION FUNCTIONS
 # ============================================================================
 # This file contains helper functions for creating and processing visualizations
-# including gender ratio charts, choropleth data preparation, and national
-# trend context calculations for the dashboard.
+# including gender ratio charts, choropleth data preparation, county heatmap
+# ordering, and national trend context calculations for the dashboard.
 # ============================================================================
 
 
+import threading
+
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
 import plotly.io as pio
-from config import BG_COLOR, TEXT_COLOR, FACET_COLORS, TEXT_COLOR
+from dash import Patch
+from config import BG_COLOR, TEXT_COLOR, FACET_COLORS, TEXT_COLOR, bengtegard_template
+from src.gender_ratio import RATIO_COLUMN, boys_girls_ratio
 
+TEMPLATE_NAME = "bengtegard"
 
-def apply_responsive_layout(
-    fig, breakpoint, width=None, height=None, chart_type="line"
-):
+_template_lock = threading.Lock()
+
+
+def dashboard_template():
+    """
+    Name of the dashboard's plotly template, registered on first use.
+
+    Returns:
+    str: The name to pass as a figure's template
+    """
+    if TEMPLATE_NAME not in pio.templates:
+        with _template_lock:
+            if TEMPLATE_NAME not in pio.templates:
+                pio.templates[TEMPLATE_NAME] = go.layout.Template(bengtegard_template)
+    return TEMPLATE_NAME
+
+
+def responsive_height(breakpoint, height=None, chart_type="line"):
+    """
+    Figure height for a breakpoint.
+
+    Bar and ratio charts (and maps on desktop/large) have a fixed height per
+    breakpoint; other charts use the viewport height, capped per breakpoint.
+
+    Parameters:
+    breakpoint: 'mobile', 'tablet', 'desktop' or 'large'
+    height: Viewport height in pixels (optional)
+    chart_type: 'line', 'bar', 'ratio' or 'map'
+
+    Returns:
+    int: Height in pixels
     """
-    Adjust figure layout based on breakpoint and optionally width/height.
+    if breakpoint == "mobile":
+        return {"bar": 300, "ratio": 350}.get(chart_type, min(height or 400, 400))
+    elif breakpoint == "tablet":
+        return {"bar": 400, "ratio": 450}.get(chart_type, min(height or 500, 500))
+    elif breakpoint == "desktop":
+        return {"bar": 500, "ratio": 550, "map": 550}.get(
+            chart_type, min(height or 650, 650)
+        )
+    elif breakpoint == "large":
+        return {"bar": 550, "ratio": 650, "map": 700}.get(
+            chart_type, min(height or 800, 800)
+        )
+    # Fallback
+    return min(height or 600, 600)
+
+
+def responsive_layout(breakpoint, height=None, chart_type="line"):
+    """
+    Layout properties for a breakpoint and optionally the viewport height.
     chart_type: 'line', 'bar', 'ratio' or 'map'
 
     KEY FIX: Ratio charts need more right margin for legend placement
     """
-    fig.update_layout(autosize=True)
+    h = responsive_height(breakpoint, height, chart_type)
 
     # Define configs per breakpoint
     if breakpoint == "mobile":
-        h = {"bar": 300, "ratio": 350}.get(chart_type, min(height or 400, 400))
         font_size = 8
 
         if chart_type == "ratio":
@@ -61,7 +112,6 @@ def apply_responsive_layout(
             )
 
     elif breakpoint == "tablet":
-        h = {"bar": 400, "ratio": 450}.get(chart_type, min(height or 500, 500))
         font_size = 10
 
         if chart_type == "ratio":
@@ -96,9 +146,6 @@ def apply_responsive_layout(
             )
 
     elif breakpoint == "desktop":
-        h = {"bar": 500, "ratio": 550, "map": 550}.get(
-            chart_type, min(height or 650, 650)
-        )
         font_size = 12
 
         if chart_type == "ratio":
@@ -133,9 +180,6 @@ def apply_responsive_layout(
             )
 
     elif breakpoint == "large":
-        h = {"bar": 550, "ratio": 650, "map": 700}.get(
-            chart_type, min(height or 800, 800)
-        )
         font_size = 12
 
         if chart_type == "ratio":
@@ -171,7 +215,6 @@ def apply_responsive_layout(
 
     else:
         # Fallback
-        h = min(height or 600, 600)
         font_size = 12
         margin = dict(l=60, r=40, t=60, b=60)
         legend_config = dict(
@@ -183,8 +226,8 @@ def apply_responsive_layout(
             font=dict(size=10),
         )
 
-    # Apply layout updates
-    fig.update_layout(
+    return dict(
+        autosize=True,
         height=h,
         font=dict(size=font_size),
         margin=margin,
@@ -192,9 +235,37 @@ def apply_responsive_layout(
         showlegend=True,
     )
 
+
+def apply_responsive_layout(
+    fig, breakpoint, width=None, height=None, chart_type="line"
+):
+    """Adjust figure layout based on breakpoint and optionally width/height."""
+    fig.update_layout(**responsive_layout(breakpoint, height, chart_type))
     return fig
 
 
+def responsive_layout_patch(breakpoint, height=None, chart_type="line", patch=None):
+    """
+    apply_responsive_layout as a dash Patch, for a figure already on the page.
+
+    Each property is assigned at its leaf, so other properties of the same
+    objects (e.g. a legend title set by the chart) are kept, as they are by
+    update_layout.
+    """
+    patch = Patch() if patch is None else patch
+    layout = go.Layout(**responsive_layout(breakpoint, height, chart_type))
+
+    def _assign(target, values):
+        for key, value in values.items():
+            if isinstance(value, dict):
+                _assign(target[key], value)
+            else:
+                target[key] = value
+
+    _assign(patch["layout"], layout.to_plotly_json())
+    return patch
+
+
 def plot_gender_ratios(df):
     """Calculate Boys/Girls prescription ratios and plot by age group."""
     gender_only = df[df["sex"].isin(["Boys", "Girls"])].copy()
@@ -205,10 +276,21 @@ def plot_gender_ratios(df):
         columns="sex",
         values="patients_per_1000",
         fill_value=0,
+        observed=True,
     ).reset_index()
 
-    # Avoid division by zero
-    pivot["Boys_Girls_Ratio"] = pivot["Boys"] / pivot["Girls"].replace(0, 0.001)
+    pivot[RATIO_COLUMN] = boys_girls_ratio(pivot["Boys"], pivot["Girls"])
+    return plot_gender_ratio_frame(pivot)
+
+
+def plot_gender_ratio_frame(ratios):
+    """
+    Plot Boys/Girls ratios (columns year, age_group, Boys_Girls_Ratio) by
+    age group; missing ratios are gaps in the lines.
+    """
+    import plotly.express as px
+
+    pivot = ratios.copy()
 
     # Define age order
     age_order = ["5-9", "10-14", "15-19", "20-24"]
@@ -220,7 +302,7 @@ def plot_gender_ratios(df):
     fig = px.line(
         pivot,
         x="year",
-        y="Boys_Girls_Ratio",
+        y=RATIO_COLUMN,
         color="age_group",
         markers=True,
         color_discrete_map=FACET_COLORS,
@@ -237,7 +319,7 @@ def plot_gender_ratios(df):
         xaxis_title="Year",
         xaxis=dict(tick0=2006, dtick=2),
         legend_title_text="Age Group",
-        template="bengtegard",
+        template=dashboard_template(),
         paper_bgcolor=BG_COLOR,
         plot_bgcolor=BG_COLOR,
         font_color=TEXT_COLOR,
@@ -328,7 +410,14 @@ def get_national_trend_context(df_national, current_year, age_group, sex):
     """
     current_avg = calculate_national_average(df_national, current_year, age_group, sex)
     baseline_avg = calculate_national_average(df_national, 2006, age_group, sex)
+    return format_national_trend(current_avg, baseline_avg)
+
 
+def format_national_trend(current_avg, baseline_avg):
+    """
+    National trend text from the current and the 2006 national values
+    (patients per 1000, None if missing).
+    """
     if None in [current_avg, baseline_avg]:
         return "Insufficient data"
 
@@ -342,3 +431,63 @@ def get_national_trend_context(df_national, current_year, age_group, sex):
 
     sign = "+" if total_change >= 0 else ""
     return f"National average: {percentage:.1f}% ({sign}{total_change:.0f}% since 2006)"
+
+
+def _latest_values(values):
+    """Last non-missing value of every row (NaN for empty rows)."""
+    present = ~np.isnan(values)
+    last = values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+    latest = values[np.arange(len(values)), last]
+    return np.where(present.any(axis=1), latest, np.nan)
+
+
+def _similarity_order(values):
+    """
+    Leaf order of an average-linkage clustering of the rows' trajectories.
+
+    Rows are standardised first (shape, not level, of the trajectory
+    counts), so neighbouring rows in the order have similar trajectories.
+    """
+    mean = np.nanmean(values, axis=1, keepdims=True)
+    std = np.nanstd(values, axis=1, keepdims=True)
+    shapes = np.nan_to_num((values - mean) / np.where(std > 0, std, 1.0))
+    distance = np.sqrt(((shapes[:, None, :] - shapes[None, :, :]) ** 2).sum(axis=2))
+
+    # Merge the two closest clusters until one is left; a cluster is the
+    # list of its rows in display order. Average-linkage distances of a
+    # merged cluster are the size-weighted mean of its parts' distances.
+    clusters = [[i] for i in range(len(values))]
+    linkage = distance.copy()
+    np.fill_diagonal(linkage, np.inf)
+    active = list(range(len(values)))
+    while len(active) > 1:
+        nearest = linkage[np.ix_(active, active)]
+        i, j = np.unravel_index(np.argmin(nearest), nearest.shape)
+        a, b = sorted((active[i], active[j]))
+        size_a, size_b = len(clusters[a]), len(clusters[b])
+        merged = (size_a * linkage[a] + size_b * linkage[b]) / (size_a + size_b)
+        linkage[a, :] = linkage[:, a] = merged
+        linkage[a, a] = np.inf
+        clusters[a] = clusters[a] + clusters[b]
+        active.remove(b)
+    return clusters[active[0]]
+
+
+def county_order(values, order="code"):
+    """
+    Row order of a county x year heatmap.
+
+    Parameters:
+    values: County x year matrix (NaN where there is no data)
+    order: 'code' (the order counties come in), 'latest' (lowest latest
+        value first, so the highest ends up at the top of the heatmap) or
+        'similarity' (counties with similar trajectories next to each other)
+
+    Returns:
+    np.ndarray: Row indices in display order (bottom to top)
+    """
+    if order == "latest":
+        return np.argsort(_latest_values(values), kind="stable")
+    if order == "similarity" and len(values) > 1:
+        return np.asarray(_similarity_order(values))
+    return np.arange(len(values))
@@ -0,0 +1,268 @@
+# ============================================================================
+# CACHE WARM-UP MODULE
+# ============================================================================
+# This file contains the warm-up phase that builds every figure the main
+# callbacks can produce and writes it to the shared figure store, so no
+# user ever waits for a figure to be built. The input space is small and
+# enumerable; the work is spread over a pool of forked processes.
+#
+# Run from the repository root:
+#     python -m src.warmup [--workers N] [--callbacks NAME ...]
+# ============================================================================
+
+"""Pre-build every dashboard figure into the shared figure store."""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Sequence, Tuple
+
+import dash
+
+from config import (
+    CHOROPLETH_CLIENTSIDE_ANIMATION,
+    FIGURE_STORE_PATH,
+    GENDER_MAP,
+    VALID_AGE_GROUPS,
+)
+from src.callbacks import register_callbacks
+from src.data_registry import get_registry
+from src.figure_cache import FigureCache
+from src.figure_store import SQLiteFigureStore
+from src.layouts import (
+    breakpoint_names,
+    county_options,
+    heatmap_order_options,
+    medication_options,
+)
+
+# Callbacks whose outputs are cached, in the order they are warmed
+WARMUP_CALLBACKS = (
+    "relayout_figures",
+    "barplot_20_vs_24",
+    "update_gender_ratio",
+    "update_line_chart",
+    "update_heatmap",
+    "update_choropleth",
+    (
+        "load_choropleth_years"
+        if CHOROPLETH_CLIENTSIDE_ANIMATION
+        else "patch_choropleth"
+    ),
+)
+
+# Print progress roughly this many times per run
+PROGRESS_STEPS = 20
+
+# Callback functions of a pool worker, set by _init_worker
+_callbacks = None
+
+
+def _option_values(options) -> List[str]:
+    return [option["value"] for option in options if not option.get("disabled")]
+
+
+def _subsets(values: Sequence[str]) -> List[List[str]]:
+    """Every subset of a checklist's values (including none selected)."""
+    return [
+        list(subset)
+        for size in range(len(values) + 1)
+        for subset in itertools.combinations(values, size)
+    ]
+
+
+def warmup_tasks(
+    registry, callbacks=WARMUP_CALLBACKS, every_request=False
+) -> List[Tuple[str, tuple]]:
+    """
+    Enumerate the arguments of every figure the cached callbacks can build.
+
+    The breakpoint width/height State values are passed as None, which gives
+    each chart its full height for the breakpoint (the height every viewport
+    taller than the cap is clamped to). The first breakpoint, which the
+    figures wait for, is the breakpoint itself, and the map is relayouted
+    from every level of detail it can have been built with (or from none).
+
+    Parameters:
+    registry: DataRegistry the callbacks read from (for the list of years)
+    callbacks: Names of the callbacks to warm
+    every_request: Also list arguments that only differ in inputs the
+        figure ignores (the county order of single-county heatmaps), as the
+        static export needs one response per request
+
+    Returns:
+    list: (callback name, argument tuple) pairs
+    """
+    medications = _option_values(medication_options)
+    counties = _option_values(county_options)
+    orders = _option_values(heatmap_order_options)
+    sexes = list(GENDER_MAP.values())
+    ages = list(VALID_AGE_GROUPS)
+    years = registry.cube.labels["year"]
+    size = (None, None)
+
+    arguments = {
+        "relayout_figures": [
+            (bp,) + size + (map_level,)
+            for bp in breakpoint_names
+            for map_level in [None] + breakpoint_names
+        ],
+        "barplot_20_vs_24": [(1, bp) + size for bp in breakpoint_names],
+        "update_gender_ratio": [
+            (medication, county, bp, bp) + size
+            for bp in breakpoint_names
+            for medication in medications
+            for county in counties
+        ],
+        "update_line_chart": [
+            (medication, sex_selection, age_selection, bp, None, bp) + size
+            for bp in breakpoint_names
+            for medication in medications
+            for sex_selection in _subsets(sexes)
+            for age_selection in _subsets(ages)
+        ],
+        "update_heatmap": [
+            (medication, county, sex, age, order, bp, bp) + size
+            for bp in breakpoint_names
+            for medication in medications
+            for county in counties
+            for sex in sexes
+            for age in ages
+            # The order only applies to the all-counties heatmap
+            for order in (
+                orders if every_request or county == "All counties" else orders[:1]
+            )
+        ],
+        "update_choropleth": [
+            (bp, bp, year, sex, age) + size
+            for bp in breakpoint_names
+            for year in years
+            for sex in sexes
+            for age in ages
+        ],
+        "patch_choropleth": [
+            (year, sex, age) for year in years for sex in sexes for age in ages
+        ],
+        "load_choropleth_years": [(sex, age) for sex in sexes for age in ages],
+    }
+
+    return [(name, args) for name in callbacks for args in arguments[name]]
+
+
+def _init_worker(store_path: str) -> None:
+    """Register the callbacks on a throwaway app, writing only to the store."""
+    global _callbacks
+    registry = get_registry().load_all()
+    figure_cache = FigureCache(max_bytes=0, store=SQLiteFigureStore(store_path))
+    _callbacks = register_callbacks(dash.Dash(__name__), registry, figure_cache)
+
+
+def _build(task: Tuple[str, tuple]) -> Optional[str]:
+    """Run one callback; returns an error message instead of raising."""
+    name, args = task
+    try:
+        _callbacks[name](*args)
+    except Exception as e:
+        return f"{name}{args}: {type(e).__name__}: {e}"
+    return None
+
+
+def warm_up(
+    registry=None,
+    workers: Optional[int] = None,
+    callbacks=WARMUP_CALLBACKS,
+    store_path: str = FIGURE_STORE_PATH,
+) -> dict:
+    """
+    Build every figure of the cached callbacks into the shared figure store.
+
+    Figures already in the store are not rebuilt, so warming an up-to-date
+    store is quick. The pool forks: dash_app warms up while it is imported
+    (WARMUP_ON_STARTUP), and spawned workers would import it, and start
+    the warm-up, again. Where forking is unavailable or unsafe (Windows,
+    macOS) the figures are built serially.
+
+    Parameters:
+    registry: DataRegistry (default: the process-wide one)
+    workers: Number of worker processes (default: one per CPU)
+    callbacks: Names of the callbacks to warm
+    store_path: SQLite file of the shared figure store
+
+    Returns:
+    dict: Number of figures, failures and the total time in seconds
+    """
+    registry = registry or get_registry()
+    tasks = warmup_tasks(registry, callbacks)
+    workers = workers or os.cpu_count() or 1
+    can_fork = "fork" in multiprocessing.get_all_start_methods()
+    if not can_fork or sys.platform == "darwin":
+        workers = 1
+    step = max(1, len(tasks) // PROGRESS_STEPS)
+
+    print(f"Warm-up: building {len(tasks)} figures with {workers} worker(s)...")
+    start = time.perf_counter()
+    errors = []
+
+    def _collect(results):
+        for done, error in enumerate(results, start=1):
+            if error is not None:
+                errors.append(error)
+            if done % step == 0 or done == len(tasks):
+                elapsed = time.perf_counter() - start
+                print(
+                    f"Warm-up: {done}/{len(tasks)} figures "
+                    f"({done / len(tasks):.0%}), {elapsed:.1f} s"
+                )
+
+    parallel = workers > 1
+    if parallel:
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_worker,
+                initargs=(store_path,),
+            ) as pool:
+                _collect(pool.map(_build, tasks, chunksize=8))
+        except (OSError, BrokenProcessPool) as e:
+            # Figures stored before the failure are store hits on the retry
+            print(f"Process pool unavailable ({e}), warming up serially")
+            errors.clear()
+            parallel = False
+
+    if not parallel:
+        _init_worker(store_path)
+        _collect(map(_build, tasks))
+
+    total = time.perf_counter() - start
+    for error in errors[:10]:
+        print(f"Warm-up failed: {error}")
+    stats = SQLiteFigureStore(store_path).stats()
+    print(
+        f"Warm-up finished in {total:.1f} s: {len(tasks) - len(errors)} built, "
+        f"{len(errors)} failed; store holds {stats['entries']} figures, "
+        f"{stats['size_bytes'] / 2**20:.1f} of {stats['max_bytes'] / 2**20:.0f} MB"
+    )
+
+    return {"figures": len(tasks), "failed": len(errors), "seconds": total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--callbacks", nargs="+", choices=WARMUP_CALLBACKS, default=WARMUP_CALLBACKS
+    )
+    parser.add_argument("--store", default=FIGURE_STORE_PATH)
+    args = parser.parse_args()
+
+    warm_up(workers=args.workers, callbacks=args.callbacks, store_path=args.store)
+
+
+if __name__ == "__main__":
+    main()
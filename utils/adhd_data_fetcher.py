@@ -49,6 +49,12 @@ ATC_CODES = {
     "N06BA02": "Dexamfetamin"
 }
 
+# Aggregate ATC groups, fetched the same way as single codes.
+# "Adhd-läkemedel" (N06BA + C02AC02) is the "All medications" series.
+ATC_GROUPS = {
+    "N06BA,C02AC02": "Adhd-läkemedel",
+}
+
 
 # Mappings from Socialstyrelsens metadata
 REGION_MAP = {
@@ -113,17 +119,19 @@ def _build_api_url(
     regions: List[int], 
     age_groups: List[int], 
     genders: List[int], 
-    years: List[int]
+    years: List[int],
+    base_url: str = BASE_RESULT_URL
 ) -> str:
     """
     Build the API URL with specified filters.
     
     Args:
-        atc_code: ATC code for the medication
+        atc_code: ATC code (or comma-separated ATC group) for the medication
         regions: List of region codes
         age_groups: List of age group codes
         genders: List of gender codes
         years: List of years
+        base_url: Result endpoint to query (e.g. a local stub of the API)
         
     Returns:
         Complete API URL string
@@ -133,7 +141,7 @@ def _build_api_url(
     gender_str = ','.join(map(str, genders))
     year_str = ','.join(map(str, years))
     
-    url = (f"{BASE_RESULT_URL}/atc/{atc_code}/region/{region_str}/"
+    url = (f"{base_url}/atc/{atc_code}/region/{region_str}/"
             f"alder/{age_str}/kon/{gender_str}/ar/{year_str}")
     
     logger.debug(f"Built URL: {url}")
@@ -149,6 +157,7 @@ def _fetch_paginated_data(
     Fetch all data from a paginated API endpoint.
     
     Args:
+        session: Session used for every page request
         initial_url: Starting URL for the API request
         headers: Optional HTTP headers
         
@@ -169,7 +178,7 @@ def _fetch_paginated_data(
         logger.debug(f"Fetching page{page}")
 
         try:
-            response = requests.get(url, headers=headers)
+            response = session.get(url, headers=headers)
             response.raise_for_status()
             data_json = response.json()
             
@@ -214,7 +223,9 @@ def fetch_adhd_medication_data(
     age_groups: Optional[List[int]] = None,
     genders: Optional[List[int]] = None,
     years: Optional[List[int]] = None,
-    atc_codes: Optional[Dict[str, str]] = None
+    atc_codes: Optional[Dict[str, str]] = None,
+    base_url: str = BASE_RESULT_URL,
+    session: Optional[requests.Session] = None
 ) -> Dict[str, List[Dict]]:
     """
     Fetch ADHD medication prescription data from Swedish Social Board API.
@@ -224,7 +235,10 @@ def fetch_adhd_medication_data(
         age_groups: List of age group codes (default: [1,2,3,4] for ages 0-19)
         genders: List of gender codes (default: [1,2,3] for men, women, both)
         years: List of years (default: 2006-2025)
-        atc_codes: Dict of ATC codes to medication names (default: ADHD medications)
+        atc_codes: Dict of ATC codes to medication names
+            (default: ADHD medications plus the aggregate ADHD group)
+        base_url: Result endpoint to query (e.g. a local stub of the API)
+        session: Session to use instead of a new retrying session
         
     Returns:
         Dictionary with medication names as keys and prescription data as values
@@ -237,20 +251,24 @@ def fetch_adhd_medication_data(
     age_groups = age_groups or DEFAULT_AGE_GROUPS
     genders = genders or DEFAULT_GENDERS
     years = years or DEFAULT_YEARS
-    atc_codes = atc_codes or ATC_CODES
+    atc_codes = atc_codes or {**ATC_CODES, **ATC_GROUPS}
 
     logger.info(f"Starting fetch for {len(atc_codes)} medications, "
                 f"{len(years)} years ({min(years)}-{max(years)})")
     
     results = {}
-    session = create_session()
+    owns_session = session is None
+    if owns_session:
+        session = create_session()
     
     try:
         for atc_code, medication_name in atc_codes.items():
             logger.info(f"Fetching data for {medication_name} ({atc_code})...")
             
             try:
-                url = _build_api_url(atc_code, regions, age_groups, genders, years)
+                url = _build_api_url(
+                    atc_code, regions, age_groups, genders, years, base_url
+                )
                 medication_data = _fetch_paginated_data(session, url)
                 results[medication_name] = medication_data
                 
@@ -262,7 +280,8 @@ def fetch_adhd_medication_data(
                 continue
                 
     finally:
-        session.close()
+        if owns_session:
+            session.close()
     
     total_records = sum(len(data) for data in results.values())
     logger.info(f"Fetch completed: {total_records:,} total records")
@@ -305,6 +324,10 @@ def convert_json_to_csv(
         logger.info(f"Data spans: {min(data_years)}-{max(data_years)}, "
                    f"{len(data_regions)} regions, {len(data_ages)} age groups")
         
+        atc_by_name = {
+            name: code for code, name in {**ATC_CODES, **ATC_GROUPS}.items()
+        }
+        
         with open(output_csv, "w", newline="", encoding="utf-8") as csvfile:
             writer = csv.writer(csvfile, delimiter=";")
             writer.writerow([
@@ -326,7 +349,9 @@ def convert_json_to_csv(
                     for r in records
                 }
                 
-                sample_atc = records[0]["atcId"] if records else ""
+                # Groups are labelled with their full code list, e.g.
+                # "N06BA,C02AC02 Adhd-läkemedel"
+                sample_atc = atc_by_name.get(med_name) or records[0]["atcId"]
                 
                 # Loop over combinations from selected data, not defaults
                 for ar, region_id, kon_id, alder_id in itertools.product(
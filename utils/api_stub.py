@@ -0,0 +1,178 @@
+"""
+Local stub of the Socialstyrelsen result API, and an end-to-end check of the
+"All medications" ingest against it.
+
+StubSession is a drop-in for the requests.Session that
+fetch_adhd_medication_data uses: it answers every result URL with canned
+records (one value per ATC code or group) split over two pages, without
+any network access.
+
+Run from the repository root:
+    python -m utils.api_stub
+
+The check fetches from the stub, converts the JSON to CSV and runs
+load_and_process_all_data with an empty workbook directory. It fails (exit
+code 1) unless the "All medications" rows come from the API's ADHD group.
+"""
+
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+import pandas as pd
+import requests
+
+from utils.adhd_data_fetcher import (
+    ATC_CODES,
+    ATC_GROUPS,
+    BASE_RESULT_URL,
+    convert_json_to_csv,
+    fetch_adhd_medication_data,
+    save_to_json,
+)
+
+# Canned value per ATC code or group, in the API's Swedish number format
+STUB_VALUES = {
+    **{code: f"{i + 1},5" for i, code in enumerate(ATC_CODES)},
+    "N06BA,C02AC02": "42,125",
+}
+
+STUB_FILTERS = {
+    "regions": [0, 1, 12],
+    "age_groups": [2, 3],
+    "genders": [1, 2, 3],
+    "years": [2023, 2024],
+}
+
+
+class StubResponse:
+    """The parts of requests.Response the fetcher uses."""
+
+    def __init__(self, payload: Dict, status_code: int = 200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} from the API stub")
+
+    def json(self) -> Dict:
+        return self.payload
+
+
+class StubSession:
+    """
+    requests.Session stand-in serving the result endpoint from canned data.
+
+    Args:
+        values: Value per ATC code or group (default: STUB_VALUES)
+        base_url: Result endpoint the stub answers for
+    """
+
+    def __init__(
+        self,
+        values: Optional[Dict[str, str]] = None,
+        base_url: str = BASE_RESULT_URL
+    ):
+        self.values = values or STUB_VALUES
+        self.base_url = base_url
+        self.requests: List[str] = []
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None):
+        self.requests.append(url)
+        path, _, page = url.partition("?sida=")
+        if not path.startswith(self.base_url):
+            return StubResponse({}, status_code=404)
+
+        # .../atc/{code}/region/{r}/alder/{a}/kon/{k}/ar/{y}
+        parts = path[len(self.base_url):].strip("/").split("/")
+        filters = dict(zip(parts[::2], parts[1::2]))
+        atc = filters["atc"]
+        if atc not in self.values:
+            return StubResponse({}, status_code=404)
+
+        records = [
+            {
+                "ar": int(year),
+                "regionId": int(region),
+                "konId": int(gender),
+                "alderId": int(age),
+                "atcId": atc,
+                "varde": self.values[atc],
+            }
+            for year in filters["ar"].split(",")
+            for region in filters["region"].split(",")
+            for gender in filters["kon"].split(",")
+            for age in filters["alder"].split(",")
+        ]
+
+        # Two pages, linked the way the API links them
+        half = len(records) // 2
+        if page:
+            return StubResponse({"data": records[half:], "nasta_sida": None})
+        return StubResponse(
+            {"data": records[:half], "nasta_sida": f"{path}?sida=2"}
+        )
+
+    def close(self) -> None:
+        pass
+
+
+def check_all_medications_from_api() -> List[str]:
+    """
+    Fetch from the stub and process the result without any workbooks.
+
+    Returns:
+        One message per failed check (empty if everything passed)
+    """
+    # Imported here so the stub itself needs nothing beyond the fetcher
+    from src.data_processing import has_api_aggregate, load_and_process_all_data
+
+    session = StubSession()
+    data = fetch_adhd_medication_data(session=session, **STUB_FILTERS)
+
+    failures = []
+    group_name = ATC_GROUPS["N06BA,C02AC02"]
+    if not data.get(group_name):
+        failures.append(f"no records fetched for {group_name}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "stub.json")
+        csv_path = os.path.join(tmp, "stub.csv")
+        save_to_json(data, json_path)
+        convert_json_to_csv(input_json=json_path, output_csv=csv_path)
+        raw_df = pd.read_csv(csv_path, sep=";")
+
+        if not has_api_aggregate(raw_df):
+            failures.append("has_api_aggregate is False for the converted CSV")
+
+        # An empty directory: reading any workbook would leave the group empty
+        workbooks = os.path.join(tmp, "raw")
+        os.makedirs(workbooks)
+        national, regional = load_and_process_all_data(raw_df, workbooks)
+
+    expected = float(STUB_VALUES["N06BA,C02AC02"].replace(",", "."))
+    for name, frame in (("national", national), ("regional", regional)):
+        rows = frame[frame["medication_category"] == "All medications"]
+        if rows.empty:
+            failures.append(f"no All medications rows in the {name} data")
+        elif not (rows["patients_per_1000"] == expected).all():
+            failures.append(
+                f"{name} All medications values are not the API group's "
+                f"({expected})"
+            )
+    return failures
+
+
+def main():
+    failures = check_all_medications_from_api()
+    for message in failures:
+        print(f"FAILED: {message}")
+    if failures:
+        sys.exit(1)
+    print('"All medications" comes from the API group without any workbook')
+
+
+if __name__ == "__main__":
+    main()